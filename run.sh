@@ -6,28 +6,48 @@ if [[ "$OSTYPE" == "linux-gnu"* ]]; then
     export QT_QPA_PLATFORM=xcb
 fi
 
-# Check for Go installation
-if ! command -v go &> /dev/null; then
-    echo "Go is not installed. Please install Go to run this script."
-    exit 1
-fi
-
 # Check for Python installation
 if ! command -v python3 &> /dev/null; then
     echo "Python 3 is not installed. Please install Python 3 to run this script."
     exit 1
 fi
 
-local_go=$(which go)
 local_python=$(which python3)
 
-mkdir -p bin
+# the Go waypoint server is only needed when waypoints are synced over http instead of the web channel
+WAYPOINT_SYNC_MODE=${WAYPOINT_SYNC_MODE:-channel}
+GO_PID=""
 
-if [ -f "bin/server" ]; then
-    last_build_time=$(cat "last_build_time.txt")
-    # if last_build_time is older than 1 hour
-    if [ $(($(date +%s) - last_build_time)) -gt 3600 ]; then
-        echo "Server binary out of date. Rebuilding..."
+if [ "$WAYPOINT_SYNC_MODE" == "http" ]; then
+    # Check for Go installation
+    if ! command -v go &> /dev/null; then
+        echo "Go is not installed. Please install Go or unset WAYPOINT_SYNC_MODE to use the web channel."
+        exit 1
+    fi
+
+    local_go=$(which go)
+
+    mkdir -p bin
+
+    if [ -f "bin/server" ]; then
+        last_build_time=$(cat "last_build_time.txt")
+        # if last_build_time is older than 1 hour
+        if [ $(($(date +%s) - last_build_time)) -gt 3600 ]; then
+            echo "Server binary out of date. Rebuilding..."
+            $local_go mod tidy
+            $local_go build -o bin/server src/web_engine/server.go
+            if [ $? -ne 0 ]; then
+                echo "Failed to build the Go server."
+                exit 1
+            else
+                echo "Go server built successfully."
+                date +%s > last_build_time.txt
+            fi
+        else
+            echo "last_build_time.txt is less than 1 hour old. Skipping build."
+        fi
+    else
+        echo "Server binary not found. Building..."
         $local_go mod tidy
         $local_go build -o bin/server src/web_engine/server.go
         if [ $? -ne 0 ]; then
@@ -37,25 +57,12 @@ if [ -f "bin/server" ]; then
             echo "Go server built successfully."
             date +%s > last_build_time.txt
         fi
-    else
-        echo "last_build_time.txt is less than 1 hour old. Skipping build."
     fi
-else
-    echo "Server binary not found. Building..."
-    $local_go mod tidy
-    $local_go build -o bin/server src/web_engine/server.go
-    if [ $? -ne 0 ]; then
-        echo "Failed to build the Go server."
-        exit 1
-    else
-        echo "Go server built successfully."
-        date +%s > last_build_time.txt
-    fi
-fi
 
-# Start the Go server in the background
-bin/server & 
-GO_PID=$!
+    # Start the Go server in the background
+    bin/server & 
+    GO_PID=$!
+fi
 
 # Start Python script in the background
 $local_python src/main.py &
@@ -65,5 +72,7 @@ PYTHON_PID=$!
 trap "kill $GO_PID $PYTHON_PID" SIGINT
 
 # Wait for both processes to finish
-wait $GO_PID
+if [ -n "$GO_PID" ]; then
+    wait $GO_PID
+fi
 wait $PYTHON_PID
@@ -0,0 +1,68 @@
+"""
+Compare fetching camera frames as raw JPEG against base64 inside the autopilot parameters, against the local stand-in server.
+
+    python src/camera_benchmark.py --frames 200
+"""
+
+import os
+import time
+import argparse
+import threading
+import stand_in_server
+
+
+def run_fetcher(fetcher, frames: int) -> dict[str, float]:
+    """
+    Fetch a fixed number of frames.
+
+    Parameters
+    ----------
+    fetcher
+        The `thread_classes.ImageFetcher` to benchmark.
+    frames
+        Number of frames to fetch.
+
+    Returns
+    -------
+    dict[str, float]
+        KiB received per frame, milliseconds spent decoding per frame, total milliseconds per frame
+        and KiB per frame the web view was sent through `runJavaScript` before frames were served to it.
+    """
+
+    base64_bytes = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        base64_bytes += (len(fetcher.fetch_image()) + 2) // 3 * 4
+    elapsed = time.perf_counter() - start
+
+    return {
+        "kib_per_frame": fetcher.bytes_received / fetcher.frames_received / 1024,
+        "decode_ms": 1000 * fetcher.decode_seconds / frames,
+        "total_ms": 1000 * elapsed / frames,
+        "base64_kib_per_frame": base64_bytes / frames / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    server = stand_in_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["TELEMETRY_SERVER_URL"] = f"http://127.0.0.1:{server.server_port}/"
+
+    # imported after setting the url since `constants` reads it on import
+    import thread_classes
+
+    for source in ("autopilot_parameters", "camera_frame"):
+        result = run_fetcher(thread_classes.ImageFetcher(source), args.frames)
+        print(
+            f"{source:>20}: {result['kib_per_frame']:.1f} KiB per frame, "
+            f"{result['decode_ms']:.2f} ms decode, {result['total_ms']:.2f} ms per frame"
+        )
+    print(
+        f"base64 sent through runJavaScript before: {result['base64_kib_per_frame']:.1f} KiB per frame"
+    )
+
+    server.boat.stop()
@@ -0,0 +1,543 @@
+import os
+import mmap
+import queue
+import struct
+import threading
+import time
+import numpy as np
+import constants
+from pathlib import PurePath
+from typing import BinaryIO, Optional
+
+# one index record per frame: unix time the frame was received, offset of the frame in the frames file and its length
+INDEX_RECORD = struct.Struct("<dQI")
+
+# the same layout as `INDEX_RECORD`, to read a whole index file at once
+INDEX_DTYPE = np.dtype([("time", "<f8"), ("offset", "<u8"), ("length", "<u4")])
+
+
+class CameraRecorder:
+    """
+    Recorder that appends every new camera frame to disk.
+
+    Frames are queued by `record` and written by a background thread, so the live view never waits on disk.
+    Each recording session is a directory in `constants.CAMERA_DATA_DIR` named `session_<timestamp>`,
+    where `<timestamp>` is nanoseconds since unix epoch. A session is made of segments, each a pair of files:
+    `segment_<index>.frames` holds the JPEG files back to back, and `segment_<index>.index` holds one
+    `INDEX_RECORD` per frame. A frame is written before its index record, so every complete
+    index record points at a complete frame even if the ground station stops mid-write.
+
+    Once all sessions together take more than `max_total_bytes`, the oldest segments are deleted.
+
+    Parameters
+    ----------
+    directory
+        The directory to create the session directory in.
+    max_segment_bytes
+        Start a new segment once the frames file of the current one reaches this size.
+    max_total_bytes
+        Maximum size of all recorded sessions in `directory` together.
+    max_queued_frames
+        Maximum number of frames waiting to be written. Frames recorded while the queue is full are dropped.
+    flush_interval
+        Maximum number of seconds written frames stay in the file buffer before being flushed to disk.
+
+    Attributes
+    ----------
+    session_dir : `PurePath`
+        The directory the current session is written to.
+    frames_recorded : `int`
+        Number of frames written to disk.
+    frames_dropped : `int`
+        Number of frames dropped because the writer could not keep up.
+    segments_deleted : `int`
+        Number of segments deleted to stay under `max_total_bytes`.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        directory: PurePath = constants.CAMERA_DATA_DIR,
+        max_segment_bytes: int = constants.CAMERA_RECORDER_MAX_SEGMENT_BYTES,
+        max_total_bytes: int = constants.CAMERA_RECORDER_MAX_TOTAL_BYTES,
+        max_queued_frames: int = constants.CAMERA_RECORDER_MAX_QUEUED_FRAMES,
+        flush_interval: float = constants.FLIGHT_RECORDER_FLUSH_INTERVAL,
+    ) -> None:
+        self.directory = directory
+        self.session_dir = PurePath(directory / f"session_{time.time_ns()}")
+        self.max_segment_bytes = max_segment_bytes
+        self.max_total_bytes = max_total_bytes
+        self.flush_interval = flush_interval
+        self.frames_recorded = 0
+        self.frames_dropped = 0
+        # `frames_dropped` is counted by the thread calling `record` and by the writer thread
+        self._dropped_lock = threading.Lock()
+        self.segments_deleted = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued_frames)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._frames: Optional[BinaryIO] = None
+        self._index: Optional[BinaryIO] = None
+        self._segment_index = 0
+        self._segment_bytes = 0
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+
+        self._thread.start()
+
+    def record(self, image: bytes) -> None:
+        """
+        Queue a frame to be written. Never blocks, if the queue is full the frame is dropped.
+
+        Parameters
+        ----------
+        image
+            The JPEG file of the frame.
+        """
+
+        try:
+            self._queue.put_nowait((time.time(), image))
+        except queue.Full:
+            with self._dropped_lock:
+                self.frames_dropped += 1
+
+    def stop(self) -> None:
+        """Write every queued frame, close the current segment and stop the writer thread."""
+
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _close_segment(self) -> None:
+        if self._frames is not None:
+            self._frames.close()
+            self._index.close()
+            self._frames = None
+            self._index = None
+
+    def _open_segment(self) -> None:
+        """Close the current segment, if any, start a new one and delete old segments if needed."""
+
+        self._close_segment()
+        self._enforce_retention()
+
+        os.makedirs(self.session_dir, exist_ok=True)
+        name = f"segment_{self._segment_index:05d}"
+        self._frames = open(PurePath(self.session_dir / f"{name}.frames"), "ab")
+        self._index = open(PurePath(self.session_dir / f"{name}.index"), "ab")
+        self._segment_index += 1
+        self._segment_bytes = 0
+
+    def _enforce_retention(self) -> None:
+        """Delete the oldest segments of any session until everything recorded fits in `max_total_bytes`."""
+
+        segments = list_all_segments(self.directory)
+        sizes = [segment_size(segment) for segment in segments]
+        total = sum(sizes)
+        # the segment about to be opened is not listed yet, leave room for it
+        for segment, size in zip(segments, sizes):
+            if total + self.max_segment_bytes <= self.max_total_bytes:
+                break
+            for suffix in (".index", ".frames"):
+                try:
+                    os.remove(str(segment) + suffix)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            self.segments_deleted += 1
+
+            session_dir = os.path.dirname(segment)
+            if session_dir != str(self.session_dir) and not os.listdir(session_dir):
+                os.rmdir(session_dir)
+
+    def _write(self, items: list[tuple[float, bytes]]) -> None:
+        """
+        Append a batch of frames, rotating segments when they fill up.
+
+        Parameters
+        ----------
+        items
+            Pairs of receive time and JPEG file.
+        """
+
+        for timestamp, image in items:
+            if self._frames is None or self._segment_bytes >= self.max_segment_bytes:
+                self._open_segment()
+
+            self._frames.write(image)
+            self._index.write(
+                INDEX_RECORD.pack(timestamp, self._segment_bytes, len(image))
+            )
+            self._segment_bytes += len(image)
+            self.frames_recorded += 1
+
+    def _flush(self) -> None:
+        # frames first, so the index never points past the end of the frames file
+        self._frames.flush()
+        self._index.flush()
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                items = []
+
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if self._STOP in items:
+                stopping = True
+                items = [item for item in items if item is not self._STOP]
+
+            try:
+                if items:
+                    self._write(items)
+                if self._frames is not None and (
+                    stopping or time.monotonic() - last_flush >= self.flush_interval
+                ):
+                    self._flush()
+                    last_flush = time.monotonic()
+            except OSError as e:
+                with self._dropped_lock:
+                    self.frames_dropped += len(items)
+                print(f"Error: Failed to record camera frames: {e}")
+
+        self._close_segment()
+
+
+def list_segments(session_dir: PurePath) -> list[PurePath]:
+    """
+    List the segments of a recorded session in the order they were written.
+
+    Parameters
+    ----------
+    session_dir
+        The session directory created by `CameraRecorder`.
+
+    Returns
+    -------
+    list[PurePath]
+        Paths to the segments without a suffix, add `.frames` or `.index` to get the files.
+    """
+
+    try:
+        file_names = os.listdir(session_dir)
+    except FileNotFoundError:
+        return []
+
+    return [
+        PurePath(session_dir / file_name[: -len(".index")])
+        for file_name in sorted(file_names)
+        if file_name.startswith("segment_") and file_name.endswith(".index")
+    ]
+
+
+def next_segment(segment: PurePath) -> PurePath:
+    """
+    Get the segment that is written after another one.
+
+    Parameters
+    ----------
+    segment
+        Path to the segment without a suffix.
+
+    Returns
+    -------
+    PurePath
+        Path to the next segment of the same session, which may not exist yet.
+    """
+
+    number = int(segment.name[len("segment_") :])
+    return PurePath(segment.parent / f"segment_{number + 1:05d}")
+
+
+def list_all_segments(directory: PurePath) -> list[PurePath]:
+    """
+    List the segments of every recorded session in a directory, oldest first.
+
+    Parameters
+    ----------
+    directory
+        The directory `CameraRecorder` creates sessions in.
+
+    Returns
+    -------
+    list[PurePath]
+        Paths to the segments without a suffix.
+    """
+
+    try:
+        session_names = sorted(
+            name for name in os.listdir(directory) if name.startswith("session_")
+        )
+    except FileNotFoundError:
+        return []
+
+    # session names hold nanosecond timestamps, which all have the same number of digits
+    segments: list[PurePath] = []
+    for session_name in session_names:
+        segments.extend(list_segments(PurePath(directory / session_name)))
+    return segments
+
+
+def segment_size(segment: PurePath) -> int:
+    """
+    Get the size of a segment on disk.
+
+    Parameters
+    ----------
+    segment
+        Path to the segment without a suffix.
+
+    Returns
+    -------
+    int
+        Size of its frames and index files together in bytes, `0` if they are gone.
+    """
+
+    size = 0
+    for suffix in (".frames", ".index"):
+        try:
+            size += os.path.getsize(str(segment) + suffix)
+        except OSError:
+            pass
+    return size
+
+
+class CameraRecording:
+    """
+    Reads frames back from a session recorded by `CameraRecorder`, including one that is still being recorded.
+
+    Only the indexes are kept in memory. Frames files are memory-mapped, so reading a frame only touches
+    the pages it is in, and finding the frame at a given time is a binary search over the index.
+
+    Parameters
+    ----------
+    session_dir
+        The session directory created by `CameraRecorder`.
+
+    Attributes
+    ----------
+    times : `np.ndarray`
+        Receive time of every frame as unix time, in the order they were recorded.
+    start_overs : `int`
+        Number of refreshes that read the index again from the start because the retention policy
+        deleted old segments. Frame positions from before a start over are no longer valid.
+    """
+
+    def __init__(self, session_dir: PurePath) -> None:
+        self.session_dir = session_dir
+        self.times = np.empty(0, dtype="<f8")
+        self.start_overs = 0
+
+        # arrays that grow by doubling, only the first `_length` entries are frames
+        self._length = 0
+        self._times = np.empty(0, dtype="<f8")
+        self._records = np.empty(0, dtype=INDEX_DTYPE)
+        # segment number of every frame, an index into `_segments`
+        self._segment_of_frame = np.empty(0, dtype=np.int32)
+        self._segments: list[PurePath] = []
+        # bytes of each index file read so far
+        self._index_positions: list[int] = []
+        self._maps: dict[int, mmap.mmap] = dict()
+
+        self.refresh()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def refresh(self) -> int:
+        """
+        Read index records written since the last refresh.
+
+        Only the index of the newest segment known so far and of segments started after it are read,
+        older segments are complete, and the session directory is only listed on the first refresh
+        and after a start over. New records are appended to arrays that double in size when full,
+        so a refresh costs time in the number of new frames, not in the length of the recording.
+
+        Returns
+        -------
+        int
+            Number of frames that were added, all frames still on disk after a start over.
+        """
+
+        # the retention policy deletes the oldest segments first
+        started_over = bool(self._segments) and not os.path.exists(
+            str(self._segments[0]) + ".index"
+        )
+        if started_over:
+            # old segments were deleted by the retention policy, start over
+            self.start_overs += 1
+            self.close()
+            self._segments = []
+            self._index_positions = []
+            self._length = 0
+
+        if not self._segments:
+            segments = list_segments(self.session_dir)
+        else:
+            # segments are numbered in the order they are written, so new ones are found without listing them all
+            segments = list(self._segments)
+            following = next_segment(segments[-1])
+            while os.path.exists(str(following) + ".index"):
+                segments.append(following)
+                following = next_segment(following)
+
+        added = 0
+        for number in range(max(len(self._segments) - 1, 0), len(segments)):
+            if number == len(self._segments):
+                self._segments.append(segments[number])
+                self._index_positions.append(0)
+
+            try:
+                with open(str(segments[number]) + ".index", "rb") as index:
+                    index.seek(self._index_positions[number])
+                    data = index.read()
+            except FileNotFoundError:
+                continue
+
+            # a record that is still being written is read on the next refresh
+            data = data[: len(data) - len(data) % INDEX_DTYPE.itemsize]
+            self._index_positions[number] += len(data)
+            if data:
+                new_records = np.frombuffer(data, dtype=INDEX_DTYPE)
+                self._append(new_records, number)
+                added += len(new_records)
+
+        if added or started_over:
+            self.times = self._times[: self._length]
+        return added
+
+    def _append(self, records: np.ndarray, number: int) -> None:
+        """
+        Add index records read from a segment.
+
+        Parameters
+        ----------
+        records
+            The records, in `INDEX_DTYPE`.
+        number
+            The segment number they were read from.
+        """
+
+        end = self._length + len(records)
+        if end > len(self._records):
+            capacity = max(2 * len(self._records), end, 1024)
+            for name in ("_times", "_records", "_segment_of_frame"):
+                old = getattr(self, name)
+                grown = np.empty(capacity, dtype=old.dtype)
+                grown[: self._length] = old[: self._length]
+                setattr(self, name, grown)
+
+        self._records[self._length : end] = records
+        self._times[self._length : end] = records["time"]
+        self._segment_of_frame[self._length : end] = number
+        self._length = end
+
+    def find(self, timestamp: float) -> Optional[int]:
+        """
+        Find the frame that was shown at a given time, i.e. the last one received at or before it.
+
+        Parameters
+        ----------
+        timestamp
+            The unix time.
+
+        Returns
+        -------
+        Optional[int]
+            Position of the frame, the first frame if `timestamp` is before it, `None` if nothing is recorded.
+        """
+
+        if len(self.times) == 0:
+            return None
+        position = int(np.searchsorted(self.times, timestamp, side="right")) - 1
+        return max(position, 0)
+
+    def frame(self, position: int) -> Optional[bytes]:
+        """
+        Read a recorded frame.
+
+        Parameters
+        ----------
+        position
+            Position of the frame, see `find`.
+
+        Returns
+        -------
+        Optional[bytes]
+            The JPEG file of the frame, `None` if its segment was deleted.
+        """
+
+        record = self._records[position]
+        offset = int(record["offset"])
+        end = offset + int(record["length"])
+        frames_map = self._map(int(self._segment_of_frame[position]), end)
+        if frames_map is None:
+            return None
+        return frames_map[offset:end]
+
+    def frame_at(self, timestamp: float) -> Optional[bytes]:
+        """
+        Read the frame that was shown at a given time.
+
+        Parameters
+        ----------
+        timestamp
+            The unix time.
+
+        Returns
+        -------
+        Optional[bytes]
+            The JPEG file of the frame, `None` if nothing is recorded.
+        """
+
+        position = self.find(timestamp)
+        return self.frame(position) if position is not None else None
+
+    def _map(self, number: int, end: int) -> Optional[mmap.mmap]:
+        """
+        Get a memory map of the frames file of a segment that reaches at least `end`.
+
+        Parameters
+        ----------
+        number
+            The segment number.
+        end
+            The offset the map has to reach, the file is mapped again if it grew past the current map.
+
+        Returns
+        -------
+        Optional[mmap.mmap]
+            The map, `None` if the file is gone.
+        """
+
+        frames_map = self._maps.get(number)
+        if frames_map is not None and len(frames_map) >= end:
+            return frames_map
+        if frames_map is not None:
+            frames_map.close()
+
+        try:
+            with open(str(self._segments[number]) + ".frames", "rb") as f:
+                frames_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._maps.pop(number, None)
+            return None
+        self._maps[number] = frames_map
+        return frames_map if len(frames_map) >= end else None
+
+    def close(self) -> None:
+        """Unmap every frames file."""
+
+        for frames_map in self._maps.values():
+            frames_map.close()
+        self._maps.clear()
@@ -0,0 +1,178 @@
+"""
+Compare the native and web camera render modes: frames per second, main thread time per frame and memory.
+
+Every request to the stand-in camera endpoint returns a different frame, and the camera worker is not rate limited,
+so the frame rate is as high as each render mode allows. Memory is the resident set size of this process
+and all of its child processes, which includes the web engine renderer in web mode. Only works on Linux.
+
+    python src/camera_render_benchmark.py --seconds 10 --modes native web
+"""
+
+import os
+import time
+import argparse
+import threading
+import stand_in_server
+
+# the window is drawn offscreen, so this also runs without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+
+
+class ChangingFrameHandler(stand_in_server.StandInRequestHandler):
+    """
+    Stand-in handler whose camera frame changes on every request, so no frame is skipped as a repeat.
+
+    Inherits
+    -------
+    `stand_in_server.StandInRequestHandler`
+    """
+
+    requests_served = 0
+
+    def send_camera_frame(self) -> None:
+        ChangingFrameHandler.requests_served += 1
+        # JPEG decoders ignore anything after the end of image marker
+        frame = stand_in_server.CAMERA_FRAMES[0] + str(self.requests_served).encode()
+        self.send_body(200, frame, "image/jpeg")
+
+
+def process_tree_rss_kib() -> int:
+    """
+    Get the memory used by this process and its child processes.
+
+    Returns
+    -------
+    int
+        Sum of the resident set sizes in KiB, `0` if `/proc` is not available.
+    """
+
+    pids = {os.getpid()}
+    try:
+        # children are listed after their parents in `/proc`, except when pids wrap around
+        for entry in sorted(os.listdir("/proc"), key=lambda name: (len(name), name)):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if parent in pids:
+                pids.add(int(entry))
+
+        total = 0
+        for pid in pids:
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            total += int(line.split()[1])
+            except OSError:
+                continue
+        return total
+    except OSError:
+        return 0
+
+
+def spin(seconds: float) -> None:
+    """
+    Run the event loop for a while.
+
+    Parameters
+    ----------
+    seconds
+        How long to run it for.
+    """
+
+    loop = QEventLoop()
+    QTimer.singleShot(int(1000 * seconds), loop.quit)
+    loop.exec_()
+
+
+def run_mode(mode: str, seconds: float) -> dict[str, float]:
+    """
+    Show the camera feed in one render mode for a fixed amount of time.
+
+    Parameters
+    ----------
+    mode
+        The render mode, `"native"` or `"web"`.
+    seconds
+        How long to run the feed for.
+
+    Returns
+    -------
+    dict[str, float]
+        Frames per second delivered to the main thread, frames per second painted (native mode only),
+        milliseconds on the main thread (handing the frame over, plus painting it in native mode)
+        and on the worker thread per frame, and memory in MiB.
+    """
+
+    from widgets.camera_widget.camera import CameraWidget
+
+    widget = CameraWidget(mode)
+    widget.image_fetcher.target_rate_hz = None
+    widget.resize(800, 600)
+    widget.show()
+    spin(1.0)
+
+    widget.unpause_timer()
+    start = time.perf_counter()
+    spin(seconds)
+    elapsed = time.perf_counter() - start
+    memory = process_tree_rss_kib()
+    widget.pause_timer()
+    widget.image_fetcher.stop()
+    widget.stop_camera_server()
+
+    fetcher = widget.image_fetcher
+    delivered = max(fetcher.frames_delivered, 1)
+    paint_seconds = (
+        widget.image_view.paint_seconds if widget.image_view is not None else 0.0
+    )
+    result = {
+        "delivered_fps": fetcher.frames_delivered / elapsed,
+        "painted_fps": (
+            widget.image_view.frames_painted / elapsed
+            if widget.image_view is not None
+            else float("nan")
+        ),
+        "main_thread_ms": 1000 * (fetcher.deliver_seconds + paint_seconds) / delivered,
+        "worker_decode_ms": 1000 * fetcher.image_decode_seconds / delivered,
+        "memory_mib": memory / 1024,
+    }
+    widget.close()
+    widget.deleteLater()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--modes", nargs="+", default=["native", "web"])
+    args = parser.parse_args()
+
+    server = stand_in_server.make_server(port=0)
+    server.RequestHandlerClass = type(
+        "Handler",
+        (ChangingFrameHandler,),
+        {"boat": server.boat, "use_etags": True},
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["TELEMETRY_SERVER_URL"] = f"http://127.0.0.1:{server.server_port}/"
+
+    app = QApplication.instance() or QApplication([])
+    print(f"before: {process_tree_rss_kib() / 1024:.0f} MiB")
+    # memory is only comparable when each mode runs in its own process, e.g. `--modes native`
+    for mode in args.modes:
+        result = run_mode(mode, args.seconds)
+        print(
+            f"{mode:>6}: {result['delivered_fps']:.1f} fps delivered, {result['painted_fps']:.1f} fps painted, "
+            f"{result['main_thread_ms']:.2f} ms main thread, {result['worker_decode_ms']:.2f} ms worker decode "
+            f"per frame, {result['memory_mib']:.0f} MiB"
+        )
+
+    server.boat.stop()
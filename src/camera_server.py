@@ -0,0 +1,140 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class CameraFrame:
+    """
+    The latest camera frame, shared between the thread that fetches frames and the camera server.
+
+    Attributes
+    ----------
+    number : `int`
+        Increases by one every time a new frame is set, used by the camera view to ask for the new frame.
+    data : `Optional[bytes]`
+        The JPEG file of the latest frame, `None` until the first frame is set.
+    """
+
+    def __init__(self) -> None:
+        self.number = 0
+        self.data: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    def set(self, data: bytes) -> int:
+        """
+        Replace the latest frame.
+
+        Parameters
+        ----------
+        data
+            The JPEG file of the new frame.
+
+        Returns
+        -------
+        int
+            The number of the new frame.
+        """
+
+        with self._lock:
+            self.number += 1
+            self.data = data
+            return self.number
+
+    def get(self) -> tuple[int, Optional[bytes]]:
+        """
+        Get the latest frame.
+
+        Returns
+        -------
+        tuple[int, Optional[bytes]]
+            The number of the frame and its JPEG file.
+        """
+
+        with self._lock:
+            return self.number, self.data
+
+
+class CameraRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the latest camera frame at `/frame.jpg` to the camera view. Query strings are ignored,
+    the view adds the frame number to the url so that it never shows a frame it already has.
+
+    Inherits
+    -------
+    `BaseHTTPRequestHandler`
+    """
+
+    protocol_version = "HTTP/1.1"
+    frame: CameraFrame
+
+    def do_GET(self) -> None:
+        _, data = self.frame.get()
+        if self.path.split("?")[0] != "/frame.jpg" or data is None:
+            self.send_body(404, b"Not found", "text/plain")
+        else:
+            self.send_body(200, data, "image/jpeg")
+
+    def send_body(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def make_server(
+    frame: CameraFrame, port: int, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """
+    Create a local camera server. Call `serve_forever` on the result to start it.
+
+    Parameters
+    ----------
+    frame
+        The frame to serve.
+    port
+        The port to listen on, `0` picks a free port.
+    host
+        The address to listen on.
+
+    Returns
+    -------
+    ThreadingHTTPServer
+        The server.
+    """
+
+    handler = type("Handler", (CameraRequestHandler,), {"frame": frame})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(frame: CameraFrame, port: int) -> Optional[ThreadingHTTPServer]:
+    """
+    Start a local camera server in a background thread.
+
+    Parameters
+    ----------
+    frame
+        The frame to serve.
+    port
+        The port to listen on.
+
+    Returns
+    -------
+    Optional[ThreadingHTTPServer]
+        The running server, `None` if it could not be started.
+    """
+
+    try:
+        server = make_server(frame, port)
+    except OSError as e:
+        print(f"Warning: Failed to start camera server on port {port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
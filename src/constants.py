@@ -19,28 +19,152 @@ WINDOW_BOX = QRect(100, 100, 800, 600)
 SUPER_SLOW_TIMER = QTimer()
 SUPER_SLOW_TIMER.setInterval(500)
 
-SLOW_TIMER = QTimer()
-SLOW_TIMER.setInterval(2)  # 2 ms for slow timer
-
 FAST_TIMER = QTimer()
 FAST_TIMER.setInterval(1)  # 1 ms for fast timer
 
-# base url for telemetry server
-TELEMETRY_SERVER_URL = "http://18.191.164.84:8080/"
+# seconds a worker thread waits before fetching again after an unexpected error
+WORKER_ERROR_RETRY_DELAY = 1.0
+
+# maximum number of times per second the telemetry worker polls the telemetry server
+TELEMETRY_TARGET_RATE_HZ = 20
+
+# how telemetry is received, either "poll" (`boat_status/get`) or "stream" (`boat_status/stream`)
+TELEMETRY_INGEST_MODE = os.environ.get("TELEMETRY_INGEST_MODE", "poll")
+
+# seconds to wait before reconnecting to the telemetry stream, doubles after every failed attempt
+TELEMETRY_STREAM_RECONNECT_DELAY = 0.5
+TELEMETRY_STREAM_MAX_RECONNECT_DELAY = 10.0
+
+# settings for the flight recorder that logs every telemetry frame to `boat_data`
+FLIGHT_RECORDER_ENABLED = True
+FLIGHT_RECORDER_MAX_SEGMENT_BYTES = 64 * 1024 * 1024  # 64 MiB
+FLIGHT_RECORDER_MAX_SEGMENT_SECONDS = 30 * 60  # 30 minutes
+FLIGHT_RECORDER_MAX_QUEUED_FRAMES = 10_000
+FLIGHT_RECORDER_FLUSH_INTERVAL = 1.0  # seconds
+
+# number of telemetry frames kept in memory for averages and limit checks (30 minutes at 20 Hz)
+TELEMETRY_HISTORY_CAPACITY = 30 * 60 * 20
+
+# windows in seconds that rolling statistics are computed over, keyed by display name
+ROLLING_STATS_WINDOWS = {"10 s": 10.0, "1 min": 60.0, "10 min": 600.0}
+
+# window shown in the VESC data section, one of the keys in `ROLLING_STATS_WINDOWS`
+ROLLING_STATS_DISPLAY_WINDOW = "10 s"
+
+# maximum number of times per second telemetry is rendered, lower on battery to save power
+# telemetry still arrives, is recorded and is checked at the full rate
+RENDER_RATE_HZ = 30
+RENDER_RATE_HZ_ON_BATTERY = 5
+RENDER_POWER_CHECK_INTERVAL = (
+    10.0  # seconds between checks for a change of power source
+)
+
+# levels of detail of the boat track drawn on the map, finest first
+# format is `(tolerance, min_zoom)`: the most the drawn track may stray from the real one in meters,
+# and the lowest map zoom the level is drawn at
+TRACK_LEVELS = ((1.0, 16), (5.0, 13), (25.0, 10), (100.0, 0))
+
+# seconds after the window is first painted to build the tabs that have not been opened yet,
+# `None` only builds them when they are opened
+LAZY_TAB_WARMUP_DELAY = 3.0
+
+# speeds offered when replaying a recorded session, `None` replays as fast as possible
+REPLAY_SPEEDS = {"1×": 1.0, "10×": 10.0, "Max": None}
+
+# base url for telemetry server, can be pointed at `stand_in_server.py` to test without the boat
+TELEMETRY_SERVER_URL = os.environ.get(
+    "TELEMETRY_SERVER_URL", "http://18.191.164.84:8080/"
+)
 
 # endpoints for telemetry server, format is `TELEMETRY_SERVER_URL` + `endpoint`
 TELEMETRY_SERVER_ENDPOINTS = {
     "boat_status": TELEMETRY_SERVER_URL + "boat_status/get",
+    "boat_status_stream": TELEMETRY_SERVER_URL + "boat_status/stream",
     "waypoints_test": TELEMETRY_SERVER_URL + "waypoints/test",
     "get_waypoints": TELEMETRY_SERVER_URL + "waypoints/get",
     "set_waypoints": TELEMETRY_SERVER_URL + "waypoints/set",
     "get_autopilot_parameters": TELEMETRY_SERVER_URL + "autopilot_parameters/get",
     "set_autopilot_parameters": TELEMETRY_SERVER_URL + "autopilot_parameters/set",
+    "camera_frame": TELEMETRY_SERVER_URL + "camera/frame",
 }
 
-# url for local waypoints server
+# where camera frames come from, either "camera_frame" (raw JPEG from `camera/frame`, falling back to
+# "autopilot_parameters" if the server does not have it) or "autopilot_parameters" (base64 in `autopilot_parameters/get`)
+CAMERA_FRAME_SOURCE = os.environ.get("CAMERA_FRAME_SOURCE", "camera_frame")
+
+# content types asked for from `camera/frame`, raw JPEG preferred over base64 in JSON
+CAMERA_FRAME_ACCEPT = "image/jpeg, application/json;q=0.5"
+
+# how camera frames are shown, either "native" (decoded on the camera worker thread and painted by Qt)
+# or "web" (loaded into a `QWebEngineView` from `camera_widget/camera.html`), compare them with `camera_render_benchmark.py`
+CAMERA_RENDER_MODE = os.environ.get("CAMERA_RENDER_MODE", "web")
+
+# maximum number of times per second the camera worker fetches a frame
+CAMERA_TARGET_RATE_HZ = 2
+
+# milliseconds between updates of how long ago the camera last sent a new frame
+CAMERA_STALENESS_UPDATE_INTERVAL = 1000
+
+# settings for the recorder that keeps every new camera frame in `camera_data`
+CAMERA_RECORDER_ENABLED = True
+CAMERA_RECORDER_MAX_SEGMENT_BYTES = 64 * 1024 * 1024  # 64 MiB
+# the oldest segments of any session are deleted once all sessions together take more than this
+CAMERA_RECORDER_MAX_TOTAL_BYTES = 2 * 1024 * 1024 * 1024  # 2 GiB
+CAMERA_RECORDER_MAX_QUEUED_FRAMES = 32
+
+# port of the local server the camera view loads frames from (the port is also written in `camera_widget/camera.html`)
+CAMERA_SERVER_PORT = 3003
+
+# how waypoints clicked on the map reach python, either "channel" (pushed over a `QWebChannel`)
+# or "http" (posted to the local waypoints server in `web_engine/server.go` and polled from there)
+WAYPOINT_SYNC_MODE = os.environ.get("WAYPOINT_SYNC_MODE", "channel")
+
+# how long after the map loads to wait for it to connect to the waypoint channel before warning
+WAYPOINT_CHANNEL_CONNECT_TIMEOUT = 5000  # in milliseconds
+
+# url for local waypoints server, only used when `WAYPOINT_SYNC_MODE` is "http"
 WAYPOINTS_SERVER_URL = "http://localhost:3001/waypoints"
 
+# map tiles are fetched from `TILE_SOURCE_URL` once and then served to the map from a local cache,
+# on `localhost:TILE_SERVER_PORT` (the port is also written in `web_engine/map.html`)
+TILE_SOURCE_URL = os.environ.get(
+    "TILE_SOURCE_URL", "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+)
+TILE_SERVER_PORT = 3002
+TILE_CACHE_MAX_TILES = 100_000  # about 1.5 GB of OpenStreetMap tiles
+TILE_MAX_CONCURRENT_FETCHES = (
+    2  # so tile downloads do not crowd out telemetry on a slow uplink
+)
+TILE_FETCH_TIMEOUT = (3.05, 10.0)
+
+# images in `app_data/assets` served to the map by the tile server, scaled down to the size they are drawn at
+# format is `(width, height)` in pixels, keyed by file name, images not listed are served as they are
+MAP_ASSET_SIZES = {"boat.png": (50, 50)}
+MAP_ASSET_SCALE = (
+    2  # scaled images are twice the drawn size to stay sharp on high DPI screens
+)
+
+# timeouts for requests made through the shared http transport, format is `(connect, read)` in seconds
+# keys are the same as `TELEMETRY_SERVER_ENDPOINTS`, anything not listed uses `DEFAULT_HTTP_TIMEOUT`
+DEFAULT_HTTP_TIMEOUT = (3.05, 10.0)
+HTTP_TIMEOUTS = {
+    "boat_status": (3.05, 2.0),
+    "boat_status_stream": (
+        3.05,
+        5.0,
+    ),  # the stream sends a keep-alive comment every second
+    "get_waypoints": (3.05, 5.0),
+    "set_waypoints": (3.05, 5.0),
+    "get_autopilot_parameters": (3.05, 5.0),
+    "set_autopilot_parameters": (3.05, 5.0),
+    "camera_frame": (3.05, 5.0),
+    "local_waypoints": (0.5, 0.5),
+}
+
+# connection pool settings for the shared http transport
+HTTP_POOL_CONNECTIONS = 4  # number of hosts to keep a connection pool for
+HTTP_POOL_MAXSIZE = 4  # number of keep-alive connections kept open per host
+
 try:
     # should be the path to wherever `ground_station_25` is located
     TOP_LEVEL_DIR = PurePath(os.getcwd())
@@ -68,6 +192,12 @@ try:
     if "buoy_data" not in os.listdir(DATA_DIR):
         os.makedirs(DATA_DIR / "buoy_data")
 
+    if "tile_cache" not in os.listdir(DATA_DIR):
+        os.makedirs(DATA_DIR / "tile_cache")
+
+    if "camera_data" not in os.listdir(DATA_DIR):
+        os.makedirs(DATA_DIR / "camera_data")
+
     if "assets" not in os.listdir(DATA_DIR):
         raise Exception(
             "Assets directory not found, please redownload the directory from GitHub."
@@ -78,6 +208,9 @@ try:
     BOAT_DATA_DIR = PurePath(DATA_DIR / "boat_data")
     BOAT_DATA_LIMITS_DIR = PurePath(DATA_DIR / "boat_data_bounds")
     BUOY_DATA_DIR = PurePath(DATA_DIR / "buoy_data")
+    TILE_CACHE_PATH = PurePath(DATA_DIR / "tile_cache" / "tiles.mbtiles")
+    MAP_ASSET_CACHE_DIR = PurePath(DATA_DIR / "tile_cache" / "assets")
+    CAMERA_DATA_DIR = PurePath(DATA_DIR / "camera_data")
 
 except Exception as e:
     print(f"Error: {e}")
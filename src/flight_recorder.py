@@ -0,0 +1,391 @@
+import os
+import math
+import json
+import time
+import bisect
+import queue
+import struct
+import threading
+import constants
+from telemetry_frame import TelemetryFrame
+from pathlib import PurePath
+from typing import Any, BinaryIO, Iterator, Optional
+
+# every segment starts with this, followed by records of `RECORD_HEADER` + payload
+SEGMENT_MAGIC = b"GSTLOG1\n"
+
+# payload length in bytes and the unix time the frame was received
+RECORD_HEADER = struct.Struct("<Id")
+
+
+class FlightRecorder:
+    """
+    Always-on recorder that appends every received telemetry frame to disk.
+
+    Frames are queued by `record` and written by a background thread, so callers never block on disk.
+    Each recording session is a directory in `constants.BOAT_DATA_DIR` named `session_<timestamp>`,
+    where `<timestamp>` is nanoseconds since unix epoch. A session is made of segment files named
+    `segment_<index>.tlog` which are rotated when they get too large or too old.
+
+    A segment is `SEGMENT_MAGIC` followed by records, each record being a `RECORD_HEADER`
+    (payload length and receive time) followed by the frame as compact JSON.
+
+    Parameters
+    ----------
+    directory
+        The directory to create the session directory in.
+    max_segment_bytes
+        Start a new segment once the current one reaches this size.
+    max_segment_seconds
+        Start a new segment once the current one has been open for this long.
+    max_queued_frames
+        Maximum number of frames waiting to be written. Frames recorded while the queue is full are dropped.
+    flush_interval
+        Maximum number of seconds written frames stay in the file buffer before being flushed to disk.
+
+    Attributes
+    ----------
+    session_dir : `PurePath`
+        The directory the current session is written to.
+    frames_recorded : `int`
+        Number of frames written to disk.
+    frames_dropped : `int`
+        Number of frames dropped because the writer could not keep up.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        directory: PurePath = constants.BOAT_DATA_DIR,
+        max_segment_bytes: int = constants.FLIGHT_RECORDER_MAX_SEGMENT_BYTES,
+        max_segment_seconds: float = constants.FLIGHT_RECORDER_MAX_SEGMENT_SECONDS,
+        max_queued_frames: int = constants.FLIGHT_RECORDER_MAX_QUEUED_FRAMES,
+        flush_interval: float = constants.FLIGHT_RECORDER_FLUSH_INTERVAL,
+    ) -> None:
+        self.session_dir = PurePath(directory / f"session_{time.time_ns()}")
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.flush_interval = flush_interval
+        self.frames_recorded = 0
+        self.frames_dropped = 0
+        # `frames_dropped` is counted by the thread calling `record` and by the writer thread
+        self._dropped_lock = threading.Lock()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued_frames)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._segment: Optional[BinaryIO] = None
+        self._segment_index = 0
+        self._segment_bytes = 0
+        self._segment_opened_at = 0.0
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+
+        self._thread.start()
+
+    def record(self, frame: TelemetryFrame) -> None:
+        """
+        Queue a frame to be written. Never blocks, if the queue is full the frame is dropped.
+        The frame is encoded on the writer thread, so it must not be modified afterwards.
+        Failed fetches are skipped, they hold no data and a replay would show them as real frames.
+
+        Parameters
+        ----------
+        frame
+            The telemetry frame to record. It is stamped with its `received_at` time, or the
+            current time if that is not set.
+        """
+
+        if frame.failed:
+            return
+
+        received_at = (
+            frame.received_at if not math.isnan(frame.received_at) else time.time()
+        )
+        try:
+            self._queue.put_nowait((received_at, frame))
+        except queue.Full:
+            with self._dropped_lock:
+                self.frames_dropped += 1
+
+    def stop(self) -> None:
+        """Write every queued frame, close the current segment and stop the writer thread."""
+
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _open_segment(self) -> None:
+        """Close the current segment, if any, and start a new one."""
+
+        if self._segment is not None:
+            self._segment.close()
+
+        os.makedirs(self.session_dir, exist_ok=True)
+        file_path = PurePath(
+            self.session_dir / f"segment_{self._segment_index:05d}.tlog"
+        )
+        self._segment = open(file_path, "ab")
+        self._segment.write(SEGMENT_MAGIC)
+        self._segment_index += 1
+        self._segment_bytes = len(SEGMENT_MAGIC)
+        self._segment_opened_at = time.monotonic()
+
+    def _segment_is_full(self) -> bool:
+        """Whether the current segment is missing, too large or too old to keep writing to."""
+
+        return (
+            self._segment is None
+            or self._segment_bytes >= self.max_segment_bytes
+            or time.monotonic() - self._segment_opened_at >= self.max_segment_seconds
+        )
+
+    def _write(self, items: list[tuple[float, TelemetryFrame]]) -> None:
+        """
+        Encode and append a batch of frames, rotating segments when they fill up.
+
+        Parameters
+        ----------
+        items
+            Pairs of receive time and frame.
+        """
+
+        chunks: list[bytes] = []
+        for timestamp, frame in items:
+            if self._segment_is_full():
+                if chunks:
+                    self._segment.write(b"".join(chunks))
+                    chunks = []
+                self._open_segment()
+
+            payload = json.dumps(frame.to_dict(), separators=(",", ":")).encode("utf-8")
+            chunks.append(RECORD_HEADER.pack(len(payload), timestamp))
+            chunks.append(payload)
+            self._segment_bytes += RECORD_HEADER.size + len(payload)
+            self.frames_recorded += 1
+
+        if chunks:
+            self._segment.write(b"".join(chunks))
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                items = []
+
+            # drain whatever else is queued so it is written in one go
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if self._STOP in items:
+                stopping = True
+                items = [item for item in items if item is not self._STOP]
+
+            try:
+                if items:
+                    self._write(items)
+                if self._segment is not None and (
+                    stopping or time.monotonic() - last_flush >= self.flush_interval
+                ):
+                    self._segment.flush()
+                    last_flush = time.monotonic()
+            except OSError as e:
+                with self._dropped_lock:
+                    self.frames_dropped += len(items)
+                print(f"Error: Failed to record telemetry: {e}")
+
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+
+def list_segments(session_dir: PurePath) -> list[PurePath]:
+    """
+    List the segment files of a recorded session in the order they were written.
+
+    Parameters
+    ----------
+    session_dir
+        The session directory created by `FlightRecorder`.
+
+    Returns
+    -------
+    list[PurePath]
+        Paths to the segment files.
+    """
+
+    return [
+        PurePath(session_dir / file_name)
+        for file_name in sorted(os.listdir(session_dir))
+        if file_name.startswith("segment_") and file_name.endswith(".tlog")
+    ]
+
+
+def read_records(
+    segment: BinaryIO, start_time: Optional[float] = None
+) -> Iterator[tuple[float, bytes]]:
+    """
+    Read the records of a segment one at a time, stopping quietly at a truncated record.
+
+    Parameters
+    ----------
+    segment
+        The segment file, opened in binary mode and positioned at the start.
+    start_time
+        If given, records received before this unix time are skipped without reading their payload.
+
+    Yields
+    -------
+    tuple[float, bytes]
+        The receive time and the undecoded JSON payload of each record.
+
+    Raises
+    -------
+    ValueError
+        If the file is not a flight recorder segment.
+    """
+
+    if segment.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+        raise ValueError(f"Not a flight recorder segment: {segment.name}")
+
+    while True:
+        header = segment.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return
+        length, timestamp = RECORD_HEADER.unpack(header)
+
+        if start_time is not None and timestamp < start_time:
+            segment.seek(length, os.SEEK_CUR)
+            continue
+
+        payload = segment.read(length)
+        if len(payload) < length:
+            return
+        yield timestamp, payload
+
+
+def read_session(
+    session_dir: PurePath, start_time: Optional[float] = None
+) -> Iterator[tuple[float, dict[str, Any]]]:
+    """
+    Stream the frames of a recorded session without loading it into memory.
+    Records whose payload is not valid JSON are skipped.
+
+    Parameters
+    ----------
+    session_dir
+        The session directory created by `FlightRecorder`.
+    start_time
+        If given, start at the first frame received at or after this unix time.
+        Segments that end before it are skipped without being read.
+
+    Yields
+    -------
+    tuple[float, dict[str, Any]]
+        The receive time and the frame.
+    """
+
+    segments = list_segments(session_dir)
+    if start_time is not None:
+        first_times = [segment_start_time(segment) for segment in segments]
+        first_segment = bisect.bisect_right(first_times, start_time) - 1
+        segments = segments[max(first_segment, 0) :]
+
+    for segment_path in segments:
+        with open(segment_path, "rb") as segment:
+            for timestamp, payload in read_records(segment, start_time):
+                try:
+                    frame = json.loads(payload)
+                except ValueError as e:
+                    print(f"Warning: Skipping unreadable frame in {segment_path}: {e}")
+                    continue
+                yield timestamp, frame
+
+
+def segment_start_time(segment_path: PurePath) -> float:
+    """
+    Get the receive time of the first record in a segment.
+
+    Parameters
+    ----------
+    segment_path
+        Path to the segment file.
+
+    Returns
+    -------
+    float
+        The unix time of the first record, or `math.inf` if the segment has no records.
+    """
+
+    with open(segment_path, "rb") as segment:
+        for timestamp, _ in read_records(segment):
+            return timestamp
+    return math.inf
+
+
+def segment_end_time(segment_path: PurePath) -> float:
+    """
+    Get the receive time of the last complete record in a segment, reading only the record headers.
+
+    Parameters
+    ----------
+    segment_path
+        Path to the segment file.
+
+    Returns
+    -------
+    float
+        The unix time of the last record, or `-math.inf` if the segment has no records.
+    """
+
+    last_time = -math.inf
+    file_size = os.path.getsize(segment_path)
+    with open(segment_path, "rb") as segment:
+        position = segment.seek(len(SEGMENT_MAGIC))
+        while position + RECORD_HEADER.size <= file_size:
+            length, timestamp = RECORD_HEADER.unpack(segment.read(RECORD_HEADER.size))
+            position = segment.seek(length, os.SEEK_CUR)
+            if position > file_size:
+                break
+            last_time = timestamp
+    return last_time
+
+
+def session_time_range(session_dir: PurePath) -> tuple[float, float]:
+    """
+    Get the receive times of the first and last frame of a recorded session.
+
+    Parameters
+    ----------
+    session_dir
+        The session directory created by `FlightRecorder`.
+
+    Returns
+    -------
+    tuple[float, float]
+        The unix times of the first and last frame.
+
+    Raises
+    -------
+    ValueError
+        If the session has no frames.
+    """
+
+    segments = list_segments(session_dir)
+    first_times = [segment_start_time(segment) for segment in segments]
+    if not first_times or min(first_times) == math.inf:
+        raise ValueError(f"No frames recorded in {session_dir}")
+
+    for segment_path in reversed(segments):
+        last_time = segment_end_time(segment_path)
+        if last_time != -math.inf:
+            return min(first_times), last_time
+
+    return min(first_times), max(first_times)
@@ -0,0 +1,157 @@
+import threading
+import requests
+import constants
+from typing import Optional
+from requests.adapters import HTTPAdapter
+
+
+class HttpTransport:
+    """
+    Shared HTTP transport with pooled keep-alive connections.
+
+    Every request goes through one `requests.Session`, so connections to the telemetry server
+    (and the local waypoints server) are reused instead of paying for a new TCP handshake on every call.
+
+    Parameters
+    ----------
+    pool_connections
+        The number of hosts to keep a connection pool for.
+    pool_maxsize
+        The number of keep-alive connections kept open per host.
+    timeouts
+        Timeouts for each endpoint, keys are endpoint names and values are `(connect, read)` in seconds.
+    default_timeout
+        Timeout used for endpoints not found in `timeouts`.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = constants.HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = constants.HTTP_POOL_MAXSIZE,
+        timeouts: Optional[dict[str, tuple[float, float]]] = None,
+        default_timeout: tuple[float, float] = constants.DEFAULT_HTTP_TIMEOUT,
+    ) -> None:
+        self.timeouts = timeouts if timeouts is not None else constants.HTTP_TIMEOUTS
+        self.default_timeout = default_timeout
+        self.endpoints = {
+            **constants.TELEMETRY_SERVER_ENDPOINTS,
+            "local_waypoints": constants.WAYPOINTS_SERVER_URL,
+        }
+
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+    def resolve(self, endpoint: str) -> tuple[str, tuple[float, float]]:
+        """
+        Resolve an endpoint name to its url and timeout.
+
+        Parameters
+        ----------
+        endpoint
+            Either a key of `constants.TELEMETRY_SERVER_ENDPOINTS`, `"local_waypoints"`, or a full url.
+
+        Returns
+        -------
+        tuple[str, tuple[float, float]]
+            The url and the `(connect, read)` timeout to use for it.
+        """
+
+        url = self.endpoints.get(endpoint, endpoint)
+        timeout = self.timeouts.get(endpoint, self.default_timeout)
+        return url, timeout
+
+    def request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """
+        Send a request using the pooled session.
+
+        Parameters
+        ----------
+        method
+            The HTTP method to use, e.g. `"GET"` or `"POST"`.
+        endpoint
+            The endpoint name or url, see `resolve`.
+        **kwargs
+            Passed through to `requests.Session.request`. If `timeout` is given it overrides the endpoint timeout.
+
+        Returns
+        -------
+        requests.Response
+            The response from the server.
+        """
+
+        url, timeout = self.resolve(endpoint)
+        kwargs.setdefault("timeout", timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, endpoint: str, **kwargs) -> requests.Response:
+        """Send a GET request, see `request`."""
+
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint: str, **kwargs) -> requests.Response:
+        """Send a POST request, see `request`."""
+
+        return self.request("POST", endpoint, **kwargs)
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get connection reuse statistics for every host the transport has talked to.
+
+        Returns
+        -------
+        dict[str, int]
+            `requests` is the number of requests sent, `connections_opened` is the number of
+            TCP connections that had to be created and `connections_reused` is the difference between them.
+        """
+
+        num_requests = 0
+        num_connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            num_requests += pool.num_requests
+            num_connections += pool.num_connections
+
+        return {
+            "requests": num_requests,
+            "connections_opened": num_connections,
+            "connections_reused": max(num_requests - num_connections, 0),
+        }
+
+    def print_stats(self) -> None:
+        """Print connection reuse statistics."""
+
+        stats = self.get_stats()
+        print(
+            f"HTTP transport: {stats['requests']} requests, "
+            f"{stats['connections_opened']} connections opened, "
+            f"{stats['connections_reused']} reused"
+        )
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """
+    Get the transport shared by the whole application, creating it on first use.
+
+    Returns
+    -------
+    HttpTransport
+        The shared transport.
+    """
+
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
@@ -32,6 +32,8 @@ def get_icons() -> SimpleNamespace:
         "hard_drive": qta.icon("fa6.hard-drive"),
         "boat": qta.icon("mdi.sail-boat"),
         "image_upload": qta.icon("mdi.image-move"),
+        "replay": qta.icon("mdi.history"),
+        "live": qta.icon("mdi.access-point"),
     }
 
     for icon_name, icon in icons.items():
@@ -0,0 +1,138 @@
+import math
+import threading
+import numpy as np
+from telemetry_frame import TelemetryFrame
+from telemetry_history import HISTORY_FIELDS, TelemetryHistory
+from typing import Any, Optional
+
+
+class LimitChecker:
+    """
+    Checks every telemetry frame against the boat data limits.
+
+    The limits, in the `boat_data_bounds` format (`{field: {"lower_bound": x, "upper_bound": y}}`),
+    are compiled by `compile` into packed arrays of row indices and bounds. Checking a frame is then a
+    single vectorized comparison of the newest column of the `TelemetryHistory` against those arrays,
+    so the cost per frame barely depends on how many fields are bounded.
+
+    Missing values (`NaN`) never violate a limit.
+
+    Parameters
+    ----------
+    history
+        The history to read frames from. `check` must be called after every append.
+
+    Attributes
+    ----------
+    fields : `tuple[str, ...]`
+        The fields that have limits, in the order of the compiled arrays.
+    frames_checked : `int`
+        Number of frames checked since the limits were last compiled.
+    frames_in_violation : `int`
+        Number of those frames where at least one field was out of bounds.
+    """
+
+    def __init__(self, history: TelemetryHistory) -> None:
+        self.history = history
+        self._lock = threading.Lock()
+        self._frames_seen = history.frames_appended
+        self.compile({})
+
+    def compile(self, limits: dict[str, dict[str, Any]]) -> None:
+        """
+        Compile limits and reset the violation counters. Called whenever limits are loaded or edited.
+
+        Parameters
+        ----------
+        limits
+            Lower and upper bound for each field. Either bound can be left out or `None`.
+
+        Raises
+        -------
+        ValueError
+            If a field is not a numeric telemetry field or a bound is not a number.
+        """
+
+        unknown = [field for field in limits if field not in HISTORY_FIELDS[1:]]
+        if unknown:
+            raise ValueError(f"No telemetry field named {', '.join(unknown)}")
+
+        fields = tuple(limits)
+        lower = np.empty(len(fields))
+        upper = np.empty(len(fields))
+        for i, field in enumerate(fields):
+            bounds = limits[field]
+            try:
+                lower_bound = bounds.get("lower_bound")
+                upper_bound = bounds.get("upper_bound")
+                lower[i] = -math.inf if lower_bound is None else float(lower_bound)
+                upper[i] = math.inf if upper_bound is None else float(upper_bound)
+            except (AttributeError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid limits for {field}: {bounds}") from e
+
+        with self._lock:
+            self.fields = fields
+            self._rows = np.array([HISTORY_FIELDS.index(f) for f in fields], dtype=int)
+            self._lower = lower
+            self._upper = upper
+            self._violating = np.zeros(len(fields), dtype=bool)
+            self._violation_counts = np.zeros(len(fields), dtype=int)
+            self._violation_started_at = np.full(len(fields), np.nan)
+            self._last_violation_at = np.full(len(fields), np.nan)
+            self.frames_checked = 0
+            self.frames_in_violation = 0
+
+    def check(self, frame: Optional[TelemetryFrame] = None) -> None:
+        """
+        Check the newest frame in the history against the limits.
+
+        Parameters
+        ----------
+        frame
+            Ignored, the newest frame is read from the history. Accepted so that `check`
+            can be added to `frame_consumers` right after `history.append`.
+        """
+
+        frames_appended = self.history.frames_appended
+        if frames_appended == self._frames_seen:
+            return
+        self._frames_seen = frames_appended
+
+        newest = self.history.window(1)
+        if newest.shape[1] == 0:
+            return
+
+        with self._lock:
+            values = newest[self._rows, 0]
+            violating = (values < self._lower) | (values > self._upper)
+            timestamp = newest[0, 0]
+
+            started = violating & ~self._violating
+            self._violation_started_at[started] = timestamp
+            self._last_violation_at[violating] = timestamp
+            self._violation_counts += violating
+            self._violating = violating
+            self.frames_checked += 1
+            self.frames_in_violation += bool(violating.any())
+
+    def violations(self) -> dict[str, dict[str, float]]:
+        """
+        The fields currently out of bounds.
+
+        Returns
+        -------
+        dict[str, dict[str, float]]
+            For each field out of bounds in the newest frame, `"since"` (unix time the field went out of
+            bounds), `"last"` (unix time of the newest frame out of bounds) and `"count"` (number of frames
+            the field has been out of bounds since the limits were compiled).
+        """
+
+        with self._lock:
+            return {
+                self.fields[i]: {
+                    "since": float(self._violation_started_at[i]),
+                    "last": float(self._last_violation_at[i]),
+                    "count": int(self._violation_counts[i]),
+                }
+                for i in np.flatnonzero(self._violating)
+            }
@@ -1,18 +1,26 @@
+from startup_timeline import get_timeline
 import sys
 from widgets.groundstation import GroundStationWidget
 from widgets.camera_widget.camera import CameraWidget
 from widgets.console_output import ConsoleOutputWidget
+from widgets.lazy_tab import LazyTab
 from icons import get_icons
+from http_transport import get_transport
 import constants
 
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget
-from PyQt5.QtGui import QIcon
+from PyQt5.QtGui import QIcon, QPaintEvent
 
 
 class MainWindow(QMainWindow):
     """
     Main window for the ground station application.
 
+    Only the ground station tab is built right away, the camera tab is built when it is first opened
+    or a few seconds after the window is first painted, whichever comes first. The map is only loaded
+    once the window has been painted, so the web engine starting up does not delay the window.
+
     Inherits
     -------
     `QMainWindow`
@@ -24,18 +32,47 @@ class MainWindow(QMainWindow):
         self.setGeometry(constants.WINDOW_BOX)
         self.main_widget = QTabWidget()
         self.setCentralWidget(self.main_widget)
-        self.main_widget.addTab(GroundStationWidget(), "Ground Station")
-        self.main_widget.addTab(CameraWidget(), "Camera Feed")
+        self.ground_station = GroundStationWidget()
+        self.main_widget.addTab(self.ground_station, "Ground Station")
+        self.lazy_tabs = [LazyTab("camera", CameraWidget)]
+        self.main_widget.addTab(self.lazy_tabs[0], "Camera Feed")
+        # built right away since it only shows output printed after it replaces `sys.stdout`
         self.main_widget.addTab(ConsoleOutputWidget(), "Console Output")
         self.main_widget.setCurrentIndex(0)
+        self.painted = False
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            get_timeline().mark("first paint")
+            QTimer.singleShot(0, self.start_deferred)
+
+    def start_deferred(self) -> None:
+        """Start what was put off until the window was painted: loading the map and building the other tabs."""
+
+        self.ground_station.load_map()
+        if constants.LAZY_TAB_WARMUP_DELAY is not None:
+            QTimer.singleShot(
+                int(constants.LAZY_TAB_WARMUP_DELAY * 1000), self.build_lazy_tabs
+            )
+
+    def build_lazy_tabs(self) -> None:
+        """Build every tab that has not been opened yet, so opening it later is instant."""
+
+        for tab in self.lazy_tabs:
+            tab.build()
 
 
 if __name__ == "__main__":
+    get_timeline().mark("imports done")
     app = QApplication(sys.argv)
     app.setApplicationName("SailBussy Ground Station")
     app.setStyle("Fusion")
     app_icon: QIcon = get_icons().boat
     app.setWindowIcon(app_icon)
     window = MainWindow()
+    get_timeline().mark("window created")
     window.show()
+    app.aboutToQuit.connect(get_transport().print_stats)
     sys.exit(app.exec())
@@ -0,0 +1,119 @@
+import os
+import threading
+import constants
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, Qt
+from PyQt5.QtGui import QImage
+from typing import Optional
+
+
+class MapAssets:
+    """
+    Images used by the map, served locally instead of from GitHub.
+
+    Images listed in `sizes` are scaled down to the size they are drawn at the first time they are used,
+    and the scaled copies are kept in `cache_dir` until the original changes. Everything is also kept in memory
+    after the first request, so the map never waits on the disk or the network for an icon.
+
+    Safe to use from several threads at once.
+
+    Parameters
+    ----------
+    source_dir
+        Directory with the original images, only files directly in it are served.
+    cache_dir
+        Directory the scaled copies are written to, created if it does not exist.
+    sizes
+        Size in pixels each image is drawn at on the map, as `(width, height)` keyed by file name.
+        Images that are not listed are served as they are.
+    scale
+        Scaled copies are `scale` times larger than the drawn size, to stay sharp on high DPI screens.
+
+    Attributes
+    ----------
+    bytes_saved : `int`
+        Number of bytes the scaled images served so far are smaller than the originals.
+    """
+
+    def __init__(
+        self,
+        source_dir: str = str(constants.ASSETS_DIR),
+        cache_dir: str = str(constants.MAP_ASSET_CACHE_DIR),
+        sizes: dict[str, tuple[int, int]] = constants.MAP_ASSET_SIZES,
+        scale: int = constants.MAP_ASSET_SCALE,
+    ) -> None:
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.sizes = sizes
+        self.scale = scale
+        self.bytes_saved = 0
+
+        self._files: dict[str, bytes] = dict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, name: str) -> Optional[bytes]:
+        """
+        Get an image, scaling it first if it is drawn smaller than it is.
+
+        Parameters
+        ----------
+        name
+            File name of the image in `source_dir`.
+
+        Returns
+        -------
+        Optional[bytes]
+            The image file, `None` if there is no such image.
+        """
+
+        with self._lock:
+            if name not in self._files:
+                data = self._load(name)
+                if data is None:
+                    return None
+                if name in self.sizes:
+                    source_size = os.path.getsize(os.path.join(self.source_dir, name))
+                    self.bytes_saved += source_size - len(data)
+                self._files[name] = data
+            return self._files[name]
+
+    def prepare(self) -> None:
+        """Scale every image listed in `sizes` now, instead of when the map first asks for it."""
+
+        for name in self.sizes:
+            self.get(name)
+
+    def _load(self, name: str) -> Optional[bytes]:
+        source_path = os.path.join(self.source_dir, name)
+        if os.path.basename(name) != name or not os.path.isfile(source_path):
+            return None
+        if name not in self.sizes:
+            with open(source_path, "rb") as f:
+                return f.read()
+
+        cache_path = os.path.join(self.cache_dir, name)
+        if os.path.isfile(cache_path) and os.path.getmtime(
+            cache_path
+        ) >= os.path.getmtime(source_path):
+            with open(cache_path, "rb") as f:
+                return f.read()
+
+        width, height = self.sizes[name]
+        image = QImage(source_path).scaled(
+            width * self.scale,
+            height * self.scale,
+            Qt.AspectRatioMode.IgnoreAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, "PNG")
+        buffer.close()
+
+        try:
+            with open(cache_path, "wb") as f:
+                f.write(bytes(data))
+        except OSError as e:
+            print(f"Warning: Failed to cache scaled map image {name}: {e}")
+        return bytes(data)
@@ -0,0 +1,95 @@
+import json
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from typing import Any
+
+
+class MapBridge(QObject):
+    """
+    Sends operations to the map in `map.html` in batches instead of one `runJavaScript` call each.
+
+    Operations queued with `call` are sent together the next time the event loop runs, or earlier if
+    `flush` is called. A batch is one `runJavaScript` call to `map.apply_batch`, which runs the operations
+    in order, so everything queued while handling one event costs a single round trip to the renderer.
+
+    Inherits
+    -------
+    `QObject`
+
+    Parameters
+    ----------
+    browser
+        The web view the map is loaded in.
+
+    Attributes
+    ----------
+    operations_queued : `int`
+        Number of operations passed to `call`.
+    operations_coalesced : `int`
+        Number of operations replaced by a later call to the same method before being sent.
+    batches_sent : `int`
+        Number of `runJavaScript` calls made.
+    """
+
+    def __init__(self, browser: QWebEngineView) -> None:
+        super().__init__()
+        self.browser = browser
+        self.operations_queued = 0
+        self.operations_coalesced = 0
+        self.batches_sent = 0
+
+        self._operations: list[list[Any]] = []
+        self._coalesced_index: dict[str, int] = dict()
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def call(self, method: str, *args: Any, coalesce: bool = False) -> None:
+        """
+        Queue a call to a method of the `map` object in `map.html`.
+
+        Parameters
+        ----------
+        method
+            Name of the method to call.
+        *args
+            Arguments for the method, must be JSON serializable.
+        coalesce
+            If `True`, replace the last queued call to the same method instead of adding another one.
+            Use for calls where only the newest one matters, like moving the boat.
+        """
+
+        self.operations_queued += 1
+        if coalesce and method in self._coalesced_index:
+            self._operations[self._coalesced_index[method]][1] = args
+            self.operations_coalesced += 1
+        else:
+            if coalesce:
+                self._coalesced_index[method] = len(self._operations)
+            self._operations.append([method, args])
+
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Send every queued operation to the map in one batch."""
+
+        self._flush_timer.stop()
+        if not self._operations:
+            return
+
+        batch = json.dumps(self._operations, separators=(",", ":"))
+        self._operations = []
+        self._coalesced_index = dict()
+        self.browser.page().runJavaScript(f"map.apply_batch({batch})")
+        self.batches_sent += 1
+
+    def print_stats(self) -> None:
+        """Print how many operations were sent to the map and in how many batches."""
+
+        print(
+            f"Map: {self.operations_queued} operations queued, {self.operations_coalesced} coalesced, "
+            f"{self.batches_sent} batches sent"
+        )
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import constants
+from PyQt5.QtCore import QObject, QTimer, pyqtSlot
+from typing import Any, Callable, Optional
+
+POWER_SUPPLY_DIR = "/sys/class/power_supply"
+
+
+def on_battery_power() -> bool:
+    """
+    Whether the computer is running on battery. Only detected on Linux, other platforms always return `False`.
+
+    Returns
+    -------
+    bool
+        `True` if there is a battery and no mains power supply is online.
+    """
+
+    if not sys.platform.startswith("linux") or not os.path.isdir(POWER_SUPPLY_DIR):
+        return False
+
+    has_battery = False
+    for supply in os.listdir(POWER_SUPPLY_DIR):
+        try:
+            with open(os.path.join(POWER_SUPPLY_DIR, supply, "type")) as f:
+                supply_type = f.read().strip()
+            if supply_type == "Battery":
+                has_battery = True
+            elif supply_type == "Mains":
+                with open(os.path.join(POWER_SUPPLY_DIR, supply, "online")) as f:
+                    if f.read().strip() == "1":
+                        return False
+        except OSError:
+            continue
+    return has_battery
+
+
+class RenderGovernor(QObject):
+    """
+    Limits how often telemetry is rendered on the main thread, independently of how fast it arrives.
+
+    Frames are passed to `submit` as they arrive. Only the newest one is kept, and it is rendered at most
+    `rate_hz` times per second: right away if nothing was rendered recently, otherwise when the next
+    render slot comes up. Frames replaced before they were rendered are counted in `frames_coalesced`.
+
+    Rendering is the only thing that is slowed down, frame consumers on the telemetry thread
+    (history, limit checks, recording) still see every frame.
+
+    Inherits
+    -------
+    `QObject`
+
+    Parameters
+    ----------
+    render
+        Called on the main thread with the frame to render.
+    rate_hz
+        Maximum number of renders per second on mains power.
+    battery_rate_hz
+        Maximum number of renders per second on battery power.
+
+    Attributes
+    ----------
+    frames_submitted : `int`
+        Number of frames passed to `submit`.
+    frames_rendered : `int`
+        Number of frames passed to `render`.
+    frames_coalesced : `int`
+        Number of frames replaced by a newer frame before they were rendered.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[Any], None],
+        rate_hz: float = constants.RENDER_RATE_HZ,
+        battery_rate_hz: float = constants.RENDER_RATE_HZ_ON_BATTERY,
+    ) -> None:
+        super().__init__()
+        self.render = render
+        self.mains_rate_hz = rate_hz
+        self.battery_rate_hz = battery_rate_hz
+        self.frames_submitted = 0
+        self.frames_rendered = 0
+        self.frames_coalesced = 0
+
+        self._pending_frame: Any = None
+        self._has_pending_frame = False
+        self._last_render = -float("inf")
+
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.timeout.connect(self._render_pending_frame)
+
+        self._power_timer = QTimer(self)
+        self._power_timer.setInterval(int(constants.RENDER_POWER_CHECK_INTERVAL * 1000))
+        self._power_timer.timeout.connect(self.check_power_source)
+        self._power_timer.start()
+        self.rate_hz: Optional[float] = None
+        self.check_power_source()
+
+    def set_rate(self, rate_hz: float) -> None:
+        """
+        Change the maximum number of renders per second.
+
+        Parameters
+        ----------
+        rate_hz
+            The new rate.
+        """
+
+        if rate_hz != self.rate_hz:
+            print(f"Rendering telemetry at up to {rate_hz:g} frames per second.")
+        self.rate_hz = rate_hz
+
+    def check_power_source(self) -> None:
+        """Switch between the mains and battery render rates if the power source changed."""
+
+        self.set_rate(
+            self.battery_rate_hz if on_battery_power() else self.mains_rate_hz
+        )
+
+    @pyqtSlot(object)
+    def submit(self, frame: Any) -> None:
+        """
+        Schedule a frame to be rendered, replacing the frame waiting to be rendered if there is one.
+
+        Parameters
+        ----------
+        frame
+            The frame to render.
+        """
+
+        self.frames_submitted += 1
+        if self._has_pending_frame:
+            self.frames_coalesced += 1
+        self._pending_frame = frame
+        self._has_pending_frame = True
+
+        if not self._render_timer.isActive():
+            next_render = self._last_render + 1 / self.rate_hz
+            delay = max(next_render - time.monotonic(), 0.0)
+            self._render_timer.start(int(delay * 1000))
+
+    def _render_pending_frame(self) -> None:
+        if not self._has_pending_frame:
+            return
+
+        frame = self._pending_frame
+        self._pending_frame = None
+        self._has_pending_frame = False
+        self._last_render = time.monotonic()
+        self.frames_rendered += 1
+        self.render(frame)
+
+    def print_stats(self) -> None:
+        """Print how many frames were rendered and how many were coalesced into a later render."""
+
+        print(
+            f"Rendering: {self.frames_submitted} frames submitted, {self.frames_rendered} rendered, "
+            f"{self.frames_coalesced} coalesced"
+        )
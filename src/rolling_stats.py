@@ -0,0 +1,247 @@
+import math
+import threading
+import numpy as np
+import constants
+from telemetry_frame import TelemetryFrame
+from telemetry_history import TelemetryHistory
+from typing import Optional
+
+# fields that rolling statistics are kept for
+ROLLING_STATS_FIELDS = (
+    "speed",
+    "true_wind_speed",
+    "true_wind_angle",
+    "apparent_wind_speed",
+    "apparent_wind_angle",
+    "vesc_data_rpm",
+    "vesc_data_duty_cycle",
+    "vesc_data_amp_hours",
+    "vesc_data_amp_hours_charged",
+    "vesc_data_current_to_vesc",
+    "vesc_data_voltage_to_motor",
+    "vesc_data_voltage_to_vesc",
+    "vesc_data_wattage_to_motor",
+    "vesc_data_motor_temperature",
+)
+
+
+class RollingStats:
+    """
+    Windowed statistics over a `TelemetryHistory`, kept up to date one frame at a time.
+
+    For every window, the sum, sum of squares and count of each field are updated incrementally:
+    the new frame is added and frames that have fallen out of the window are subtracted,
+    so mean and standard deviation cost O(1) per frame no matter how long the window is.
+    Each window also has an exponentially weighted moving average with a time constant equal to
+    the window length, weighted by the actual time between frames.
+    Minimum, maximum and percentiles cannot be kept incrementally, `summary` computes them in one
+    vectorized pass over the window when asked.
+
+    Missing values (`NaN`) are left out of every statistic.
+
+    Parameters
+    ----------
+    history
+        The history to compute statistics over. `update` must be called after every append.
+    windows
+        Window lengths in seconds, keyed by a display name.
+    fields
+        The fields to compute statistics for, must be in `telemetry_history.HISTORY_FIELDS`.
+    """
+
+    def __init__(
+        self,
+        history: TelemetryHistory,
+        windows: dict[str, float] = constants.ROLLING_STATS_WINDOWS,
+        fields: tuple[str, ...] = ROLLING_STATS_FIELDS,
+    ) -> None:
+        self.history = history
+        self.windows = dict(windows)
+        self.fields = fields
+        self._rows = np.array([history.field_index[field] for field in fields])
+        self._lengths = np.array(list(self.windows.values()), dtype=float)
+        self._lock = threading.Lock()
+
+        n_windows, n_fields = len(self.windows), len(fields)
+        self._sums = np.zeros((n_windows, n_fields))
+        self._squares = np.zeros((n_windows, n_fields))
+        self._counts = np.zeros((n_windows, n_fields))
+        self._ewma = np.full((n_windows, n_fields), np.nan)
+        self._in_window = np.zeros(n_windows, dtype=int)
+        # values of the oldest frame in the history, subtracted when the next append evicts it
+        self._oldest = np.full(n_fields, np.nan)
+        self._frames_seen = 0
+        self._resets_seen = 0
+
+    def update(self, frame: Optional[TelemetryFrame] = None) -> None:
+        """
+        Add the newest frame in the history.
+
+        If the history was cleared or frames were appended without calling `update`,
+        the statistics are rebuilt from the whole history instead.
+
+        Parameters
+        ----------
+        frame
+            Ignored, the newest frame is read from the history. Accepted so that `update`
+            can be added to `frame_consumers` right after `history.append`.
+        """
+
+        resets = self.history.resets
+        frames_appended = self.history.frames_appended
+        if frames_appended == self._frames_seen and resets == self._resets_seen:
+            return
+
+        frames = self.history.window()
+        with self._lock:
+            if resets != self._resets_seen or frames_appended != self._frames_seen + 1:
+                self._rebuild(frames)
+            else:
+                self._add(frames)
+            if frames.shape[1]:
+                self._oldest = frames[self._rows, 0].copy()
+            self._frames_seen = frames_appended
+            self._resets_seen = resets
+
+    def _add(self, frames: np.ndarray) -> None:
+        timestamps = frames[0]
+        values = frames[self._rows, -1]
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        self._sums += filled
+        self._squares += filled * filled
+        self._counts += valid
+        self._in_window += 1
+
+        # windows that covered the whole history lose the frame the append evicted
+        evicted = self._in_window > frames.shape[1]
+        if evicted.any():
+            old_valid = ~np.isnan(self._oldest)
+            old = np.where(old_valid, self._oldest, 0.0)
+            self._sums[evicted] -= old
+            self._squares[evicted] -= old * old
+            self._counts[evicted] -= old_valid
+            self._in_window[evicted] = frames.shape[1]
+
+        # drop frames that have fallen out of each window, oldest first
+        newest = timestamps[-1]
+        for w, length in enumerate(self._lengths):
+            while timestamps[-self._in_window[w]] < newest - length:
+                old = frames[self._rows, -self._in_window[w]]
+                old_valid = ~np.isnan(old)
+                old = np.where(old_valid, old, 0.0)
+                self._sums[w] -= old
+                self._squares[w] -= old * old
+                self._counts[w] -= old_valid
+                self._in_window[w] -= 1
+
+        # exponentially weighted moving average, weighted by the time since the previous frame
+        dt = newest - timestamps[-2] if timestamps.size > 1 else 0.0
+        alpha = (1.0 - np.exp(-dt / self._lengths))[:, np.newaxis]
+        updated = np.where(
+            np.isnan(self._ewma), values, self._ewma + alpha * (values - self._ewma)
+        )
+        self._ewma = np.where(valid, updated, self._ewma)
+
+    def _rebuild(self, frames: np.ndarray) -> None:
+        self._sums[:] = 0.0
+        self._squares[:] = 0.0
+        self._counts[:] = 0.0
+        self._ewma[:] = np.nan
+        self._in_window[:] = 0
+        if frames.shape[1] == 0:
+            return
+
+        timestamps = frames[0]
+        for w, length in enumerate(self._lengths):
+            start = np.searchsorted(timestamps, timestamps[-1] - length, side="left")
+            values = frames[self._rows, start:]
+            valid = ~np.isnan(values)
+            filled = np.where(valid, values, 0.0)
+            self._sums[w] = filled.sum(axis=1)
+            self._squares[w] = (filled * filled).sum(axis=1)
+            self._counts[w] = valid.sum(axis=1)
+            self._in_window[w] = values.shape[1]
+
+            # seed the average with the window mean rather than replaying every frame
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self._ewma[w] = self._sums[w] / self._counts[w]
+
+    def mean(self, window: str) -> np.ndarray:
+        """Mean of each field over a window, `NaN` where there are no values."""
+
+        w = list(self.windows).index(window)
+        with self._lock, np.errstate(invalid="ignore", divide="ignore"):
+            return self._sums[w] / self._counts[w]
+
+    def std(self, window: str) -> np.ndarray:
+        """Population standard deviation of each field over a window, `NaN` where there are no values."""
+
+        w = list(self.windows).index(window)
+        with self._lock, np.errstate(invalid="ignore", divide="ignore"):
+            mean = self._sums[w] / self._counts[w]
+            variance = self._squares[w] / self._counts[w] - mean * mean
+        # subtracting frames that left the window can leave a tiny negative variance
+        return np.sqrt(np.maximum(variance, 0.0))
+
+    def ewma(self, window: str) -> np.ndarray:
+        """Exponentially weighted moving average of each field, with the window length as time constant."""
+
+        w = list(self.windows).index(window)
+        with self._lock:
+            return self._ewma[w].copy()
+
+    def summary(
+        self, window: str, percentiles: tuple[float, ...] = (5, 50, 95)
+    ) -> dict[str, dict[str, float]]:
+        """
+        Every statistic for every field over a window.
+
+        Parameters
+        ----------
+        window
+            One of the keys in `windows`.
+        percentiles
+            The percentiles to compute, between 0 and 100.
+
+        Returns
+        -------
+        dict[str, dict[str, float]]
+            For each field, `"mean"`, `"std"`, `"ewma"`, `"min"`, `"max"`, `"count"` and
+            `"p<percentile>"` for each percentile. Statistics without values are `math.nan`.
+        """
+
+        w = list(self.windows).index(window)
+        mean, std, ewma = self.mean(window), self.std(window), self.ewma(window)
+        with self._lock:
+            count = int(self._in_window[w])
+            counts = self._counts[w].copy()
+        frames = self.history.window(count)
+        values = frames[self._rows]
+
+        has_values = counts > 0
+        minimum = np.full(len(self.fields), np.nan)
+        maximum = np.full(len(self.fields), np.nan)
+        ranks = np.full((len(percentiles), len(self.fields)), np.nan)
+        if values.shape[1] and has_values.any():
+            rows = values[has_values]
+            minimum[has_values] = np.nanmin(rows, axis=1)
+            maximum[has_values] = np.nanmax(rows, axis=1)
+            if np.isnan(rows).any():
+                ranks[:, has_values] = np.nanpercentile(rows, percentiles, axis=1)
+            else:
+                ranks[:, has_values] = np.percentile(rows, percentiles, axis=1)
+
+        summary: dict[str, dict[str, float]] = {}
+        for i, field in enumerate(self.fields):
+            summary[field] = {
+                "mean": float(mean[i]),
+                "std": float(std[i]) if has_values[i] else math.nan,
+                "ewma": float(ewma[i]),
+                "min": float(minimum[i]),
+                "max": float(maximum[i]),
+                "count": float(counts[i]),
+            }
+            for p, rank in zip(percentiles, ranks[:, i]):
+                summary[field][f"p{p:g}"] = float(rank)
+        return summary
@@ -0,0 +1,414 @@
+"""
+Local stand-in for the telemetry server that publishes synthetic `boat_status` frames.
+
+Useful for testing and benchmarking the ground station without the boat, run it with
+
+    python src/stand_in_server.py --port 8080 --rate 5
+
+and start the ground station with `TELEMETRY_SERVER_URL=http://localhost:8080/`.
+
+It also serves plain checkerboard map tiles at `tiles/{z}/{x}/{y}.png`, to test the tile cache without
+internet access set `TILE_SOURCE_URL=http://localhost:8080/tiles/{z}/{x}/{y}.png`.
+
+Camera frames are served at `camera/frame`, as raw JPEG or as base64 in JSON depending on the `Accept` header,
+and as base64 inside `autopilot_parameters/get` like the real server does.
+"""
+
+import os
+import json
+import math
+import time
+import zlib
+import base64
+import struct
+import argparse
+import threading
+import collections
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class SyntheticBoat:
+    """
+    Produces `boat_status` frames for a boat sailing in a circle at a fixed rate.
+
+    Parameters
+    ----------
+    rate_hz
+        Number of frames produced per second.
+    backlog
+        Number of recent frames kept so that streaming clients can resume after reconnecting.
+    """
+
+    def __init__(self, rate_hz: float = 5.0, backlog: int = 256) -> None:
+        self.rate_hz = rate_hz
+        self.seq = 0
+        self.frames: collections.deque[tuple[int, bytes]] = collections.deque(
+            maxlen=backlog
+        )
+        self.condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def make_frame(self, seq: int) -> dict:
+        """
+        Build the synthetic frame for a sequence number.
+
+        Parameters
+        ----------
+        seq
+            The sequence number of the frame.
+
+        Returns
+        -------
+        dict
+            A frame with the same keys as the real `boat_status/get` endpoint.
+        """
+
+        t = seq / self.rate_hz
+        angle = (t / 120) * 2 * math.pi
+        route = [
+            [36.98 + 0.01 * math.cos(i), -76.29 + 0.01 * math.sin(i)] for i in range(5)
+        ]
+        return {
+            "position": [
+                36.98 + 0.005 * math.cos(angle),
+                -76.29 + 0.005 * math.sin(angle),
+            ],
+            "state": "full_autonomy",
+            "full_autonomy_maneuver": "N/A",
+            "speed": 3 + math.sin(t / 10),
+            "bearing": math.degrees(angle) % 360,
+            "heading": (math.degrees(angle) + 90) % 360,
+            "true_wind_speed": 10 + 2 * math.sin(t / 30),
+            "true_wind_angle": 45 + 10 * math.sin(t / 20),
+            "apparent_wind_speed": 12 + 2 * math.sin(t / 30),
+            "apparent_wind_angle": 40 + 10 * math.sin(t / 20),
+            "sail_angle": 20 + 5 * math.sin(t / 5),
+            "rudder_angle": 5 * math.sin(t / 3),
+            "current_waypoint_index": seq // 100 % len(route),
+            "current_route": route,
+            "vesc_data_rpm": 1000 + 100 * math.sin(t),
+            "vesc_data_duty_cycle": 50 + 10 * math.sin(t),
+            "vesc_data_amp_hours": t / 3600,
+            "vesc_data_amp_hours_charged": 0.0,
+            "vesc_data_current_to_vesc": 5 + math.sin(t),
+            "vesc_data_voltage_to_motor": 12 + 0.1 * math.sin(t),
+            "vesc_data_voltage_to_vesc": 24 - t / 3600,
+            "vesc_data_wattage_to_motor": 60 + 12 * math.sin(t),
+            "vesc_data_time_since_vesc_startup_in_ms": t * 1000,
+            "vesc_data_motor_temperature": 40 + math.sin(t / 60),
+        }
+
+    def latest(self) -> tuple[int, bytes]:
+        """The sequence number and JSON body of the newest frame."""
+
+        with self.condition:
+            return self.frames[-1]
+
+    def frames_after(self, seq: int, timeout: float) -> list[tuple[int, bytes]]:
+        """
+        Wait up to `timeout` seconds for frames newer than `seq`.
+
+        Parameters
+        ----------
+        seq
+            The sequence number of the last frame the caller has seen.
+        timeout
+            Maximum number of seconds to wait.
+
+        Returns
+        -------
+        list[tuple[int, bytes]]
+            The sequence numbers and JSON bodies of the newer frames that are still in the backlog.
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq > seq, timeout)
+            return [frame for frame in self.frames if frame[0] > seq]
+
+    def published_at(self, seq: int) -> float:
+        """The `time.monotonic()` time at which a frame was scheduled to be published."""
+
+        return self.started_at + (seq - 1) / self.rate_hz
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+        self._publish()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _publish(self) -> None:
+        with self.condition:
+            self.seq += 1
+            body = json.dumps(self.make_frame(self.seq), separators=(",", ":"))
+            self.frames.append((self.seq, body.encode("utf-8")))
+            self.condition.notify_all()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(
+            max(self.published_at(self.seq + 1) - time.monotonic(), 0)
+        ):
+            self._publish()
+
+
+def make_tile(shade: int) -> bytes:
+    """
+    Make a plain grey 256x256 PNG map tile.
+
+    Parameters
+    ----------
+    shade
+        Brightness of the tile, from `0` to `255`.
+
+    Returns
+    -------
+    bytes
+        The PNG file.
+    """
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    header = struct.pack(">IIBBBBB", 256, 256, 8, 0, 0, 0, 0)
+    rows = (b"\x00" + bytes([shade]) * 256) * 256
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+# alternating tiles make a checkerboard, so tile edges are easy to see
+TILES = (make_tile(230), make_tile(200))
+
+
+ASSETS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "app_data", "assets"
+)
+
+# the camera switches between two pictures every second
+CAMERA_FRAMES = []
+for name in ("test.jpg", "cool-guy.jpg"):
+    with open(os.path.join(ASSETS_DIR, name), "rb") as f:
+        CAMERA_FRAMES.append(f.read())
+
+AUTOPILOT_PARAMETERS = {
+    "perform_forced_jibe_instead_of_tack": False,
+    "waypoint_accuracy": 5.0,
+    "no_sail_zone_size": 45.0,
+    "autopilot_refresh_rate": 10.0,
+    "tack_distance": 50.0,
+}
+
+
+def accepts(accept_header: str, content_type: str) -> bool:
+    """
+    Whether an `Accept` header allows a content type with a non-zero quality.
+
+    Parameters
+    ----------
+    accept_header
+        The value of the `Accept` header.
+    content_type
+        The content type, e.g. `"image/jpeg"`.
+
+    Returns
+    -------
+    bool
+        `True` if `content_type`, its `type/*` wildcard or `*/*` is accepted.
+    """
+
+    wildcards = (content_type, content_type.split("/")[0] + "/*", "*/*")
+    for entry in accept_header.split(","):
+        media_type, *params = (part.strip() for part in entry.split(";"))
+        if media_type not in wildcards:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    pass
+        if quality > 0:
+            return True
+    return False
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the telemetry server endpoints from a `SyntheticBoat`.
+
+    Inherits
+    -------
+    `BaseHTTPRequestHandler`
+    """
+
+    protocol_version = "HTTP/1.1"
+    boat: SyntheticBoat
+    use_etags: bool
+
+    def do_GET(self) -> None:
+        if self.path == "/boat_status/get":
+            self.send_boat_status()
+        elif self.path == "/boat_status/stream":
+            self.stream_boat_status()
+        elif self.path.startswith("/tiles/") and self.path.endswith(".png"):
+            self.send_tile()
+        elif self.path == "/camera/frame":
+            self.send_camera_frame()
+        elif self.path == "/autopilot_parameters/get":
+            self.send_autopilot_parameters()
+        else:
+            self.send_body(404, b'{"message": "Not found"}', "application/json")
+
+    def send_body(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_boat_status(self) -> None:
+        seq, body = self.boat.latest()
+        if not self.use_etags:
+            self.send_body(200, body, "application/json")
+            return
+
+        etag = f'"{seq}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_camera_frame(self) -> None:
+        frame = CAMERA_FRAMES[int(time.time()) % len(CAMERA_FRAMES)]
+        if accepts(self.headers.get("Accept", "*/*"), "image/jpeg"):
+            self.send_body(200, frame, "image/jpeg")
+        else:
+            body = json.dumps(
+                {"current_camera_image": base64.b64encode(frame).decode()}
+            ).encode()
+            self.send_body(200, body, "application/json")
+
+    def send_autopilot_parameters(self) -> None:
+        frame = CAMERA_FRAMES[int(time.time()) % len(CAMERA_FRAMES)]
+        body = json.dumps(
+            {
+                **AUTOPILOT_PARAMETERS,
+                "current_camera_image": base64.b64encode(frame).decode(),
+            }
+        ).encode()
+        self.send_body(200, body, "application/json")
+
+    def send_tile(self) -> None:
+        try:
+            z, x, y = (int(part) for part in self.path[7:-4].split("/"))
+        except ValueError:
+            self.send_body(404, b'{"message": "Not found"}', "application/json")
+            return
+        self.server.tiles_served += 1
+        self.send_body(200, TILES[(x + y) % 2], "image/png")
+
+    def stream_boat_status(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        last_event_id: Optional[str] = self.headers.get("Last-Event-ID")
+        latest_seq = self.boat.latest()[0]
+        last_seq = int(last_event_id) if last_event_id else latest_seq - 1
+        if last_seq > latest_seq:
+            # the id is from before this server started, begin a new stream
+            last_seq = latest_seq - 1
+        try:
+            while True:
+                frames = self.boat.frames_after(last_seq, timeout=1.0)
+                if not frames:
+                    self.write_chunk(b": keep-alive\n\n")
+                for seq, body in frames:
+                    self.write_chunk(b"id: %d\ndata: %s\n\n" % (seq, body))
+                    last_seq = seq
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%X\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def make_server(
+    port: int = 8080,
+    rate_hz: float = 5.0,
+    host: str = "127.0.0.1",
+    use_etags: bool = True,
+) -> ThreadingHTTPServer:
+    """
+    Create a stand-in telemetry server. Call `serve_forever` on the result to start it.
+
+    Parameters
+    ----------
+    port
+        The port to listen on, `0` picks a free port.
+    rate_hz
+        Number of synthetic frames produced per second.
+    host
+        The address to listen on.
+    use_etags
+        Whether `boat_status/get` sends an `ETag` and answers `If-None-Match` with `304 Not Modified`.
+
+    Returns
+    -------
+    ThreadingHTTPServer
+        The server, with the frame producer available as `server.boat`.
+    """
+
+    boat = SyntheticBoat(rate_hz)
+    handler = type(
+        "Handler", (StandInRequestHandler,), {"boat": boat, "use_etags": use_etags}
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.boat = boat
+    server.tiles_served = 0
+    boat.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--rate", type=float, default=5.0, help="frames per second")
+    parser.add_argument(
+        "--no-etag", action="store_true", help="do not send ETag headers"
+    )
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.rate, use_etags=not args.no_etag)
+    print(f"Stand-in telemetry server running at http://localhost:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.boat.stop()
@@ -0,0 +1,81 @@
+import time
+import threading
+
+# imported first thing in `main.py`, so this is close to when the application started
+_START = time.perf_counter()
+
+
+class StartupTimeline:
+    """
+    Records when each step of startup finished, to see where startup time goes and track it over changes.
+
+    Attributes
+    ----------
+    marks : `list[tuple[str, float]]`
+        Name of each step and the seconds since startup at which it finished, in the order they were marked.
+    """
+
+    def __init__(self) -> None:
+        self.marks: list[tuple[str, float]] = list()
+        self._lock = threading.Lock()
+
+    def mark(self, name: str) -> float:
+        """
+        Record that a step of startup finished. Only the first time a step is marked is kept.
+
+        Parameters
+        ----------
+        name
+            The step, e.g. `"first paint"`.
+
+        Returns
+        -------
+        float
+            Seconds since startup.
+        """
+
+        elapsed = time.perf_counter() - _START
+        with self._lock:
+            if not self.reached(name):
+                self.marks.append((name, elapsed))
+        return elapsed
+
+    def reached(self, name: str) -> bool:
+        """
+        Whether a step of startup was marked.
+
+        Parameters
+        ----------
+        name
+            The step.
+
+        Returns
+        -------
+        bool
+            `True` if `mark` was called with `name`.
+        """
+
+        return any(mark == name for mark, _ in self.marks)
+
+    def print_timeline(self) -> None:
+        """Print every step marked so far with the time it finished at."""
+
+        print("Startup timeline:")
+        for name, elapsed in self.marks:
+            print(f"{1000 * elapsed:8.0f} ms  {name}")
+
+
+_timeline = StartupTimeline()
+
+
+def get_timeline() -> StartupTimeline:
+    """
+    Get the timeline shared by the whole application.
+
+    Returns
+    -------
+    StartupTimeline
+        The shared timeline.
+    """
+
+    return _timeline
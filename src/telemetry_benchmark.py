@@ -0,0 +1,98 @@
+"""
+Compare the polling and streaming telemetry ingest modes against the local stand-in server.
+
+    python src/telemetry_benchmark.py --seconds 10 --rate 5
+"""
+
+import os
+import time
+import argparse
+import threading
+import stand_in_server
+
+
+def run_source(source, server, seconds: float, throttled: bool) -> dict[str, float]:
+    """
+    Iterate a telemetry source for a fixed amount of time.
+
+    Parameters
+    ----------
+    source
+        The `telemetry_sources.TelemetrySource` to benchmark.
+    server
+        The stand-in server the source is connected to.
+    seconds
+        How long to run the source for.
+    throttled
+        Whether to get frames the way `thread_classes.TelemetryUpdater` does, at most
+        `constants.TELEMETRY_TARGET_RATE_HZ` polls per second, instead of from the source directly.
+
+    Returns
+    -------
+    dict[str, float]
+        Frames received, duplicate frames suppressed by the source, distinct frames, HTTP requests sent
+        and mean latency from the frame being published to it being received, in milliseconds.
+    """
+
+    from http_transport import get_transport
+    from thread_classes import TelemetryUpdater
+
+    interrupt = threading.Event()
+    timer = threading.Timer(seconds, lambda: (interrupt.set(), source.close()))
+    requests_before = get_transport().get_stats()["requests"]
+    frames = 0
+    distinct = set()
+    latencies = []
+
+    timer.start()
+    # the updater's thread is never started, only its `frames` is used
+    iterator = (
+        TelemetryUpdater(source).frames(interrupt)
+        if throttled
+        else source.frames(interrupt)
+    )
+    for frame in iterator:
+        received_at = time.monotonic()
+        frames += 1
+        startup_ms = frame.vesc_data_time_since_vesc_startup_in_ms
+        seq = round(startup_ms / 1000 * server.boat.rate_hz)
+        if seq not in distinct:
+            distinct.add(seq)
+            latencies.append(received_at - server.boat.published_at(seq))
+    timer.cancel()
+
+    return {
+        "frames": frames,
+        "suppressed": sum(source.frames_suppressed.values()),
+        "distinct_frames": len(distinct),
+        "requests": get_transport().get_stats()["requests"] - requests_before,
+        "mean_latency_ms": 1000 * sum(latencies) / max(len(latencies), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rate", type=float, default=5.0, help="frames per second")
+    args = parser.parse_args()
+
+    server = stand_in_server.make_server(port=0, rate_hz=args.rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["TELEMETRY_SERVER_URL"] = f"http://127.0.0.1:{server.server_port}/"
+
+    # imported after setting the url since `constants` reads it on import
+    import telemetry_sources
+
+    for name, source, throttled in [
+        ("poll", telemetry_sources.PollingSource(), True),
+        ("poll (unthrottled)", telemetry_sources.PollingSource(), False),
+        ("stream", telemetry_sources.StreamingSource(), True),
+    ]:
+        result = run_source(source, server, args.seconds, throttled)
+        print(
+            f"{name:>20}: {result['frames']} frames, {result['suppressed']} suppressed, "
+            f"{result['distinct_frames']} distinct, "
+            f"{result['requests']} requests, {result['mean_latency_ms']:.1f} ms mean latency"
+        )
+
+    server.boat.stop()
@@ -0,0 +1,168 @@
+import math
+from typing import Any, Optional
+
+# `boat_status` fields that are always numbers, missing values are stored as `math.nan`
+NUMERIC_FIELDS = (
+    "speed",
+    "bearing",
+    "heading",
+    "true_wind_speed",
+    "true_wind_angle",
+    "apparent_wind_speed",
+    "apparent_wind_angle",
+    "sail_angle",
+    "rudder_angle",
+    "vesc_data_rpm",
+    "vesc_data_duty_cycle",
+    "vesc_data_amp_hours",
+    "vesc_data_amp_hours_charged",
+    "vesc_data_current_to_vesc",
+    "vesc_data_voltage_to_motor",
+    "vesc_data_voltage_to_vesc",
+    "vesc_data_wattage_to_motor",
+    "vesc_data_time_since_vesc_startup_in_ms",
+    "vesc_data_motor_temperature",
+)
+
+# every field sent by `boat_status/get`
+BOAT_STATUS_FIELDS = (
+    "position",
+    "state",
+    "full_autonomy_maneuver",
+    "current_waypoint_index",
+    "current_route",
+) + NUMERIC_FIELDS
+
+
+class TelemetryFrame:
+    """
+    One `boat_status` frame with a fixed set of typed fields.
+
+    Frames are created once on the telemetry thread and passed to the main thread by reference,
+    so they should be treated as read-only.
+
+    Attributes
+    ----------
+    received_at : `float`
+        Unix time the frame was received, `math.nan` if unknown.
+    position : `Optional[list[float]]`
+        `[latitude, longitude]` of the boat.
+    state : `str`
+        State of the boat, `"failed_to_fetch"` if the telemetry server could not be reached.
+    full_autonomy_maneuver : `str`
+        The maneuver the autopilot is performing.
+    current_waypoint_index : `Optional[int]`
+        Index in `current_route` of the waypoint the boat is heading to.
+    current_route : `list[list[float]]`
+        The route the boat is following, as a list of `[latitude, longitude]`.
+
+    Every name in `NUMERIC_FIELDS` is also an attribute holding a `float`.
+    """
+
+    __slots__ = (
+        "received_at",
+        "position",
+        "state",
+        "full_autonomy_maneuver",
+        "current_waypoint_index",
+        "current_route",
+    ) + NUMERIC_FIELDS
+
+    received_at: float
+    position: Optional[list[float]]
+    state: str
+    full_autonomy_maneuver: str
+    current_waypoint_index: Optional[int]
+    current_route: list[list[float]]
+    speed: float
+    bearing: float
+    heading: float
+    true_wind_speed: float
+    true_wind_angle: float
+    apparent_wind_speed: float
+    apparent_wind_angle: float
+    sail_angle: float
+    rudder_angle: float
+    vesc_data_rpm: float
+    vesc_data_duty_cycle: float
+    vesc_data_amp_hours: float
+    vesc_data_amp_hours_charged: float
+    vesc_data_current_to_vesc: float
+    vesc_data_voltage_to_motor: float
+    vesc_data_voltage_to_vesc: float
+    vesc_data_wattage_to_motor: float
+    vesc_data_time_since_vesc_startup_in_ms: float
+    vesc_data_motor_temperature: float
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any], received_at: float = math.nan
+    ) -> "TelemetryFrame":
+        """
+        Create a frame from decoded `boat_status` JSON.
+
+        Parameters
+        ----------
+        data
+            The decoded JSON. Missing keys get default values, unknown keys are ignored.
+        received_at
+            Unix time the frame was received.
+
+        Returns
+        -------
+        TelemetryFrame
+            The new frame.
+        """
+
+        frame = cls.__new__(cls)
+        frame.received_at = received_at
+        frame.position = data.get("position")
+        frame.state = data.get("state", "N/A")
+        frame.full_autonomy_maneuver = data.get("full_autonomy_maneuver", "N/A")
+        frame.current_waypoint_index = data.get("current_waypoint_index")
+        frame.current_route = data.get("current_route") or []
+        for name in NUMERIC_FIELDS:
+            value = data.get(name)
+            setattr(frame, name, float(value) if value is not None else math.nan)
+        return frame
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Convert the frame back to the `boat_status` JSON layout.
+
+        Returns
+        -------
+        dict[str, Any]
+            The frame as a dictionary, with missing numbers as `None`.
+        """
+
+        data: dict[str, Any] = {
+            "position": self.position,
+            "state": self.state,
+            "full_autonomy_maneuver": self.full_autonomy_maneuver,
+            "current_waypoint_index": self.current_waypoint_index,
+            "current_route": self.current_route,
+        }
+        for name in NUMERIC_FIELDS:
+            value = getattr(self, name)
+            data[name] = None if math.isnan(value) else value
+        return data
+
+    @property
+    def failed(self) -> bool:
+        """Whether this frame stands in for data that could not be fetched."""
+
+        return self.state == "failed_to_fetch"
+
+
+# used in place of real data when the telemetry server cannot be reached, shared by every failed fetch
+FAILED_FRAME = TelemetryFrame.from_dict(
+    {
+        "position": [36.983731367697374, -76.29555376681454],
+        "state": "failed_to_fetch",
+        "full_autonomy_maneuver": "N/A",
+        "current_waypoint_index": 0,
+        "current_route": [[0.0, 0.0]],
+        **{name: 0.0 for name in NUMERIC_FIELDS},
+    }
+)
@@ -0,0 +1,180 @@
+import math
+import time
+import threading
+import numpy as np
+import constants
+from telemetry_frame import NUMERIC_FIELDS, TelemetryFrame
+from typing import Optional
+
+# columns stored for every frame, `latitude` and `longitude` are split out of `position`
+HISTORY_FIELDS = ("timestamp", "latitude", "longitude") + NUMERIC_FIELDS
+
+
+class TelemetryHistory:
+    """
+    Fixed-capacity ring buffer holding every numeric telemetry field over time.
+
+    Storage is one preallocated `float64` row per field. Every sample is written twice, at `i` and
+    `i + capacity`, so the newest `n` samples are always one contiguous slice and windows can be returned
+    as views without copying or stitching the two ends of the ring together.
+
+    Frames are appended on the telemetry thread and read on the main thread. A view stays valid until
+    `capacity - len(view)` more frames have been appended, which is minutes for the windows the display uses.
+
+    Parameters
+    ----------
+    capacity
+        Maximum number of frames kept, older frames are overwritten.
+
+    Attributes
+    ----------
+    field_index : `dict[str, int]`
+        Row of each field in the arrays returned by `window` and `since`.
+    frames_appended : `int`
+        Number of frames appended since the history was created, including overwritten ones.
+    resets : `int`
+        Number of times the history was cleared, either by `clear` or by time going backwards.
+    """
+
+    def __init__(self, capacity: int = constants.TELEMETRY_HISTORY_CAPACITY) -> None:
+        self.capacity = capacity
+        self.field_index = {name: i for i, name in enumerate(HISTORY_FIELDS)}
+        self.frames_appended = 0
+        self.resets = 0
+
+        self._data = np.full((len(HISTORY_FIELDS), 2 * capacity), np.nan)
+        self._row = np.empty(len(HISTORY_FIELDS))
+        self._head = 0
+        self._length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, frame: TelemetryFrame) -> None:
+        """
+        Add a frame, overwriting the oldest one if the history is full. Failed fetches are skipped.
+
+        If the frame is older than the newest frame in the history, e.g. after seeking back in a replay,
+        the history is cleared first so that timestamps are always increasing.
+
+        Parameters
+        ----------
+        frame
+            The frame to add.
+        """
+
+        if frame.failed:
+            return
+
+        row = self._row
+        row[0] = frame.received_at if not math.isnan(frame.received_at) else time.time()
+        row[1], row[2] = (
+            frame.position if frame.position is not None else (np.nan, np.nan)
+        )
+        for i, name in enumerate(NUMERIC_FIELDS, start=3):
+            row[i] = getattr(frame, name)
+
+        with self._lock:
+            if self._length and row[0] < self._data[0, self._head + self.capacity - 1]:
+                self._length = 0
+                self.resets += 1
+
+            self._data[:, self._head] = row
+            self._data[:, self._head + self.capacity] = row
+            self._head = (self._head + 1) % self.capacity
+            self._length = min(self._length + 1, self.capacity)
+            self.frames_appended += 1
+
+    def clear(self) -> None:
+        """Forget every frame, e.g. when switching to a different telemetry source."""
+
+        with self._lock:
+            self._length = 0
+            self.resets += 1
+
+    def window(self, count: Optional[int] = None) -> np.ndarray:
+        """
+        Get the newest frames, oldest first.
+
+        Parameters
+        ----------
+        count
+            Number of frames to return, all frames if `None`.
+
+        Returns
+        -------
+        np.ndarray
+            A read-only view with one row per field in `HISTORY_FIELDS` and one column per frame.
+        """
+
+        with self._lock:
+            length = self._length if count is None else min(count, self._length)
+            end = self._head + self.capacity
+            view = self._data[:, end - length : end]
+
+        view.flags.writeable = False
+        return view
+
+    def since(self, timestamp: float) -> np.ndarray:
+        """
+        Get every frame received at or after a unix time, oldest first.
+
+        Parameters
+        ----------
+        timestamp
+            The unix time the window starts at.
+
+        Returns
+        -------
+        np.ndarray
+            A read-only view with one row per field in `HISTORY_FIELDS` and one column per frame.
+        """
+
+        frames = self.window()
+        start = np.searchsorted(frames[0], timestamp, side="left")
+        return frames[:, start:]
+
+    def column(self, field: str, seconds: Optional[float] = None) -> np.ndarray:
+        """
+        Get the values of one field.
+
+        Parameters
+        ----------
+        field
+            One of `HISTORY_FIELDS`.
+        seconds
+            Only return values from this many seconds before the newest frame, all values if `None`.
+
+        Returns
+        -------
+        np.ndarray
+            A read-only view of the values, oldest first.
+        """
+
+        frames = self.window()
+        if seconds is not None and frames.shape[1]:
+            start = np.searchsorted(frames[0], frames[0, -1] - seconds, side="left")
+            frames = frames[:, start:]
+        return frames[self.field_index[field]]
+
+    def mean(self, field: str, seconds: Optional[float] = None) -> float:
+        """
+        Average of one field, ignoring missing values.
+
+        Parameters
+        ----------
+        field
+            One of `HISTORY_FIELDS`.
+        seconds
+            Only average values from this many seconds before the newest frame, all values if `None`.
+
+        Returns
+        -------
+        float
+            The average, `math.nan` if there are no values.
+        """
+
+        values = self.column(field, seconds)
+        valid = values[~np.isnan(values)]
+        return float(valid.mean()) if valid.size else math.nan
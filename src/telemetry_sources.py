@@ -0,0 +1,460 @@
+import json
+import math
+import hashlib
+import time
+import threading
+import requests
+import constants
+import flight_recorder
+from http_transport import get_transport
+from telemetry_frame import FAILED_FRAME, TelemetryFrame
+from abc import ABC, abstractmethod
+from pathlib import PurePath
+from typing import Callable, Iterator, Optional
+
+
+def parse_server_sent_events(
+    lines: Iterator[bytes],
+) -> Iterator[tuple[Optional[str], str]]:
+    """
+    Parse a `text/event-stream` body into events.
+
+    Comment lines (starting with `:`) are skipped, multiple `data:` lines are joined with newlines
+    and an event is dispatched on every blank line.
+
+    Parameters
+    ----------
+    lines
+        The lines of the response body, without line endings.
+
+    Yields
+    -------
+    tuple[Optional[str], str]
+        The event id (or `None` if the event has no id) and the event data.
+    """
+
+    event_id: Optional[str] = None
+    data_lines: list[str] = []
+    for raw_line in lines:
+        line = raw_line.decode("utf-8") if isinstance(raw_line, bytes) else raw_line
+        if line == "":
+            if data_lines:
+                yield event_id, "\n".join(data_lines)
+            event_id = None
+            data_lines = []
+            continue
+
+        if line.startswith(":"):
+            continue
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            data_lines.append(value)
+        elif field == "id":
+            event_id = value
+
+
+class TelemetrySource(ABC):
+    """
+    Abstract base class for the places telemetry frames can come from.
+
+    Sources are iterated by `thread_classes.TelemetryUpdater` on its worker thread.
+    `live` is `False` for sources that do not come from the boat, whose frames should not be recorded again.
+    Frames that are identical to the previous frame are not yielded, they are counted in `frames_suppressed`.
+
+    Attributes
+    ----------
+    frames_suppressed : `dict[str, int]`
+        Number of duplicate frames dropped, keyed by how the duplicate was detected:
+        `"not_modified"` (the server answered `304 Not Modified`), `"duplicate_sequence"`
+        (the frame's sequence number was already seen) or `"duplicate_content"` (the body hashed the same).
+    """
+
+    live = True
+
+    def __init__(self) -> None:
+        self.frames_suppressed = {
+            "not_modified": 0,
+            "duplicate_sequence": 0,
+            "duplicate_content": 0,
+        }
+
+    @abstractmethod
+    def frames(self, interrupt: threading.Event) -> Iterator[TelemetryFrame]:
+        """
+        Yield telemetry frames until `interrupt` is set. Must be implemented by subclasses.
+
+        Parameters
+        ----------
+        interrupt
+            Set by the worker thread when it wants the iteration to end, e.g. when pausing or stopping.
+        """
+
+    def close(self) -> None:
+        """Unblock any request that `frames` is currently waiting on. Called from the main thread."""
+
+        pass
+
+
+class PollingSource(TelemetrySource):
+    """
+    Polls `boat_status/get` on the telemetry server.
+
+    `frames` polls as fast as the server responds, `thread_classes.TelemetryUpdater` limits the rate
+    by calling `get_boat_data` from its worker loop instead.
+
+    Inherits
+    -------
+    `TelemetrySource`
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._etag: Optional[str] = None
+        self._content_hash: Optional[bytes] = None
+
+    def get_boat_data(self) -> Optional[TelemetryFrame]:
+        """
+        Fetch boat data from the telemetry server, skipping frames that have not changed.
+
+        Sends the last `ETag` in `If-None-Match` so the server can answer `304 Not Modified`.
+        If the server does not support validators, the response body is hashed instead and
+        compared with the previous one before it is decoded.
+
+        Returns
+        -------
+        Optional[TelemetryFrame]
+            The boat data, `None` if it is the same as the last frame, or `FAILED_FRAME` if the request failed.
+        """
+
+        headers = {"If-None-Match": self._etag} if self._etag is not None else {}
+        try:
+            response = get_transport().get("boat_status", headers=headers)
+            if response.status_code == 304:
+                self.frames_suppressed["not_modified"] += 1
+                return None
+            # error responses may have a JSON body too, which must not be decoded as boat data
+            response.raise_for_status()
+
+            content_hash = hashlib.blake2b(response.content, digest_size=16).digest()
+            if content_hash == self._content_hash:
+                self.frames_suppressed["duplicate_content"] += 1
+                return None
+
+            boat_status = TelemetryFrame.from_dict(response.json(), time.time())
+            self._etag = response.headers.get("ETag")
+            self._content_hash = content_hash
+
+        except requests.exceptions.RequestException:
+            # forget the last frame so the first frame after reconnecting replaces the failure frame
+            self._etag = None
+            self._content_hash = None
+            boat_status = FAILED_FRAME
+            print("Warning: Failed to fetch boat data. Using default values.")
+
+        except (ValueError, TypeError, AttributeError) as e:
+            # the body is not a valid frame, e.g. a JSON list or a number that is not a number
+            self._etag = None
+            self._content_hash = None
+            boat_status = FAILED_FRAME
+            print(f"Warning: Received malformed boat data. Using default values: {e}")
+        return boat_status
+
+    def frames(self, interrupt: threading.Event) -> Iterator[TelemetryFrame]:
+        while not interrupt.is_set():
+            boat_status = self.get_boat_data()
+            if boat_status is not None:
+                yield boat_status
+
+
+class StreamingSource(TelemetrySource):
+    """
+    Subscribes to `boat_status/stream` on the telemetry server and yields frames as the server pushes them.
+
+    The stream is a `text/event-stream` where every event carries one `boat_status` frame as JSON and
+    an increasing event id. If the connection drops, the source reconnects with exponential backoff and
+    sends the id of the last frame it received in the `Last-Event-ID` header so the server can resume
+    from where the stream left off. If the first event after reconnecting is older than that, the server
+    has started a new stream and its ids are accepted from there.
+
+    Inherits
+    -------
+    `TelemetrySource`
+
+    Parameters
+    ----------
+    reconnect_delay
+        Seconds to wait before the first reconnect attempt.
+    max_reconnect_delay
+        Upper limit for the reconnect delay, which doubles after every failed attempt.
+
+    Attributes
+    ----------
+    last_event_id : `Optional[str]`
+        The id of the last frame received, used to resume the stream after reconnecting.
+    reconnects : `int`
+        Number of times the stream had to be reopened.
+    """
+
+    def __init__(
+        self,
+        reconnect_delay: float = constants.TELEMETRY_STREAM_RECONNECT_DELAY,
+        max_reconnect_delay: float = constants.TELEMETRY_STREAM_MAX_RECONNECT_DELAY,
+    ) -> None:
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        super().__init__()
+        self.last_event_id: Optional[str] = None
+        self.reconnects = 0
+        self._response: Optional[requests.Response] = None
+
+    def frames(self, interrupt: threading.Event) -> Iterator[TelemetryFrame]:
+        delay = self.reconnect_delay
+        while not interrupt.is_set():
+            headers = {"Accept": "text/event-stream"}
+            if self.last_event_id is not None:
+                headers["Last-Event-ID"] = self.last_event_id
+
+            try:
+                with get_transport().get(
+                    "boat_status_stream", headers=headers, stream=True
+                ) as response:
+                    self._response = response
+                    response.raise_for_status()
+                    delay = self.reconnect_delay
+                    lines = response.iter_lines(chunk_size=None)
+                    resuming = self.last_event_id is not None
+                    for event_id, data in parse_server_sent_events(lines):
+                        if event_id is not None:
+                            if resuming and self.is_restarted(event_id):
+                                print(
+                                    "Telemetry stream restarted, event ids start over."
+                                )
+                                self.last_event_id = None
+                            resuming = False
+                            if self.is_replayed(event_id):
+                                self.frames_suppressed["duplicate_sequence"] += 1
+                                continue
+                            self.last_event_id = event_id
+                        try:
+                            frame = TelemetryFrame.from_dict(
+                                json.loads(data), time.time()
+                            )
+                        except (ValueError, TypeError, AttributeError) as e:
+                            # one malformed event does not mean the stream is broken, keep reading it
+                            print(
+                                f"Warning: Received malformed boat data. Using default values: {e}"
+                            )
+                            frame = FAILED_FRAME
+                        yield frame
+                        if interrupt.is_set():
+                            return
+
+            except Exception as e:
+                # `close` shuts the response from another thread, which can surface as almost any exception
+                if interrupt.is_set():
+                    return
+                if not isinstance(
+                    e, (requests.exceptions.RequestException, ValueError, OSError)
+                ):
+                    raise
+                print(f"Warning: Telemetry stream failed: {e}")
+                yield FAILED_FRAME
+
+            finally:
+                self._response = None
+
+            if interrupt.is_set():
+                return
+            self.reconnects += 1
+            print(f"Reconnecting to telemetry stream in {delay:.1f} seconds.")
+            interrupt.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def is_restarted(self, event_id: str) -> bool:
+        """
+        Whether the first event after reconnecting comes from a new stream, e.g. because the server restarted
+        and its sequence numbers started over.
+
+        Parameters
+        ----------
+        event_id
+            The id of the first event received on the new connection.
+
+        Returns
+        -------
+        bool
+            `True` if both ids are numeric and the event is older than the last event received.
+            The last event itself may be resent, which `is_replayed` suppresses.
+        """
+
+        if self.last_event_id is None:
+            return False
+        try:
+            return int(event_id) < int(self.last_event_id)
+        except ValueError:
+            return False
+
+    def is_replayed(self, event_id: str) -> bool:
+        """
+        Whether an event was already received, e.g. because the server resent it after reconnecting.
+
+        Parameters
+        ----------
+        event_id
+            The id of the event, numeric ids are treated as sequence numbers.
+
+        Returns
+        -------
+        bool
+            `True` if the event is not newer than the last event received.
+        """
+
+        if self.last_event_id is None:
+            return False
+        try:
+            return int(event_id) <= int(self.last_event_id)
+        except ValueError:
+            return event_id == self.last_event_id
+
+    def close(self) -> None:
+        response = self._response
+        if response is not None:
+            response.close()
+
+
+class ReplaySource(TelemetrySource):
+    """
+    Replays a session recorded by `flight_recorder.FlightRecorder`.
+
+    Frames are streamed from disk one at a time and yielded with the same spacing they were received with,
+    divided by `speed`. The position is remembered between iterations, so pausing and resuming the
+    worker continues where the replay left off. To jump somewhere else, call `seek` and restart the worker.
+
+    Inherits
+    -------
+    `TelemetrySource`
+
+    Parameters
+    ----------
+    session_dir
+        The session directory to replay.
+    speed
+        How many times faster than real time to replay. If `None`, replay as fast as possible.
+    on_finished
+        Called on the worker thread when the end of the session is reached, with the number of frames
+        replayed and the seconds it took since the replay was last started.
+
+    Attributes
+    ----------
+    start_time : `float`
+        Unix time of the first frame in the session.
+    end_time : `float`
+        Unix time of the last frame in the session.
+    position : `float`
+        Unix time of the next frame to replay.
+    """
+
+    live = False
+
+    def __init__(
+        self,
+        session_dir: PurePath,
+        speed: Optional[float] = 1.0,
+        on_finished: Optional[Callable[[int, float], None]] = None,
+    ) -> None:
+        super().__init__()
+        self.session_dir = session_dir
+        self.speed = speed
+        self.on_finished = on_finished
+        self.start_time, self.end_time = flight_recorder.session_time_range(session_dir)
+        self.position = self.start_time
+
+        # `position` is only written by the worker thread, seeks are handed over in `_seek_target`
+        self._seek_lock = threading.Lock()
+        self._seek_target: Optional[float] = None
+
+    def seek(self, timestamp: float) -> None:
+        """
+        Move the replay position. Takes effect the next time `frames` is called.
+
+        Parameters
+        ----------
+        timestamp
+            The unix time to continue replaying from, clamped to the session.
+        """
+
+        with self._seek_lock:
+            self._seek_target = min(max(timestamp, self.start_time), self.end_time)
+
+    def frames(self, interrupt: threading.Event) -> Iterator[TelemetryFrame]:
+        with self._seek_lock:
+            if self._seek_target is not None:
+                self.position = self._seek_target
+                self._seek_target = None
+
+        started_at = time.monotonic()
+        first_timestamp: Optional[float] = None
+        frames_replayed = 0
+
+        for timestamp, frame in flight_recorder.read_session(
+            self.session_dir, self.position
+        ):
+            if interrupt.is_set():
+                return
+
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            if self.speed:
+                due_at = started_at + (timestamp - first_timestamp) / self.speed
+                remaining = due_at - time.monotonic()
+                if remaining > 0 and interrupt.wait(remaining):
+                    return
+
+            # resuming continues after this frame instead of replaying it again
+            self.position = math.nextafter(timestamp, math.inf)
+            frames_replayed += 1
+            try:
+                boat_status = TelemetryFrame.from_dict(frame, timestamp)
+            except (ValueError, TypeError, AttributeError) as e:
+                print(
+                    f"Warning: Recorded frame is malformed. Using default values: {e}"
+                )
+                boat_status = FAILED_FRAME
+            yield boat_status
+
+        # stay at the end instead of returning, which would make the worker start over right away
+        self.position = math.nextafter(self.end_time, math.inf)
+        if self.on_finished is not None:
+            self.on_finished(frames_replayed, time.monotonic() - started_at)
+        interrupt.wait()
+
+
+def make_source(mode: str = constants.TELEMETRY_INGEST_MODE) -> TelemetrySource:
+    """
+    Create the telemetry source for an ingest mode.
+
+    Parameters
+    ----------
+    mode
+        Either `"poll"` or `"stream"`.
+
+    Returns
+    -------
+    TelemetrySource
+        The source for the given mode.
+
+    Raises
+    -------
+    ValueError
+        If the mode is not recognized.
+    """
+
+    if mode == "poll":
+        return PollingSource()
+    elif mode == "stream":
+        return StreamingSource()
+    else:
+        raise ValueError("Invalid telemetry ingest mode. Use 'poll' or 'stream'.")
@@ -0,0 +1,434 @@
+"""
+Local cache of map tiles stored in an MBTiles file, so the map works with a weak or missing uplink.
+
+Tiles are fetched from `constants.TILE_SOURCE_URL` the first time they are shown and served from the cache
+after that. A region can be downloaded ahead of time, either a bounding box or a corridor around a route:
+
+    python src/tile_cache.py --bbox 36.95 -76.35 37.02 -76.25 --zooms 10 17
+    python src/tile_cache.py --route app_data/assets/big_waypoints.json --corridor 500 --zooms 12 18
+"""
+
+import math
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import requests
+import constants
+from concurrent.futures import ThreadPoolExecutor
+from http_transport import get_transport
+from typing import Iterable, Optional
+
+# tile servers ask clients to identify themselves
+TILE_REQUEST_HEADERS = {"User-Agent": "ground_station_25 tile cache"}
+
+
+def tile_for(latitude: float, longitude: float, zoom: int) -> tuple[int, int]:
+    """
+    Find the web mercator tile containing a point.
+
+    Parameters
+    ----------
+    latitude
+        Latitude of the point in degrees.
+    longitude
+        Longitude of the point in degrees.
+    zoom
+        The zoom level.
+
+    Returns
+    -------
+    tuple[int, int]
+        The `(x, y)` of the tile, with `y` counted from the north like in tile urls.
+    """
+
+    n = 2**zoom
+    latitude = min(max(latitude, -85.0511), 85.0511)
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_in_bbox(
+    south: float, west: float, north: float, east: float, zoom: int
+) -> Iterable[tuple[int, int, int]]:
+    """
+    List the tiles covering a bounding box at one zoom level.
+
+    Parameters
+    ----------
+    south, west, north, east
+        Edges of the box in degrees.
+    zoom
+        The zoom level.
+
+    Returns
+    -------
+    Iterable[tuple[int, int, int]]
+        The `(zoom, x, y)` of every tile.
+    """
+
+    min_x, min_y = tile_for(north, west, zoom)
+    max_x, max_y = tile_for(south, east, zoom)
+    for x in range(min_x, max_x + 1):
+        for y in range(min_y, max_y + 1):
+            yield zoom, x, y
+
+
+def tiles_along_route(
+    waypoints: list[list[float]], corridor: float, zoom: int
+) -> set[tuple[int, int, int]]:
+    """
+    List the tiles within a distance of a route at one zoom level.
+
+    Parameters
+    ----------
+    waypoints
+        The route, each waypoint a list of `[latitude, longitude]`.
+    corridor
+        Distance from the route in meters.
+    zoom
+        The zoom level.
+
+    Returns
+    -------
+    set[tuple[int, int, int]]
+        The `(zoom, x, y)` of every tile.
+    """
+
+    tiles: set[tuple[int, int, int]] = set()
+    meters_per_degree = 111_319.49
+    for start, end in zip(waypoints, waypoints[1:] or waypoints):
+        latitude_scale = meters_per_degree
+        longitude_scale = meters_per_degree * max(
+            math.cos(math.radians(start[0])), 1e-6
+        )
+        length = math.hypot(
+            (end[0] - start[0]) * latitude_scale,
+            (end[1] - start[1]) * longitude_scale,
+        )
+        # sample at most a corridor apart, so the boxes around the samples overlap
+        steps = max(int(length / max(corridor, 1.0)), 1)
+        for step in range(steps + 1):
+            latitude = start[0] + (end[0] - start[0]) * step / steps
+            longitude = start[1] + (end[1] - start[1]) * step / steps
+            tiles.update(
+                tiles_in_bbox(
+                    latitude - corridor / latitude_scale,
+                    longitude - corridor / longitude_scale,
+                    latitude + corridor / latitude_scale,
+                    longitude + corridor / longitude_scale,
+                    zoom,
+                )
+            )
+    return tiles
+
+
+class TileCache:
+    """
+    Map tiles stored in an MBTiles file, looked up before fetching them from the tile server.
+
+    When more than `max_tiles` tiles are stored, the least recently used ones are evicted. Uses are
+    remembered in memory and written out in batches, so serving a cached tile does not write to disk.
+
+    Safe to use from several threads at once. At most `max_concurrent_fetches` tiles are downloaded at a time,
+    so the map does not crowd out telemetry on a slow uplink.
+
+    Parameters
+    ----------
+    path
+        The MBTiles file, created if it does not exist.
+    source_url
+        Url of the tile server, with `{z}`, `{x}` and `{y}` placeholders.
+    max_tiles
+        Maximum number of tiles kept.
+    max_concurrent_fetches
+        Maximum number of tiles downloaded at the same time.
+
+    Attributes
+    ----------
+    hits : `int`
+        Number of lookups answered from the cache.
+    misses : `int`
+        Number of lookups that had to fetch the tile.
+    fetch_failures : `int`
+        Number of fetches that failed.
+    evictions : `int`
+        Number of tiles evicted.
+    """
+
+    def __init__(
+        self,
+        path: str = str(constants.TILE_CACHE_PATH),
+        source_url: str = constants.TILE_SOURCE_URL,
+        max_tiles: int = constants.TILE_CACHE_MAX_TILES,
+        max_concurrent_fetches: int = constants.TILE_MAX_CONCURRENT_FETCHES,
+    ) -> None:
+        self.path = path
+        self.source_url = source_url
+        self.max_tiles = max_tiles
+        self.hits = 0
+        self.misses = 0
+        self.fetch_failures = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._fetch_slots = threading.BoundedSemaphore(max_concurrent_fetches)
+        self._last_used: dict[tuple[int, int, int], float] = dict()
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT, value TEXT)")
+        # `last_used` is not part of MBTiles, readers ignore extra columns
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tiles "
+            "(zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB, last_used REAL)"
+        )
+        self._db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS tile_last_used ON tiles (last_used)"
+        )
+        if not self._db.execute("SELECT 1 FROM metadata").fetchone():
+            self._db.executemany(
+                "INSERT INTO metadata VALUES (?, ?)",
+                [("name", "ground station tile cache"), ("format", "png")],
+            )
+        self._db.commit()
+        self._count = self._db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        """
+        Look up a tile in the cache only.
+
+        Parameters
+        ----------
+        z, x, y
+            The tile, with `y` counted from the north like in tile urls.
+
+        Returns
+        -------
+        Optional[bytes]
+            The tile image, `None` if it is not cached.
+        """
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, 2**z - 1 - y),
+            ).fetchone()
+            if row is None:
+                return None
+            self._last_used[(z, x, y)] = time.time()
+            if len(self._last_used) >= 256:
+                self._write_last_used()
+            return row[0]
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> None:
+        """
+        Store a tile, evicting the least recently used tiles if the cache is full.
+
+        Parameters
+        ----------
+        z, x, y
+            The tile, with `y` counted from the north like in tile urls.
+        data
+            The tile image.
+        """
+
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO tiles VALUES (?, ?, ?, ?, ?)",
+                (z, x, 2**z - 1 - y, data, time.time()),
+            )
+            self._count += cursor.rowcount
+            if self._count > self.max_tiles:
+                self._evict()
+            self._db.commit()
+
+    def lookup(self, z: int, x: int, y: int) -> Optional[bytes]:
+        """
+        Get a tile from the cache, fetching and storing it if it is not cached.
+
+        Parameters
+        ----------
+        z, x, y
+            The tile, with `y` counted from the north like in tile urls.
+
+        Returns
+        -------
+        Optional[bytes]
+            The tile image, `None` if it is not cached and could not be fetched.
+        """
+
+        data = self.get(z, x, y)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        data = self.fetch(z, x, y)
+        if data is not None:
+            self.put(z, x, y, data)
+        return data
+
+    def fetch(self, z: int, x: int, y: int) -> Optional[bytes]:
+        """
+        Download a tile from the tile server without touching the cache.
+
+        Parameters
+        ----------
+        z, x, y
+            The tile, with `y` counted from the north like in tile urls.
+
+        Returns
+        -------
+        Optional[bytes]
+            The tile image, `None` if the download failed.
+        """
+
+        url = self.source_url.format(z=z, x=x, y=y)
+        with self._fetch_slots:
+            try:
+                response = get_transport().get(
+                    url,
+                    headers=TILE_REQUEST_HEADERS,
+                    timeout=constants.TILE_FETCH_TIMEOUT,
+                )
+                response.raise_for_status()
+                return response.content
+            except requests.exceptions.RequestException as e:
+                self.fetch_failures += 1
+                print(f"Warning: Failed to fetch map tile {z}/{x}/{y}: {e}")
+                return None
+
+    def _write_last_used(self) -> None:
+        self._db.executemany(
+            "UPDATE tiles SET last_used = ? WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            [
+                (last_used, z, x, 2**z - 1 - y)
+                for (z, x, y), last_used in self._last_used.items()
+            ],
+        )
+        self._db.commit()
+        self._last_used = dict()
+
+    def _evict(self) -> None:
+        # evict down to 90% so a full cache is not evicting on every new tile
+        self._write_last_used()
+        excess = self._count - int(self.max_tiles * 0.9)
+        cursor = self._db.execute(
+            "DELETE FROM tiles WHERE rowid IN (SELECT rowid FROM tiles ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._count -= cursor.rowcount
+        self.evictions += cursor.rowcount
+
+    def close(self) -> None:
+        """Write out tile uses and close the file."""
+
+        with self._lock:
+            self._write_last_used()
+            self._db.close()
+
+    def print_stats(self) -> None:
+        """Print how many tiles were served from the cache and how many were fetched."""
+
+        print(
+            f"Tile cache: {self.hits} hits, {self.misses} misses, {self.fetch_failures} failed fetches, "
+            f"{self.evictions} evicted, {self._count} tiles stored"
+        )
+
+
+def prefetch(cache: TileCache, tiles: set[tuple[int, int, int]], workers: int) -> None:
+    """
+    Download every tile that is not cached yet.
+
+    Parameters
+    ----------
+    cache
+        The cache to fill.
+    tiles
+        The `(zoom, x, y)` of the tiles to download.
+    workers
+        Number of tiles downloaded at the same time.
+    """
+
+    missing = [tile for tile in sorted(tiles) if cache.get(*tile) is None]
+    print(f"{len(tiles)} tiles in region, {len(missing)} not cached yet.")
+    if len(tiles) > cache.max_tiles:
+        print(
+            f"Warning: The region has more tiles than the cache keeps ({cache.max_tiles}), "
+            "some will be evicted."
+        )
+
+    def download(tile: tuple[int, int, int]) -> bool:
+        data = cache.fetch(*tile)
+        if data is not None:
+            cache.put(*tile, data)
+        return data is not None
+
+    start = time.monotonic()
+    downloaded = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for done, ok in enumerate(executor.map(download, missing), 1):
+            downloaded += ok
+            if done % 100 == 0 or done == len(missing):
+                print(f"{done}/{len(missing)} tiles ({time.monotonic() - start:.0f} s)")
+    print(f"Downloaded {downloaded} tiles, {len(missing) - downloaded} failed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    region = parser.add_mutually_exclusive_group(required=True)
+    region.add_argument(
+        "--bbox",
+        type=float,
+        nargs=4,
+        metavar=("SOUTH", "WEST", "NORTH", "EAST"),
+        help="bounding box in degrees",
+    )
+    region.add_argument(
+        "--route", help="json file with a list of [latitude, longitude] waypoints"
+    )
+    parser.add_argument(
+        "--corridor",
+        type=float,
+        default=500.0,
+        help="meters around the route to download, used with --route",
+    )
+    parser.add_argument(
+        "--zooms",
+        type=int,
+        nargs=2,
+        default=[10, 17],
+        metavar=("MIN", "MAX"),
+        help="zoom levels to download, inclusive",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=constants.TILE_MAX_CONCURRENT_FETCHES,
+        help="tiles downloaded at the same time",
+    )
+    args = parser.parse_args()
+
+    tiles: set[tuple[int, int, int]] = set()
+    if args.route:
+        with open(args.route) as f:
+            waypoints = json.load(f)
+    for zoom in range(args.zooms[0], args.zooms[1] + 1):
+        if args.bbox:
+            tiles.update(tiles_in_bbox(*args.bbox, zoom))
+        else:
+            tiles.update(tiles_along_route(waypoints, args.corridor, zoom))
+
+    cache = TileCache(max_concurrent_fetches=args.workers)
+    prefetch(cache, tiles, args.workers)
+    cache.close()
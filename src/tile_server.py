@@ -0,0 +1,119 @@
+import re
+import threading
+from map_assets import MapAssets
+from tile_cache import TileCache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+TILE_PATH = re.compile(r"^/tiles/(\d+)/(\d+)/(\d+)\.png$")
+ASSET_PATH = re.compile(r"^/assets/([\w.-]+\.png)$")
+
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves `/tiles/{z}/{x}/{y}.png` to the map from a `TileCache`, and `/assets/{name}.png` from `MapAssets`.
+
+    Inherits
+    -------
+    `BaseHTTPRequestHandler`
+    """
+
+    protocol_version = "HTTP/1.1"
+    cache: TileCache
+    assets: MapAssets
+
+    def do_GET(self) -> None:
+        match = TILE_PATH.match(self.path)
+        if match is None:
+            self.send_asset()
+            return
+
+        z, x, y = (int(group) for group in match.groups())
+        data = self.cache.lookup(z, x, y)
+        if data is None:
+            # not cached and the tile server is unreachable, let the map try again later
+            self.send_body(504, b"Tile unavailable", "text/plain", cacheable=False)
+        else:
+            self.send_body(200, data, "image/png", cacheable=True)
+
+    def send_asset(self) -> None:
+        match = ASSET_PATH.match(self.path)
+        data = self.assets.get(match.group(1)) if match is not None else None
+        if data is None:
+            self.send_body(404, b"Not found", "text/plain", cacheable=False)
+        else:
+            self.send_body(200, data, "image/png", cacheable=True)
+
+    def send_body(
+        self, status: int, body: bytes, content_type: str, cacheable: bool
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "max-age=86400" if cacheable else "no-store")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def make_server(
+    cache: TileCache, assets: MapAssets, port: int, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """
+    Create a local tile server. Call `serve_forever` on the result to start it.
+
+    Parameters
+    ----------
+    cache
+        The cache tiles are served from.
+    assets
+        The images served to the map.
+    port
+        The port to listen on, `0` picks a free port.
+    host
+        The address to listen on.
+
+    Returns
+    -------
+    ThreadingHTTPServer
+        The server.
+    """
+
+    handler = type("Handler", (TileRequestHandler,), {"cache": cache, "assets": assets})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(
+    cache: TileCache, assets: MapAssets, port: int
+) -> Optional[ThreadingHTTPServer]:
+    """
+    Start a local tile server in a background thread.
+
+    Parameters
+    ----------
+    cache
+        The cache tiles are served from.
+    assets
+        The images served to the map.
+    port
+        The port to listen on.
+
+    Returns
+    -------
+    Optional[ThreadingHTTPServer]
+        The running server, `None` if it could not be started.
+    """
+
+    try:
+        server = make_server(cache, assets, port)
+    except OSError as e:
+        # most likely another ground station is already serving the same cache
+        print(f"Warning: Failed to start tile server on port {port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,225 @@
+import math
+import threading
+import constants
+from telemetry_frame import TelemetryFrame
+from typing import Optional
+
+# meters per degree of latitude, and of longitude at the equator
+METERS_PER_DEGREE = 111_319.49
+
+
+class TrackLevel:
+    """
+    The boat's track simplified to one tolerance, built up one point at a time.
+
+    Each dropped point allows a range of directions from the last kept point: those whose line passes
+    within `tolerance` meters of it. The ranges of all points dropped since the last kept one are intersected,
+    and once a new point falls outside that range, or is closer to the last kept point than an earlier one,
+    the point before it is kept.
+    Every point costs the same however many were dropped before it, unlike Douglas-Peucker
+    which has to go back over them.
+
+    Parameters
+    ----------
+    tolerance
+        Maximum distance in meters between the real track and the simplified one.
+
+    Attributes
+    ----------
+    points : `list[list[float]]`
+        The kept points, each a list of `[latitude, longitude]`.
+    """
+
+    def __init__(self, tolerance: float) -> None:
+        self.tolerance = tolerance
+        self.points: list[list[float]] = list()
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop every point."""
+
+        self.points = list()
+        self._anchor: Optional[tuple[float, float]] = None
+        self._previous: Optional[tuple[float, float, float, float]] = None
+        self._reset_sector()
+
+    def _reset_sector(self) -> None:
+        # allowed directions from the anchor, in radians relative to `_reference`
+        self._reference: Optional[float] = None
+        self._low = -math.pi
+        self._high = math.pi
+        self._max_distance = 0.0
+
+    def add(self, x: float, y: float, latitude: float, longitude: float) -> None:
+        """
+        Add a point to the track, keeping the previous point if the track can no longer skip it.
+
+        Parameters
+        ----------
+        x, y
+            Position of the point in meters, in any fixed local projection.
+        latitude, longitude
+            Position of the point in degrees.
+        """
+
+        if self._anchor is None:
+            self._anchor = (x, y)
+            self.points.append([latitude, longitude])
+            return
+
+        if not self._narrow(x, y):
+            previous_x, previous_y, previous_latitude, previous_longitude = (
+                self._previous
+            )
+            self._anchor = (previous_x, previous_y)
+            self.points.append([previous_latitude, previous_longitude])
+            self._reset_sector()
+            self._narrow(x, y)
+        self._previous = (x, y, latitude, longitude)
+
+    def _narrow(self, x: float, y: float) -> bool:
+        # narrow the allowed directions to pass near `(x, y)`, `False` if the line can't go through it
+        dx, dy = x - self._anchor[0], y - self._anchor[1]
+        distance = math.hypot(dx, dy)
+        if distance <= self.tolerance:
+            return True
+
+        direction = math.atan2(dy, dx)
+        if self._reference is None:
+            self._reference = direction
+        relative = (direction - self._reference + math.pi) % (2 * math.pi) - math.pi
+        if (
+            relative < self._low
+            or relative > self._high
+            or distance < self._max_distance
+        ):
+            return False
+
+        half_width = math.asin(self.tolerance / distance)
+        self._low = max(self._low, relative - half_width)
+        self._high = min(self._high, relative + half_width)
+        self._max_distance = max(self._max_distance, distance)
+        return True
+
+
+class TrackHistory:
+    """
+    The boat's track at several levels of detail, for drawing on the map.
+
+    Every position is added to each level in `constants.TRACK_LEVELS`, from fine levels shown when zoomed in
+    to coarse ones shown when zoomed out, so the map never draws more points than are visible at its zoom.
+    Only the points kept since the last call to `take_new` are sent to the map, so each render sends
+    a handful of points however long the track is.
+
+    Positions are added on the telemetry thread and taken on the main thread.
+
+    Parameters
+    ----------
+    levels
+        `(tolerance, min_zoom)` of each level: the maximum distance in meters between the real and the drawn
+        track, and the lowest map zoom the level is drawn at. Ordered from finest to coarsest.
+
+    Attributes
+    ----------
+    levels : `list[TrackLevel]`
+        The levels of detail, from finest to coarsest.
+    min_zooms : `list[int]`
+        The lowest map zoom each level is drawn at.
+    points_added : `int`
+        Number of positions added since the track was last cleared.
+    resets : `int`
+        Number of times the track was cleared, either by `clear` or by time going backwards.
+    """
+
+    def __init__(
+        self,
+        levels: tuple[tuple[float, int], ...] = constants.TRACK_LEVELS,
+    ) -> None:
+        self.levels = [TrackLevel(tolerance) for tolerance, _ in levels]
+        self.min_zooms = [min_zoom for _, min_zoom in levels]
+        self.points_added = 0
+        self.resets = 0
+
+        self._sent = [0] * len(self.levels)
+        self._needs_reset = False
+        self._last_timestamp = -math.inf
+        self._longitude_scale = METERS_PER_DEGREE
+        self._lock = threading.Lock()
+
+    def append(self, frame: TelemetryFrame) -> None:
+        """
+        Add the position of a frame to the track. Failed fetches and frames without a position are skipped.
+
+        If the frame is older than the last one, e.g. after seeking back in a replay, the track is cleared first.
+
+        Parameters
+        ----------
+        frame
+            The frame to add.
+        """
+
+        if frame.failed or not frame.position:
+            return
+        latitude, longitude = float(frame.position[0]), float(frame.position[1])
+        if not (math.isfinite(latitude) and math.isfinite(longitude)):
+            return
+
+        with self._lock:
+            if frame.received_at < self._last_timestamp:
+                self._clear()
+            self._last_timestamp = frame.received_at
+
+            if self.points_added == 0:
+                # projection is fixed at the first point, accurate enough for the area the boat covers
+                self._longitude_scale = METERS_PER_DEGREE * math.cos(
+                    math.radians(latitude)
+                )
+            x = longitude * self._longitude_scale
+            y = latitude * METERS_PER_DEGREE
+            for level in self.levels:
+                level.add(x, y, latitude, longitude)
+            self.points_added += 1
+
+    def clear(self) -> None:
+        """Drop the whole track."""
+
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        for level in self.levels:
+            level.clear()
+        self._sent = [0] * len(self.levels)
+        self._needs_reset = True
+        self._last_timestamp = -math.inf
+        self.points_added = 0
+        self.resets += 1
+
+    def resend(self) -> None:
+        """Send the whole track again with the next `take_new`, e.g. because the map was reloaded."""
+
+        with self._lock:
+            self._sent = [0] * len(self.levels)
+            self._needs_reset = True
+
+    def take_new(self) -> Optional[tuple[bool, list[list[list[float]]]]]:
+        """
+        Take the points kept since the last call.
+
+        Returns
+        -------
+        Optional[tuple[bool, list[list[list[float]]]]]
+            Whether the map should drop the track it has before adding these points,
+            and the new points of each level. `None` if there is nothing to send.
+        """
+
+        with self._lock:
+            new_points = [
+                level.points[sent:] for level, sent in zip(self.levels, self._sent)
+            ]
+            reset = self._needs_reset
+            if not reset and not any(new_points):
+                return None
+            self._sent = [len(level.points) for level in self.levels]
+            self._needs_reset = False
+        return reset, new_points
@@ -0,0 +1,89 @@
+import json
+from PyQt5.QtCore import QFile, QIODevice, QObject, pyqtSignal, pyqtSlot
+
+# loading the web channel library registers the `:/qtwebchannel/qwebchannel.js` resource
+import PyQt5.QtWebChannel
+
+# how `map.html` loads the web channel script, which only works in pages loaded from `qrc:`
+QWEBCHANNEL_SCRIPT_TAG = '<script src="qrc:///qtwebchannel/qwebchannel.js"></script>'
+
+
+def inline_qwebchannel_script(html: str) -> str:
+    """
+    Replace the tag that loads `qwebchannel.js` with the script itself.
+
+    Pages set with `setHtml` have no base url, so they cannot load `qrc:` urls. Giving them a `qrc:`
+    base url instead would make the page local content, which is not allowed to load the remote scripts,
+    tiles and servers the map uses.
+
+    Parameters
+    ----------
+    html
+        The page, containing `QWEBCHANNEL_SCRIPT_TAG`.
+
+    Returns
+    -------
+    str
+        The page with the script inlined, or unchanged if the script is not available.
+    """
+
+    script = QFile(":/qtwebchannel/qwebchannel.js")
+    if not script.open(QIODevice.OpenModeFlag.ReadOnly):
+        print(
+            "Warning: qwebchannel.js not found, the map cannot send waypoints over the web channel."
+        )
+        return html
+    source = bytes(script.readAll()).decode("utf-8")
+    script.close()
+    return html.replace(QWEBCHANNEL_SCRIPT_TAG, f"<script>{source}</script>", 1)
+
+
+class WaypointChannel(QObject):
+    """
+    Receives waypoints from the map over a `QWebChannel`, as `channel.objects.waypoints` in `map.html`.
+
+    The map calls `set_waypoints` whenever a waypoint is added or removed, so waypoints reach Python
+    as soon as they change instead of being polled from the local waypoints server.
+
+    Inherits
+    -------
+    `QObject`
+
+    Attributes
+    ----------
+    waypoints_changed : `pyqtSignal`
+        Emits a list of lists containing waypoints, where each waypoint is a list of `[latitude, longitude]`.
+    is_connected : `bool`
+        Whether the map has connected to the channel since it was last loaded.
+    """
+
+    waypoints_changed = pyqtSignal(list)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.is_connected = False
+
+    @pyqtSlot()
+    def connected(self) -> None:
+        """Called from JavaScript once the map has connected to the channel."""
+
+        self.is_connected = True
+        print("Map connected to the waypoint channel.")
+
+    @pyqtSlot(str)
+    def set_waypoints(self, waypoints_json: str) -> None:
+        """
+        Called from JavaScript with every waypoint on the map.
+
+        Parameters
+        ----------
+        waypoints_json
+            The waypoints as a JSON array of `[latitude, longitude]`.
+        """
+
+        try:
+            waypoints = json.loads(waypoints_json)
+        except ValueError as e:
+            print(f"Warning: Invalid waypoints from map: {e}")
+            return
+        self.waypoints_changed.emit(waypoints)
@@ -0,0 +1,324 @@
+import bisect
+import hashlib
+import itertools
+from array import array
+from typing import Literal, NamedTuple, Optional
+
+
+class WaypointOp(NamedTuple):
+    """
+    One step of turning a waypoint list into another.
+
+    Operations are applied in order, and `index` refers to the list as it is after the previous operations.
+
+    Attributes
+    ----------
+    kind : `Literal["insert", "delete", "modify"]`
+        Whether `waypoints` are inserted before `index`, deleted starting at `index`,
+        or replace the waypoints starting at `index`.
+    index : `int`
+        The first waypoint the operation applies to.
+    waypoints : `list[list[float]]`
+        The inserted waypoints, the deleted waypoints, or the new coordinates of the modified waypoints.
+    """
+
+    kind: Literal["insert", "delete", "modify"]
+    index: int
+    waypoints: list[list[float]]
+
+
+def fingerprint(waypoints: list[list[float]]) -> bytes:
+    """
+    Hash the coordinates of a waypoint list.
+
+    Parameters
+    ----------
+    waypoints
+        The waypoints, each a list of `[latitude, longitude]`.
+
+    Returns
+    -------
+    bytes
+        A 16 byte digest, the same for two lists exactly when they contain the same coordinates in the same order.
+    """
+
+    coordinates = array("d", itertools.chain.from_iterable(waypoints))
+    return hashlib.blake2b(coordinates.tobytes(), digest_size=16).digest()
+
+
+def diff_waypoints(old: list[list[float]], new: list[list[float]]) -> list[WaypointOp]:
+    """
+    Find the operations that turn `old` into `new`.
+
+    The common prefix and suffix are skipped first, so a single edit anywhere in the list is found in one pass.
+    In the part that is left, waypoints that appear exactly once in both lists are used as anchors, and the
+    longest run of anchors that are in the same order in both lists is kept, so a moved waypoint costs one
+    delete and one insert instead of shifting every waypoint between its old and new position.
+    The gaps between kept anchors are diffed the same way. Gaps without anchors, e.g. routes that visit
+    the same coordinates several times, match waypoints in order to the next equal waypoint of `old`.
+    Unmatched waypoints are modified in place where possible and inserted or deleted otherwise.
+
+    Parameters
+    ----------
+    old
+        The current waypoints, each a list of `[latitude, longitude]`.
+    new
+        The waypoints to change to.
+
+    Returns
+    -------
+    list[WaypointOp]
+        The operations, empty if the lists are equal.
+    """
+
+    ops: list[WaypointOp] = []
+    # ranges of `old` and `new` still to diff, popped left to right so operations come out in list order
+    ranges = [(0, len(old), 0, len(new))]
+    while ranges:
+        old_start, old_end, new_start, new_end = ranges.pop()
+        while (
+            old_start < old_end
+            and new_start < new_end
+            and old[old_start] == new[new_start]
+        ):
+            old_start += 1
+            new_start += 1
+        while (
+            old_end > old_start
+            and new_end > new_start
+            and old[old_end - 1] == new[new_end - 1]
+        ):
+            old_end -= 1
+            new_end -= 1
+        if old_start == old_end or new_start == new_end:
+            _replace(ops, old, new, old_start, old_end, new_start, new_end)
+            continue
+
+        anchors = _longest_increasing(
+            _unique_pairs(old, new, old_start, old_end, new_start, new_end)
+        )
+        if not anchors:
+            _match_in_order(ops, old, new, old_start, old_end, new_start, new_end)
+            continue
+
+        gaps = []
+        for old_index, new_index in anchors:
+            gaps.append((old_start, old_index, new_start, new_index))
+            old_start, new_start = old_index + 1, new_index + 1
+        gaps.append((old_start, old_end, new_start, new_end))
+        ranges.extend(reversed(gaps))
+
+    return ops
+
+
+def _unique_pairs(
+    old: list[list[float]],
+    new: list[list[float]],
+    old_start: int,
+    old_end: int,
+    new_start: int,
+    new_end: int,
+) -> list[tuple[int, int]]:
+    """
+    Find the waypoints that appear exactly once in both ranges.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        Their positions in `old` and `new`, in the order they appear in `new`.
+    """
+
+    counts: dict[tuple[float, ...], list[int]] = dict()
+    for i in range(old_start, old_end):
+        entry = counts.setdefault(tuple(old[i]), [0, 0, i])
+        entry[0] += 1
+    for i in range(new_start, new_end):
+        entry = counts.get(tuple(new[i]))
+        if entry is not None:
+            entry[1] += 1
+
+    return [
+        (counts[key][2], i)
+        for i in range(new_start, new_end)
+        if (key := tuple(new[i])) in counts and counts[key][:2] == [1, 1]
+    ]
+
+
+def _longest_increasing(pairs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Find the longest run of pairs whose `old` positions increase, in O(n log n).
+
+    Parameters
+    ----------
+    pairs
+        Positions in `old` and `new`, ordered by the position in `new`.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        The longest subsequence of `pairs` that is also ordered by the position in `old`.
+    """
+
+    # `tails[k]` is the index into `pairs` of the smallest old position that ends a run of length `k + 1`
+    tails: list[int] = []
+    tail_positions: list[int] = []
+    previous = [-1] * len(pairs)
+    for i, (old_index, _) in enumerate(pairs):
+        k = bisect.bisect_left(tail_positions, old_index)
+        if k:
+            previous[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_positions.append(old_index)
+        else:
+            tails[k] = i
+            tail_positions[k] = old_index
+
+    run: list[tuple[int, int]] = []
+    i = tails[-1] if tails else -1
+    while i != -1:
+        run.append(pairs[i])
+        i = previous[i]
+    run.reverse()
+    return run
+
+
+def _match_in_order(
+    ops: list[WaypointOp],
+    old: list[list[float]],
+    new: list[list[float]],
+    old_start: int,
+    old_end: int,
+    new_start: int,
+    new_end: int,
+) -> None:
+    """Diff two ranges by matching each waypoint of `new` to the next equal waypoint of `old`."""
+
+    positions: dict[tuple[float, ...], list[int]] = dict()
+    for i in range(old_start, old_end):
+        positions.setdefault(tuple(old[i]), []).append(i)
+
+    old_index, new_gap_start = old_start, new_start
+    for new_index in range(new_start, new_end):
+        candidates = positions.get(tuple(new[new_index]))
+        if not candidates:
+            continue
+        match = bisect.bisect_left(candidates, old_index)
+        if match == len(candidates):
+            continue
+        _replace(ops, old, new, old_index, candidates[match], new_gap_start, new_index)
+        old_index, new_gap_start = candidates[match] + 1, new_index + 1
+    _replace(ops, old, new, old_index, old_end, new_gap_start, new_end)
+
+
+def _replace(
+    ops: list[WaypointOp],
+    old: list[list[float]],
+    new: list[list[float]],
+    old_start: int,
+    old_end: int,
+    new_start: int,
+    new_end: int,
+) -> None:
+    """Add the operations that replace `old[old_start:old_end]` with `new[new_start:new_end]`."""
+
+    # `new_start` is also the position in the partly updated list, since everything before it matches `new`
+    modified = min(old_end - old_start, new_end - new_start)
+    if modified:
+        ops.append(
+            WaypointOp("modify", new_start, new[new_start : new_start + modified])
+        )
+    if new_end - new_start > modified:
+        ops.append(
+            WaypointOp(
+                "insert", new_start + modified, new[new_start + modified : new_end]
+            )
+        )
+    elif old_end - old_start > modified:
+        ops.append(
+            WaypointOp(
+                "delete", new_start + modified, old[old_start + modified : old_end]
+            )
+        )
+
+
+def apply_ops(waypoints: list[list[float]], ops: list[WaypointOp]) -> list[list[float]]:
+    """
+    Apply operations from `diff_waypoints` to a waypoint list.
+
+    Parameters
+    ----------
+    waypoints
+        The waypoints the operations were computed from. Not modified.
+    ops
+        The operations to apply.
+
+    Returns
+    -------
+    list[list[float]]
+        A new list with the operations applied.
+    """
+
+    result = list(waypoints)
+    for op in ops:
+        if op.kind == "delete":
+            del result[op.index : op.index + len(op.waypoints)]
+        elif op.kind == "insert":
+            result[op.index : op.index] = op.waypoints
+        else:
+            result[op.index : op.index + len(op.waypoints)] = op.waypoints
+    return result
+
+
+class WaypointDiffer:
+    """
+    Tracks the last waypoint list it was given and reports how each new list differs from it.
+
+    Every list is fingerprinted first, so lists identical to the previous one are skipped
+    without being compared waypoint by waypoint.
+
+    Attributes
+    ----------
+    waypoints : `list[list[float]]`
+        The last waypoint list passed to `update`.
+    lists_seen : `int`
+        Number of lists passed to `update`.
+    lists_unchanged : `int`
+        Number of lists that had the same fingerprint as the previous one.
+    ops_emitted : `int`
+        Number of operations returned by `update`.
+    """
+
+    def __init__(self) -> None:
+        self.waypoints: list[list[float]] = list()
+        self.lists_seen = 0
+        self.lists_unchanged = 0
+        self.ops_emitted = 0
+        self._fingerprint = fingerprint(self.waypoints)
+
+    def update(self, waypoints: list[list[float]]) -> Optional[list[WaypointOp]]:
+        """
+        Compare a waypoint list to the previous one.
+
+        Parameters
+        ----------
+        waypoints
+            The new waypoints, each a list of `[latitude, longitude]`.
+
+        Returns
+        -------
+        Optional[list[WaypointOp]]
+            The operations that turn the previous list into `waypoints`, or `None` if nothing changed.
+        """
+
+        self.lists_seen += 1
+        new_fingerprint = fingerprint(waypoints)
+        if new_fingerprint == self._fingerprint:
+            self.lists_unchanged += 1
+            return None
+
+        ops = diff_waypoints(self.waypoints, waypoints)
+        self.waypoints = waypoints
+        self._fingerprint = new_fingerprint
+        self.ops_emitted += len(ops)
+        return ops
@@ -0,0 +1,145 @@
+"""
+Compare updating the waypoint table from diffs against rebuilding it, on a large route.
+
+    python src/waypoint_diff_benchmark.py --waypoints 10000 --edits 200
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import constants
+from waypoint_diff import WaypointDiffer
+
+# no window is shown, so this also runs without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+
+
+def make_route(count: int) -> list[list[float]]:
+    """
+    Make a route by repeating `big_waypoints.json`, shifted a little each time so no waypoint repeats.
+
+    Parameters
+    ----------
+    count
+        Number of waypoints in the route.
+
+    Returns
+    -------
+    list[list[float]]
+        The waypoints, each a list of `[latitude, longitude]`.
+    """
+
+    with open(os.path.join(constants.ASSETS_DIR, "big_waypoints.json")) as f:
+        base: list[list[float]] = json.load(f)
+    return [
+        [base[i % len(base)][0] + i // len(base) * 1e-3, base[i % len(base)][1]]
+        for i in range(count)
+    ]
+
+
+def make_edits(route: list[list[float]], count: int) -> list[list[list[float]]]:
+    """
+    Make a sequence of waypoint lists, each a single random edit of the one before.
+
+    Parameters
+    ----------
+    route
+        The starting waypoints.
+    count
+        Number of edits.
+
+    Returns
+    -------
+    list[list[list[float]]]
+        The waypoint list after each edit.
+    """
+
+    rng = random.Random(0)
+    lists = []
+    for _ in range(count):
+        route = route.copy()
+        kind = rng.choice(["append", "insert", "move", "delete"])
+        waypoint = [rng.uniform(-1e-3, 1e-3), rng.uniform(-1e-3, 1e-3)]
+        if kind == "append":
+            route.append(waypoint)
+        elif kind == "insert":
+            route.insert(rng.randrange(len(route)), waypoint)
+        elif kind == "move":
+            route[rng.randrange(len(route))] = waypoint
+        else:
+            del route[rng.randrange(len(route))]
+        lists.append(route)
+    return lists
+
+
+def rebuild_table(table: QTableWidget, waypoints: list[list[float]]) -> None:
+    """Fill a `QTableWidget` from scratch, the way the waypoint table used to be updated."""
+
+    table.clear()
+    table.setRowCount(0)
+    table.setColumnCount(2)
+    table.setHorizontalHeaderLabels(["Latitude", "Longitude"])
+    for waypoint in waypoints:
+        table.insertRow(table.rowCount())
+        for i, coord in enumerate(waypoint):
+            item = QTableWidgetItem(f"{coord:.13f}")
+            item.setFlags(Qt.ItemFlag.ItemIsEnabled)
+            table.setItem(table.rowCount() - 1, i, item)
+    table.resizeColumnsToContents()
+    table.resizeRowsToContents()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--waypoints", type=int, default=10000)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument(
+        "--rebuild-edits",
+        type=int,
+        default=5,
+        help="edits to time the full rebuild on, it is slow on large routes",
+    )
+    args = parser.parse_args()
+
+    app = QApplication([])
+    from widgets.waypoint_table import WaypointTableView
+
+    route = make_route(args.waypoints)
+    edits = make_edits(route, args.edits)
+
+    view = WaypointTableView()
+    view.resize(300, 600)
+    view.show()
+    differ = WaypointDiffer()
+    view.model().apply_ops(differ.update(route))
+    app.processEvents()
+
+    start = time.perf_counter()
+    for waypoints in edits:
+        view.model().apply_ops(differ.update(waypoints))
+        app.processEvents()
+    diff_ms = 1000 * (time.perf_counter() - start) / len(edits)
+
+    start = time.perf_counter()
+    for _ in range(len(edits)):
+        differ.update(edits[-1])
+    unchanged_ms = 1000 * (time.perf_counter() - start) / len(edits)
+
+    table = QTableWidget()
+    table.resize(300, 600)
+    table.show()
+    start = time.perf_counter()
+    for waypoints in edits[: args.rebuild_edits]:
+        rebuild_table(table, waypoints)
+        app.processEvents()
+    rebuild_ms = 1000 * (time.perf_counter() - start) / args.rebuild_edits
+
+    print(f"{args.waypoints} waypoints, {len(edits)} single waypoint edits")
+    print(f"{'diff':>10}: {diff_ms:.2f} ms per edit, {differ.ops_emitted} operations")
+    print(f"{'unchanged':>10}: {unchanged_ms:.2f} ms per list")
+    print(f"{'rebuild':>10}: {rebuild_ms:.2f} ms per edit")
@@ -1,22 +1,53 @@
+import time
+import base64
 import constants
+import camera_server
 import thread_classes
 import json
+from camera_server import CameraFrame
+from camera_recorder import CameraRecorder, CameraRecording
+from widgets.camera_widget.camera_view import CameraImageView
 
 from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtWidgets import QWidget, QGridLayout, QHBoxLayout, QPushButton
+from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import (
+    QApplication,
+    QLabel,
+    QWidget,
+    QGridLayout,
+    QHBoxLayout,
+    QPushButton,
+    QSlider,
+)
+from typing import Optional
 
 
 class CameraWidget(QWidget):
     """
-    A widget to display a camera feed using QWebEngineView.
+    A widget to display a camera feed.
+
+    In `"native"` render mode frames are decoded and scaled on the camera worker thread and painted
+    by a `CameraImageView`. In `"web"` render mode they are shown in a QWebEngineView: frames are served
+    to the web view as JPEG files by a local camera server, so only the frame number is passed through `runJavaScript`.
+    If the camera server could not be started, frames are passed as base64 instead.
+
+    New frames are recorded by a `CameraRecorder`, and the scrub bar below the controls shows
+    any recorded frame until "Live" is clicked.
 
     Inherits
     -------
     `QWidget`
+
+    Parameters
+    ----------
+    render_mode
+        How frames are shown, see `constants.CAMERA_RENDER_MODE`.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, render_mode: str = constants.CAMERA_RENDER_MODE) -> None:
         super().__init__()
+        self.render_mode = render_mode
         self.main_layout = QGridLayout()
 
         self.controls_layout = QHBoxLayout()
@@ -24,38 +55,96 @@ class CameraWidget(QWidget):
         self.pause_button = QPushButton("Pause")
         self.pause_button.clicked.connect(self.pause_timer)
         self.is_paused = True
-        self.paused_icon_base64 = open(
-            constants.ASSETS_DIR / "paused-icon-base64.txt"
-        ).read()
+        with open(constants.ASSETS_DIR / "paused-icon.jpg", "rb") as f:
+            self.paused_icon = f.read()
         self.pause_button.setDisabled(not self.is_paused)
 
         self.run_button = QPushButton("Run")
         self.run_button.clicked.connect(self.unpause_timer)
         self.is_running = False
 
+        self.staleness_label = QLabel("Paused")
+
         self.controls_layout.addWidget(self.pause_button)
         self.controls_layout.addWidget(self.run_button)
+        self.controls_layout.addWidget(self.staleness_label)
         self.main_layout.addLayout(self.controls_layout, 1, 0)
 
+        self.scrub_layout = QHBoxLayout()
+        self.reviewing = False
+        self.review_position: Optional[int] = None
+
+        self.go_live_button = QPushButton("Live")
+        self.go_live_button.clicked.connect(self.go_live)
+        self.go_live_button.setDisabled(True)
+
+        self.scrub_position_label = QLabel("--:--:--")
+        self.scrub_slider = QSlider(Qt.Orientation.Horizontal)
+        self.scrub_slider.setDisabled(True)
+        self.scrub_slider.valueChanged.connect(self.scrub)
+
+        self.scrub_layout.addWidget(self.go_live_button)
+        self.scrub_layout.addWidget(self.scrub_position_label)
+        self.scrub_layout.addWidget(self.scrub_slider)
+        self.main_layout.addLayout(self.scrub_layout, 2, 0)
+
         self.web_view_layout = QHBoxLayout()
 
-        self.web_view = QWebEngineView()
-        self.web_view.setHtml(constants.HTML_CAMERA)
+        # the feed starts paused, the worker thread waits until `unpause_timer` is called
+        self.image_fetcher = thread_classes.ImageFetcher(
+            decode_images=render_mode == "native"
+        )
+        self.image_fetcher.image_fetched.connect(self.update_camera_feed)
+        self.image_fetcher.image_decoded.connect(self.update_camera_image)
+
+        if render_mode == "native":
+            self.web_view = None
+            self.camera_server = None
+            self.image_view = CameraImageView()
+            self.image_view.resized.connect(self.image_fetcher.set_target_size)
+            self.paused_image = QImage.fromData(self.paused_icon)
+            self.web_view_layout.addWidget(self.image_view)
+        else:
+            self.image_view = None
+            self.web_view = QWebEngineView()
+            self.web_view.setHtml(constants.HTML_CAMERA)
+            self.frame = CameraFrame()
+            self.camera_server = camera_server.start_server(
+                self.frame, constants.CAMERA_SERVER_PORT
+            )
+            self.web_view_layout.addWidget(self.web_view)
 
-        self.web_view_layout.addWidget(self.web_view)
         self.main_layout.addLayout(self.web_view_layout, 0, 0)
         self.setLayout(self.main_layout)
 
-        self.image_fetcher = thread_classes.ImageFetcher()
-        self.image_fetcher.image_fetched.connect(self.update_camera_feed)
+        if constants.CAMERA_RECORDER_ENABLED:
+            self.recorder = CameraRecorder()
+            self.recorder.start()
+            self.image_fetcher.image_consumers.append(self.recorder.record)
+            self.recording = CameraRecording(self.recorder.session_dir)
+        else:
+            self.recorder = None
+            self.recording = None
+
+        self.image_fetcher.pause()
+        self.image_fetcher.start()
+        QApplication.instance().aboutToQuit.connect(self.image_fetcher.stop)
+        QApplication.instance().aboutToQuit.connect(self.image_fetcher.print_stats)
+        QApplication.instance().aboutToQuit.connect(self.stop_camera_server)
+        if self.recorder is not None:
+            QApplication.instance().aboutToQuit.connect(self.recorder.stop)
 
-        self.timer = constants.SUPER_SLOW_TIMER
-        self.timer.timeout.connect(self.image_fetcher.get_image)
+        self.staleness_timer = QTimer(self)
+        self.staleness_timer.setInterval(constants.CAMERA_STALENESS_UPDATE_INTERVAL)
+        self.staleness_timer.timeout.connect(self.update_staleness)
+        self.staleness_timer.timeout.connect(self.update_scrub_range)
 
     def unpause_timer(self) -> None:
-        """Unpause the timer that fetches images from the camera."""
+        """Resume fetching images from the camera."""
 
-        self.timer.start()
+        self.image_fetcher.resume()
+        self.staleness_timer.start()
+        self.update_staleness()
         self.is_running = True
         self.is_paused = False
         self.run_button.setDisabled(self.is_running)
@@ -63,33 +152,167 @@ class CameraWidget(QWidget):
         print("Unpaused camera feed timer.")
 
     def pause_timer(self) -> None:
-        """Pause the timer that fetches images from the camera."""
+        """Pause fetching images from the camera and show the paused image."""
 
-        self.timer.stop()
+        self.image_fetcher.pause()
+        self.staleness_timer.stop()
+        self.staleness_label.setText("Paused")
+        self.update_scrub_range()
         self.is_running = False
         self.is_paused = True
-        js_image_str = json.dumps(self.paused_icon_base64)
-        self.web_view.page().runJavaScript(f"setBase64Image({js_image_str});")
+        self.show_paused_image()
         self.pause_button.setDisabled(self.is_paused)
         self.run_button.setDisabled(self.is_running)
         print("Paused camera feed timer.")
 
-    def update_camera_feed_starter(self) -> None:
-        """Start the image fetcher thread to update the camera feed if it is not already running."""
+    def update_camera_feed(self, image: bytes) -> None:
+        """
+        Update the camera feed with a new image.
+
+        Parameters
+        ----------
+        image
+            The JPEG file of the image to display.
+        """
 
-        if not self.image_fetcher.isRunning():
-            self.image_fetcher.start()
+        if not self.reviewing:
+            self.show_jpeg(image)
 
-    def update_camera_feed(self, base64_encoded_image: str) -> None:
+    def show_jpeg(self, image: bytes) -> None:
         """
-        Update the camera feed with a new image.
+        Show a JPEG file in the web view.
 
         Parameters
         ----------
-        base64_encoded_image
-            The base64 encoded string of the image to display.
+        image
+            The JPEG file.
         """
 
-        js_image_str = json.dumps(base64_encoded_image)
+        number = self.frame.set(image)
+        if self.camera_server is not None:
+            self.web_view.page().runJavaScript(f"setFrame({number});")
+        else:
+            js_image_str = json.dumps(base64.b64encode(image).decode("utf-8"))
+            self.web_view.page().runJavaScript(f"setBase64Image({js_image_str});")
+
+    def update_camera_image(self, image: QImage) -> None:
+        """
+        Update the camera feed with a decoded image, in native render mode.
+
+        Parameters
+        ----------
+        image
+            The image to display, usually already scaled to the size of the view.
+        """
+
+        if not self.reviewing:
+            self.image_view.set_image(image)
+
+    def update_scrub_range(self) -> None:
+        """
+        Extend the scrub bar to the frames recorded since it was last updated.
+
+        If the recording started over because old frames were deleted, the bar is rescaled to the frames
+        that are left and a recorded frame being shown is looked up again by its time.
+        """
+
+        if self.recording is None:
+            return
+
+        start_overs = self.recording.start_overs
+        review_time = (
+            self.recording.times[self.review_position]
+            if self.review_position is not None
+            else None
+        )
+        added = self.recording.refresh()
+        started_over = self.recording.start_overs != start_overs
+        if not added and not started_over:
+            return
+
+        times = self.recording.times
+        if started_over:
+            # positions changed, and `scrub` does nothing when the position is the same as before
+            self.review_position = None
+            if not len(times):
+                self.scrub_slider.setDisabled(True)
+                return
+
+        self.scrub_slider.blockSignals(True)
+        self.scrub_slider.setRange(0, int(1000 * (times[-1] - times[0])))
+        if not self.reviewing:
+            self.scrub_slider.setValue(self.scrub_slider.maximum())
+        elif review_time is not None:
+            self.scrub_slider.setValue(max(0, int(1000 * (review_time - times[0]))))
+        self.scrub_slider.blockSignals(False)
+        self.scrub_slider.setDisabled(False)
+        if self.reviewing and started_over:
+            self.scrub(self.scrub_slider.value())
+
+    def scrub(self, value: int) -> None:
+        """
+        Show the recorded frame at the position of the scrub bar.
+
+        Parameters
+        ----------
+        value
+            Milliseconds since the first recorded frame.
+        """
+
+        position = self.recording.find(self.recording.times[0] + value / 1000)
+        self.reviewing = True
+        self.go_live_button.setDisabled(False)
+        if position is None or position == self.review_position:
+            return
+
+        image = self.recording.frame(position)
+        if image is None:
+            return
+        self.review_position = position
+        self.scrub_position_label.setText(
+            time.strftime("%H:%M:%S", time.localtime(self.recording.times[position]))
+        )
+        if self.image_view is not None:
+            size = self.image_view.size()
+            self.image_view.set_image(
+                thread_classes.decode_image(image, (size.width(), size.height()))
+            )
+        else:
+            self.show_jpeg(image)
+
+    def go_live(self) -> None:
+        """Stop showing recorded frames and go back to the live feed."""
+
+        self.reviewing = False
+        self.review_position = None
+        self.go_live_button.setDisabled(True)
+        self.scrub_position_label.setText("--:--:--")
+        self.scrub_slider.blockSignals(True)
+        self.scrub_slider.setValue(self.scrub_slider.maximum())
+        self.scrub_slider.blockSignals(False)
+        if self.is_paused:
+            self.show_paused_image()
+
+    def show_paused_image(self) -> None:
+        """Show the paused image, unless a recorded frame is being shown."""
+
+        if self.image_view is not None:
+            self.update_camera_image(self.paused_image)
+        else:
+            self.update_camera_feed(self.paused_icon)
+
+    def update_staleness(self) -> None:
+        """Show how long ago the camera sent a frame that differed from the one before."""
+
+        last_new_frame_at = self.image_fetcher.last_new_frame_at
+        if last_new_frame_at is None:
+            self.staleness_label.setText("No frames yet")
+        else:
+            age = time.monotonic() - last_new_frame_at
+            self.staleness_label.setText(f"Last new frame {age:.0f} s ago")
+
+    def stop_camera_server(self) -> None:
+        """Stop serving camera frames to the web view."""
 
-        self.web_view.page().runJavaScript(f"setBase64Image({js_image_str});")
+        if self.camera_server is not None:
+            self.camera_server.shutdown()
@@ -0,0 +1,90 @@
+import time
+from PyQt5.QtCore import QRect, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QPaintEvent, QResizeEvent
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+from typing import Optional
+
+
+class CameraImageView(QWidget):
+    """
+    Paints the latest camera frame, scaled to fit the widget and centered.
+
+    Frames are expected to be decoded, and usually already scaled to `size()`, on the camera worker thread,
+    so painting one is a single copy to the screen.
+
+    Inherits
+    -------
+    `QWidget`
+
+    Attributes
+    ----------
+    resized : `pyqtSignal`
+        Emits the new size of the widget whenever it changes.
+    image : `Optional[QImage]`
+        The frame being shown, `None` until the first frame is set.
+    frames_painted : `int`
+        Number of times a frame was painted.
+    paint_seconds : `float`
+        Time spent painting frames.
+    """
+
+    resized = pyqtSignal(QSize)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.image: Optional[QImage] = None
+        self.frames_painted = 0
+        self.paint_seconds = 0.0
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+    def set_image(self, image: QImage) -> None:
+        """
+        Show a new frame.
+
+        Parameters
+        ----------
+        image
+            The frame.
+        """
+
+        self.image = image
+        self.update()
+
+    def target_rect(self, image_size: QSize) -> QRect:
+        """
+        Get where an image is painted in the widget.
+
+        Parameters
+        ----------
+        image_size
+            Size of the image.
+
+        Returns
+        -------
+        QRect
+            The largest rectangle with the aspect ratio of the image that fits the widget, centered in it.
+        """
+
+        size = image_size.scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio)
+        rect = QRect(0, 0, size.width(), size.height())
+        rect.moveCenter(self.rect().center())
+        return rect
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        start = time.perf_counter()
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().window())
+        if self.image is not None and not self.image.isNull():
+            target = self.target_rect(self.image.size())
+            if target.size() != self.image.size():
+                # the frame was scaled for a different size, e.g. the widget was just resized
+                painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawImage(target, self.image)
+            self.frames_painted += 1
+        painter.end()
+        self.paint_seconds += time.perf_counter() - start
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super().resizeEvent(event)
+        self.resized.emit(event.size())
@@ -1,5 +1,6 @@
 # region imports
 import os
+import math
 import time
 import base64
 import requests
@@ -9,29 +10,50 @@ import geopy.distance
 
 import constants
 import thread_classes
+import tile_server
+from http_transport import get_transport
+from flight_recorder import FlightRecorder
+from telemetry_sources import ReplaySource
+from telemetry_frame import TelemetryFrame
+from telemetry_history import TelemetryHistory
+from track_history import TrackHistory
+from rolling_stats import RollingStats
+from limit_checker import LimitChecker
+from render_governor import RenderGovernor
+from map_assets import MapAssets
+from map_bridge import MapBridge
+from startup_timeline import get_timeline
+from tile_cache import TileCache
+from waypoint_channel import WaypointChannel, inline_qwebchannel_script
+from waypoint_diff import WaypointDiffer, WaypointOp
 from icons import get_icons
 from syntax_highlighters.json import JsonHighlighter
 from widgets.popup_edit import TextEditWindow
+from widgets.telemetry_panel import TelemetryPanel
+from widgets.waypoint_table import WaypointTableView
 
 from functools import partial
 from pathlib import PurePath
 from typing import Union, Literal, Optional, Any
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QTimer, Qt
 from PyQt5.QtGui import QIcon
+from PyQt5.QtWebChannel import QWebChannel
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtWidgets import (
+    QApplication,
     QCheckBox,
+    QComboBox,
     QGridLayout,
     QGroupBox,
     QHBoxLayout,
     QLabel,
     QLineEdit,
     QPushButton,
+    QSlider,
     QTableWidget,
     QTableWidgetItem,
     QTabWidget,
-    QTextEdit,
     QVBoxLayout,
     QWidget,
     QFileDialog,
@@ -52,19 +74,14 @@ class GroundStationWidget(QWidget):
         super().__init__()
         self.icons = get_icons()
         self.waypoints: list[list[float]] = list()
-        self.num_waypoints = 0
-        self.boat_data_averages = {
-            "vesc_data_rpm": 0.0,
-            "vesc_data_amp_hours": 0.0,
-            "vesc_data_amp_hours_charged": 0.0,
-            "vesc_data_current_to_vesc": 0.0,
-            "vesc_data_voltage_to_motor": 0.0,
-            "vesc_data_voltage_to_vesc": 0.0,
-            "vesc_data_wattage_to_motor": 0.0,
-            "vesc_data_motor_temperature": 0.0,
-        }
+        self.waypoint_differ = WaypointDiffer()
+        self.telemetry_history = TelemetryHistory()
+        self.track_history = TrackHistory()
+        self.map_loaded = False
+        self.rolling_stats = RollingStats(self.telemetry_history)
+        self.limit_checker = LimitChecker(self.telemetry_history)
         self.buoys: dict[dict[str, float]] = dict()
-        self.boat_data: dict[str, Any] = dict()
+        self.boat_data: Optional[TelemetryFrame] = None
         self.autopilot_parameters: dict[str, Any] = dict()
         self.telemetry_data_limits: dict[str, float] = dict()
 
@@ -96,9 +113,46 @@ class GroundStationWidget(QWidget):
         # region tab1: Telemetry data
         self.left_tab1_label = QLabel("Telemetry Data")
         self.left_tab1_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_tab1_text_section = QTextEdit()
-        self.left_tab1_text_section.setReadOnly(True)
-        self.left_tab1_text_section.setText("Awaiting telemetry data...")
+        self.telemetry_panel = TelemetryPanel(
+            {
+                "Boat Info": [
+                    ("position", "Position"),
+                    ("state", "State"),
+                    ("speed", "Speed"),
+                    ("distance_to_next_waypoint", "Distance To Next WP"),
+                    ("bearing", "Bearing"),
+                    ("heading", "Heading"),
+                    ("true_wind_speed", "True Wind Speed"),
+                    ("true_wind_angle", "True Wind Angle"),
+                    ("apparent_wind_speed", "Apparent Wind Speed"),
+                    ("apparent_wind_angle", "Apparent Wind Angle"),
+                    ("sail_angle", "Sail Angle"),
+                    ("rudder_angle", "Rudder Angle"),
+                    ("current_waypoint_index", "Current Waypoint Index"),
+                    ("current_route", "Current Route"),
+                ],
+                "VESC Data": [
+                    ("vesc_data_rpm", "RPM"),
+                    ("vesc_data_duty_cycle", "Duty Cycle"),
+                    ("vesc_data_amp_hours", "Amp Hours"),
+                    ("vesc_data_current_to_vesc", "Current to VESC"),
+                    ("vesc_data_voltage_to_vesc", "Voltage to VESC"),
+                    ("vesc_data_wattage_to_motor", "Wattage to Motor"),
+                    ("vesc_data_voltage_to_motor", "Voltage to Motor"),
+                    (
+                        "vesc_data_time_since_vesc_startup_in_ms",
+                        "Time Since VESC Startup",
+                    ),
+                    ("vesc_data_motor_temperature", "Motor Temperature"),
+                ],
+            }
+        )
+        self.telemetry_panel.set_section_title(
+            "VESC Data",
+            f"VESC Data ({constants.ROLLING_STATS_DISPLAY_WINDOW} mean ± std [min, max], EWMA)",
+        )
+        self.limit_violations_label = QLabel("No limits loaded")
+        self.limit_violations_label.setWordWrap(True)
 
         self.save_boat_data_button = self.pushbutton_maker(
             "Save Boat Data to File",
@@ -145,9 +199,47 @@ class GroundStationWidget(QWidget):
         self.left_tab1_button_layout.addLayout(self.side_buttons_layout, 1, 1)
         self.left_tab1_button_groupbox.setLayout(self.left_tab1_button_layout)
 
+        self.replay_groupbox = QGroupBox("Replay")
+        self.replay_layout = QGridLayout()
+
+        self.load_replay_button = self.pushbutton_maker(
+            "Load Replay",
+            self.icons.replay,
+            self.load_replay,
+            self.left_width // 2,
+            25,
+        )
+
+        self.go_live_button = self.pushbutton_maker(
+            "Go Live",
+            self.icons.live,
+            self.go_live,
+            self.left_width // 2,
+            25,
+            False,
+        )
+
+        self.replay_speed_combobox = QComboBox()
+        self.replay_speed_combobox.addItems(constants.REPLAY_SPEEDS.keys())
+        self.replay_speed_combobox.currentTextChanged.connect(self.set_replay_speed)
+
+        self.replay_position_label = QLabel("--:--:--")
+        self.replay_seek_slider = QSlider(Qt.Orientation.Horizontal)
+        self.replay_seek_slider.setDisabled(True)
+        self.replay_seek_slider.sliderReleased.connect(self.seek_replay)
+
+        self.replay_layout.addWidget(self.load_replay_button, 0, 0)
+        self.replay_layout.addWidget(self.go_live_button, 0, 1)
+        self.replay_layout.addWidget(self.replay_speed_combobox, 1, 0)
+        self.replay_layout.addWidget(self.replay_position_label, 1, 1)
+        self.replay_layout.addWidget(self.replay_seek_slider, 2, 0, 1, 2)
+        self.replay_groupbox.setLayout(self.replay_layout)
+
         self.left_tab1_layout.addWidget(self.left_tab1_label)
-        self.left_tab1_layout.addWidget(self.left_tab1_text_section)
+        self.left_tab1_layout.addWidget(self.telemetry_panel)
+        self.left_tab1_layout.addWidget(self.limit_violations_label)
         self.left_tab1_layout.addWidget(self.left_tab1_button_groupbox)
+        self.left_tab1_layout.addWidget(self.replay_groupbox)
         # endregion tab1: Telemetry data
 
         # region tab2: Autopilot parameter control
@@ -307,10 +399,23 @@ class GroundStationWidget(QWidget):
         # endregion left section
 
         # region middle section
+        self.tile_cache = TileCache()
+        self.map_assets = MapAssets()
+        self.tile_server = tile_server.start_server(
+            self.tile_cache, self.map_assets, constants.TILE_SERVER_PORT
+        )
         self.browser = QWebEngineView()
-        self.browser.setHtml(constants.HTML_MAP)
+        if constants.WAYPOINT_SYNC_MODE == "channel":
+            # must be set before the map loads so that `qt.webChannelTransport` exists in the page
+            self.waypoint_channel = WaypointChannel()
+            self.web_channel = QWebChannel(self.browser.page())
+            self.web_channel.registerObject("waypoints", self.waypoint_channel)
+            self.browser.page().setWebChannel(self.web_channel)
+        self.browser.loadFinished.connect(self.map_load_finished)
+        self.map_load_started: Optional[float] = None
         self.browser.setMinimumWidth(700)
         self.browser.setMinimumHeight(700)
+        self.map_bridge = MapBridge(self.browser)
         self.middle_layout.addWidget(self.browser, 0, 1)
         self.main_layout.addLayout(self.middle_layout, 0, 1)
         # endregion middle section
@@ -321,7 +426,7 @@ class GroundStationWidget(QWidget):
         # region tab1: waypoint data
         self.right_tab1_label = QLabel("Waypoints")
         self.right_tab1_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_tab1_table = QTableWidget()
+        self.right_tab1_table = WaypointTableView()
         self.right_tab1_table.setMinimumWidth(self.right_width)
 
         self.can_send_waypoints = True
@@ -419,25 +524,51 @@ class GroundStationWidget(QWidget):
         # endregion setup UI
 
         self.telemetry_handler = thread_classes.TelemetryUpdater()
-        self.js_waypoint_handler = thread_classes.WaypointFetcher()
-
-        # Connect signals to update UI
-        self.telemetry_handler.boat_data_fetched.connect(self.update_telemetry_display)
-        self.js_waypoint_handler.waypoints_fetched.connect(
-            self.update_waypoints_display
+        self.live_telemetry_source = self.telemetry_handler.source
+        self.replay_source: Optional[ReplaySource] = None
+        self.replay_frames_delivered_at_start = 0
+        self.telemetry_handler.frame_consumers.append(self.telemetry_history.append)
+        self.telemetry_handler.frame_consumers.append(self.track_history.append)
+        self.telemetry_handler.frame_consumers.append(self.rolling_stats.update)
+        self.telemetry_handler.frame_consumers.append(self.limit_checker.check)
+        # cleared on the telemetry thread so that no frame of the previous source is added after clearing
+        self.telemetry_handler.source_switch_consumers.append(
+            self.telemetry_history.clear
         )
+        self.telemetry_handler.source_switch_consumers.append(self.track_history.clear)
+        if constants.FLIGHT_RECORDER_ENABLED:
+            self.flight_recorder = FlightRecorder()
+            self.flight_recorder.start()
+            self.telemetry_handler.frame_consumers.append(self.record_frame)
 
-        # Slow timer
-        self.slow_timer = constants.SLOW_TIMER
-        constants.SLOW_TIMER.timeout.connect(self.update_telemetry_starter)
+        # Connect signals to update UI
+        self.render_governor = RenderGovernor(self.update_telemetry_display)
+        self.telemetry_handler.boat_data_fetched.connect(self.render_governor.submit)
 
-        # Fast timer
-        self.fast_timer = constants.FAST_TIMER
-        constants.FAST_TIMER.timeout.connect(self.js_waypoint_handler_starter)
+        if constants.WAYPOINT_SYNC_MODE == "channel":
+            self.waypoint_channel.waypoints_changed.connect(
+                self.update_waypoints_display
+            )
+        else:
+            self.js_waypoint_handler = thread_classes.WaypointFetcher()
+            self.js_waypoint_handler.waypoints_fetched.connect(
+                self.update_waypoints_display
+            )
 
-        # Start timers
-        self.fast_timer.start()
-        self.slow_timer.start()
+            # Fast timer
+            self.fast_timer = constants.FAST_TIMER
+            constants.FAST_TIMER.timeout.connect(self.js_waypoint_handler_starter)
+            self.fast_timer.start()
+
+        # Start worker threads
+        self.telemetry_handler.start()
+        QApplication.instance().aboutToQuit.connect(self.telemetry_handler.stop)
+        QApplication.instance().aboutToQuit.connect(self.telemetry_handler.print_stats)
+        QApplication.instance().aboutToQuit.connect(self.render_governor.print_stats)
+        QApplication.instance().aboutToQuit.connect(self.map_bridge.print_stats)
+        QApplication.instance().aboutToQuit.connect(self.stop_tile_server)
+        if constants.FLIGHT_RECORDER_ENABLED:
+            QApplication.instance().aboutToQuit.connect(self.flight_recorder.stop)
 
     # region button functions
     def send_waypoints(self, test: bool = False) -> None:
@@ -452,19 +583,18 @@ class GroundStationWidget(QWidget):
 
         if not test:
             try:
-                requests.post(
-                    constants.TELEMETRY_SERVER_ENDPOINTS["set_waypoints"],
+                get_transport().post(
+                    "set_waypoints",
                     json={"value": self.waypoints},
                 )
-                js_code = "map.change_color_waypoints('red')"
-                self.browser.page().runJavaScript(js_code)
+                self.map_bridge.call("change_color_waypoints", "red")
             except requests.exceptions.RequestException as e:
                 print(f"Warning: Failed to send waypoints: {e}")
                 print(f"Waypoints: {self.waypoints}")
         else:
             try:
-                requests.post(
-                    constants.TELEMETRY_SERVER_ENDPOINTS["waypoints_test"],
+                get_transport().post(
+                    "waypoints_test",
                     json={"value": self.waypoints},
                 )
             except requests.exceptions.RequestException as e:
@@ -475,21 +605,15 @@ class GroundStationWidget(QWidget):
         """Pull waypoints from the telemetry server and add them to the map."""
 
         try:
-            remote_waypoints: list[list[float]] = requests.get(
-                constants.TELEMETRY_SERVER_ENDPOINTS["get_waypoints"]
-            ).json()
+            remote_waypoints: list[list[float]] = (
+                get_transport().get("get_waypoints").json()
+            )
             if remote_waypoints:
-                existing_waypoints = self.waypoints.copy()
-                self.browser.page().runJavaScript("map.clear_waypoints()")
-                for waypoint in remote_waypoints:
-                    self.browser.page().runJavaScript(
-                        f"map.add_waypoint({waypoint[0]}, {waypoint[1]})"
-                    )
-                self.browser.page().runJavaScript("map.change_color_waypoints('red')")
-                for waypoint in existing_waypoints:
-                    self.browser.page().runJavaScript(
-                        f"map.add_waypoint({waypoint[0]}, {waypoint[1]})"
-                    )
+                # remote waypoints go before the local ones, only they are colored as remote
+                self.send_waypoint_ops_to_map(
+                    [WaypointOp("insert", 0, remote_waypoints)], color="red"
+                )
+                self.map_bridge.flush()
             else:
                 print("No waypoints found on the server.")
             self.can_pull_waypoints = False
@@ -504,9 +628,7 @@ class GroundStationWidget(QWidget):
         """Get autopilot parameters from the server."""
 
         try:
-            remote_params: dict = requests.get(
-                constants.TELEMETRY_SERVER_ENDPOINTS["get_autopilot_parameters"]
-            ).json()
+            remote_params: dict = get_transport().get("get_autopilot_parameters").json()
 
             if remote_params == {}:
                 print("Connection successful but no parameters found.")
@@ -549,8 +671,8 @@ class GroundStationWidget(QWidget):
                 "tack_distance": float(self.tack_distance_text_box.text()),
             }
 
-            requests.post(
-                constants.TELEMETRY_SERVER_ENDPOINTS["set_autopilot_parameters"],
+            get_transport().post(
+                "set_autopilot_parameters",
                 json={"value": self.autopilot_parameters},
             )
 
@@ -572,9 +694,9 @@ class GroundStationWidget(QWidget):
         """
 
         try:
-            existing_params: dict = requests.get(
-                constants.TELEMETRY_SERVER_ENDPOINTS["get_autopilot_parameters"]
-            ).json()
+            existing_params: dict = (
+                get_transport().get("get_autopilot_parameters").json()
+            )
 
             if existing_params == {}:
                 print(
@@ -583,8 +705,8 @@ class GroundStationWidget(QWidget):
 
             else:
                 existing_params[parameter] = self.autopilot_parameters[parameter]
-                requests.post(
-                    constants.TELEMETRY_SERVER_ENDPOINTS["set_autopilot_parameters"],
+                get_transport().post(
+                    "set_autopilot_parameters",
                     json={"value": existing_params},
                 )
 
@@ -606,9 +728,9 @@ class GroundStationWidget(QWidget):
         """
 
         try:
-            existing_params: dict = requests.get(
-                constants.TELEMETRY_SERVER_ENDPOINTS["get_autopilot_parameters"]
-            ).json()
+            existing_params: dict = (
+                get_transport().get("get_autopilot_parameters").json()
+            )
 
             if existing_params == {}:
                 print(
@@ -731,8 +853,8 @@ class GroundStationWidget(QWidget):
             base64_encoded_image = base64.b64encode(image).decode("utf-8")
             autopilot_parameters = self.autopilot_parameters
             autopilot_parameters["current_camera_image"] = base64_encoded_image
-            requests.post(
-                constants.TELEMETRY_SERVER_ENDPOINTS["set_autopilot_parameters"],
+            get_transport().post(
+                "set_autopilot_parameters",
                 json={"value": autopilot_parameters},
             ).json()
         except requests.exceptions.RequestException as e:
@@ -757,8 +879,9 @@ class GroundStationWidget(QWidget):
             file_path = PurePath(
                 constants.BOAT_DATA_DIR / f"boat_data_{time.time_ns()}.json"
             )
+            boat_data = self.boat_data.to_dict() if self.boat_data is not None else {}
             with open(file_path, "w") as f:
-                json.dump(self.boat_data, f, indent=4)
+                json.dump(boat_data, f, indent=4)
 
         except Exception as e:
             print(f"Error: {e}")
@@ -801,7 +924,7 @@ class GroundStationWidget(QWidget):
 
         try:
             edited_config = text
-            self.telemetry_data_limits = json.loads(edited_config)
+            self.set_boat_data_limits(json.loads(edited_config))
 
         except Exception as e:
             print(f"Error: {e}")
@@ -826,11 +949,30 @@ class GroundStationWidget(QWidget):
                     PurePath(constants.BOAT_DATA_LIMITS_DIR / "default.json")
                 ]
             with open(chosen_file[0], "r") as f:
-                self.telemetry_data_limits = json.load(f)
+                self.set_boat_data_limits(json.load(f))
 
         except Exception as e:
             print(f"Error: {e}")
 
+    def set_boat_data_limits(self, limits: dict[str, dict[str, float]]) -> None:
+        """
+        Replace the telemetry data limits and start checking incoming frames against them.
+
+        Parameters
+        ----------
+        limits
+            Lower and upper bound for each field, in the same format as the files in `boat_data_bounds`.
+
+        Raises
+        -------
+        ValueError
+            If the limits are not valid, in which case the previous limits are kept.
+        """
+
+        self.limit_checker.compile(limits)
+        self.telemetry_data_limits = limits
+        self.update_limit_violations()
+
     def save_boat_data_limits(self) -> None:
         """
         Save upper and lower bounds for some of the telemetry data.
@@ -901,15 +1043,15 @@ class GroundStationWidget(QWidget):
         self.right_tab2_table.setColumnCount(2)
         self.right_tab2_table.setHorizontalHeaderLabels(["Latitude", "Longitude"])
 
-        clear_js_buoys = "map.clear_buoys()"
-        self.browser.page().runJavaScript(clear_js_buoys)
+        self.map_bridge.call("clear_buoys")
 
         for buoy in self.buoys:
             self.right_tab2_table.insertRow(self.right_tab2_table.rowCount())
-            add_js_buoy = (
-                f"map.add_buoy({self.buoys[buoy]['lat']}, {self.buoys[buoy]['lon']})"
+            self.map_bridge.call(
+                "add_buoy",
+                float(self.buoys[buoy]["lat"]),
+                float(self.buoys[buoy]["lon"]),
             )
-            self.browser.page().runJavaScript(add_js_buoy)
             for i, coord in enumerate(["lat", "lon"]):
                 item = QTableWidgetItem(f"{float(self.buoys[buoy][coord]):.13f}")
                 item.setFlags(Qt.ItemFlag.ItemIsEnabled)
@@ -968,21 +1110,94 @@ class GroundStationWidget(QWidget):
         except Exception as e:
             print(f"Error: {e}")
 
+    def load_replay(self) -> None:
+        """
+        Replay a recorded telemetry session instead of live telemetry.
+
+        Sessions are directories in the `boat_data` directory named `session_<timestamp>`,
+        see `flight_recorder.FlightRecorder`.
+        """
+
+        try:
+            chosen_dir = QFileDialog.getExistingDirectory(
+                self,
+                "Select Recorded Session",
+                constants.BOAT_DATA_DIR.as_posix(),
+            )
+            if chosen_dir == "":
+                return
+
+            self.replay_source = ReplaySource(
+                PurePath(chosen_dir),
+                constants.REPLAY_SPEEDS[self.replay_speed_combobox.currentText()],
+                on_finished=self.replay_finished,
+            )
+            self.replay_frames_delivered_at_start = (
+                self.telemetry_handler.frames_delivered
+            )
+            self.telemetry_handler.set_source(self.replay_source)
+
+            duration = self.replay_source.end_time - self.replay_source.start_time
+            self.replay_seek_slider.setRange(0, int(duration))
+            self.replay_seek_slider.setValue(0)
+            self.replay_seek_slider.setDisabled(False)
+            self.go_live_button.setDisabled(False)
+            print(f"Replaying {chosen_dir} ({duration:.0f} seconds).")
+
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+
+    def go_live(self) -> None:
+        """Stop replaying and go back to live telemetry."""
+
+        self.telemetry_handler.set_source(self.live_telemetry_source)
+        self.replay_source = None
+        self.replay_seek_slider.setDisabled(True)
+        self.go_live_button.setDisabled(True)
+        self.replay_position_label.setText("--:--:--")
+
+    def set_replay_speed(self, speed: str) -> None:
+        """
+        Change the replay speed.
+
+        Parameters
+        ----------
+        speed
+            One of the keys in `constants.REPLAY_SPEEDS`.
+        """
+
+        if self.replay_source is not None:
+            self.replay_source.speed = constants.REPLAY_SPEEDS[speed]
+            self.replay_frames_delivered_at_start = (
+                self.telemetry_handler.frames_delivered
+            )
+            self.telemetry_handler.restart()
+
+    def seek_replay(self) -> None:
+        """Jump to the position of the replay seek slider."""
+
+        if self.replay_source is not None:
+            self.replay_source.seek(
+                self.replay_source.start_time + self.replay_seek_slider.value()
+            )
+            self.replay_frames_delivered_at_start = (
+                self.telemetry_handler.frames_delivered
+            )
+            self.telemetry_handler.restart()
+
     def clear_waypoints(self) -> None:
         """Clear waypoints from the table."""
 
         self.can_reset_waypoints = False
         self.can_pull_waypoints = True
         self.pull_waypoints_button.setDisabled(not self.can_pull_waypoints)
-        js_code = "map.clear_waypoints()"
-        self.browser.page().runJavaScript(js_code)
+        self.map_bridge.call("clear_waypoints")
 
     def zoom_to_boat(self) -> None:
         """Center the view on the boat's position."""
 
-        if isinstance(self.boat_data.get("position"), list):
-            js_code = "map.focus_map_on_boat()"
-            self.browser.page().runJavaScript(js_code)
+        if self.boat_data is not None and self.boat_data.position is not None:
+            self.map_bridge.call("focus_map_on_boat")
 
         else:
             print("Warning: Boat position not available.")
@@ -996,29 +1211,182 @@ class GroundStationWidget(QWidget):
         if not self.js_waypoint_handler.isRunning():
             self.js_waypoint_handler.start()
 
-    def update_telemetry_starter(self) -> None:
-        """Starts the telemetry handler thread."""
+    def stop_tile_server(self) -> None:
+        """Stop serving map tiles and close the tile cache."""
+
+        if self.tile_server is not None:
+            self.tile_server.shutdown()
+        self.tile_cache.print_stats()
+        self.tile_cache.close()
+
+    def record_frame(self, boat_data: TelemetryFrame) -> None:
+        """
+        Pass a frame to the flight recorder unless it is being replayed. Runs on the telemetry thread.
+
+        Parameters
+        ----------
+        boat_data
+            The frame received by the telemetry thread.
+        """
+
+        if self.telemetry_handler.source.live:
+            self.flight_recorder.record(boat_data)
+
+    def replay_finished(self, frames_replayed: int, elapsed: float) -> None:
+        """
+        Print how fast a replay ran. Runs on the telemetry thread.
+
+        When replaying as fast as possible this is a throughput benchmark of the whole display pipeline:
+        frames replayed per second is how fast frames can be read from disk, frames delivered per second is
+        how fast the main thread could keep up with them. Rendering is capped separately by `RenderGovernor`.
 
-        if not self.telemetry_handler.isRunning():
-            self.telemetry_handler.start()
+        Parameters
+        ----------
+        frames_replayed
+            Number of frames replayed since the replay was last started.
+        elapsed
+            Seconds since the replay was last started.
+        """
+
+        elapsed = max(elapsed, 1e-9)
+        frames_delivered = (
+            self.telemetry_handler.frames_delivered
+            - self.replay_frames_delivered_at_start
+        )
+        print(
+            f"Replay finished: {frames_replayed} frames in {elapsed:.2f} seconds "
+            f"({frames_replayed / elapsed:.0f} frames/s), {frames_delivered} delivered "
+            f"({frames_delivered / elapsed:.0f} frames/s)"
+        )
+
+    def update_replay_position(self) -> None:
+        """Move the replay seek slider and position label to the frame being replayed."""
+
+        if (
+            self.replay_source is not None
+            and not self.replay_seek_slider.isSliderDown()
+        ):
+            position = min(self.replay_source.position, self.replay_source.end_time)
+            self.replay_seek_slider.setValue(
+                int(position - self.replay_source.start_time)
+            )
+            self.replay_position_label.setText(
+                time.strftime("%H:%M:%S", time.localtime(position))
+            )
+
+    def update_limit_violations(self) -> None:
+        """Show how many frames were out of bounds and highlight the fields that are out of bounds right now."""
+
+        violations = self.limit_checker.violations()
+        highlighted = set(violations)
+        if {"latitude", "longitude"} & highlighted:
+            highlighted.add("position")
+        self.telemetry_panel.set_highlighted(highlighted)
+
+        if not self.limit_checker.fields:
+            text = "No limits loaded"
+        else:
+            lines = [
+                f"Limit violations: {self.limit_checker.frames_in_violation} of "
+                f"{self.limit_checker.frames_checked} frames"
+            ]
+            for field, violation in violations.items():
+                since = time.strftime("%H:%M:%S", time.localtime(violation["since"]))
+                lines.append(
+                    f"{field} out of bounds since {since} ({violation['count']} frames)"
+                )
+            text = "\n".join(lines)
+
+        style = f"color: {constants.RED.name()}" if violations else ""
+        if self.limit_violations_label.text() != text:
+            self.limit_violations_label.setText(text)
+        if self.limit_violations_label.styleSheet() != style:
+            self.limit_violations_label.setStyleSheet(style)
+
+    def load_map(self) -> None:
+        """
+        Load the map into the web view. Starting the web engine is slow, so this is left until the window is shown.
+
+        Does nothing if the map is already loading or loaded.
+        """
+
+        if self.map_load_started is not None:
+            return
+        self.map_assets.prepare()
+        self.map_load_started = time.perf_counter()
+        get_timeline().mark("map loading")
+        if constants.WAYPOINT_SYNC_MODE == "channel":
+            self.waypoint_channel.is_connected = False
+            self.browser.setHtml(inline_qwebchannel_script(constants.HTML_MAP))
+        else:
+            self.browser.setHtml(constants.HTML_MAP)
+
+    def map_load_finished(self, ok: bool) -> None:
+        """
+        Print how long the map took to load and send it the whole track, since anything sent before was lost.
+
+        Parameters
+        ----------
+        ok
+            Whether the map loaded successfully.
+        """
+
+        self.map_loaded = ok
+        print(
+            f"Map {'loaded' if ok else 'failed to load'} in "
+            f"{1000 * (time.perf_counter() - self.map_load_started):.0f} ms."
+        )
+        if ok and not get_timeline().reached("map ready"):
+            get_timeline().mark("map ready")
+            get_timeline().print_timeline()
+        if ok:
+            self.track_history.resend()
+            self.update_track()
+            if constants.WAYPOINT_SYNC_MODE == "channel":
+                QTimer.singleShot(
+                    constants.WAYPOINT_CHANNEL_CONNECT_TIMEOUT,
+                    self.check_waypoint_channel,
+                )
+
+    def check_waypoint_channel(self) -> None:
+        """Warn if the map has not connected to the waypoint channel, since waypoints clicked on it are then lost."""
+
+        if not self.waypoint_channel.is_connected:
+            print(
+                "Warning: Map did not connect to the waypoint channel, waypoints added on the map will not be synced."
+            )
+
+    def update_track(self) -> None:
+        """Send the points added to the boat's track since the last update to the map."""
+
+        if not self.map_loaded:
+            return
+        new_track = self.track_history.take_new()
+        if new_track is None:
+            return
+        reset, new_points = new_track
+        if reset:
+            self.map_bridge.call("reset_track", self.track_history.min_zooms)
+        self.map_bridge.call("extend_track", new_points)
 
     def update_waypoints_display(self, waypoints: list[list[float]]) -> None:
         """
         Update waypoints display with fetched waypoints.
 
+        Nothing is done if the waypoints are the same as last time, otherwise only the rows of the table
+        that changed are updated.
+
         Parameters
         ----------
         waypoints
             List of waypoints fetched from the server.
         """
 
-        self.waypoints = waypoints
-        self.send_waypoints_button.setDisabled(not self.can_send_waypoints)
-        self.clear_waypoints_button.setDisabled(not self.can_reset_waypoints)
-        self.pull_waypoints_button.setDisabled(not self.can_pull_waypoints)
-        if self.num_waypoints != len(self.waypoints):
-            self.num_waypoints = len(self.waypoints)
-            if self.num_waypoints == 0:
+        ops = self.waypoint_differ.update(waypoints)
+        if ops is not None:
+            self.waypoints = waypoints
+            self.right_tab1_table.model().apply_ops(ops)
+            if len(self.waypoints) == 0:
                 self.can_pull_waypoints = True
                 self.can_reset_waypoints = False
             else:
@@ -1026,27 +1394,38 @@ class GroundStationWidget(QWidget):
                 self.can_reset_waypoints = True
             self.can_send_waypoints = True
 
-            self.right_tab1_table.clear()
-            self.right_tab1_table.setRowCount(0)
-            self.right_tab1_table.setColumnCount(2)
-            self.right_tab1_table.setHorizontalHeaderLabels(["Latitude", "Longitude"])
-
-            for waypoint in waypoints:
-                self.right_tab1_table.insertRow(self.right_tab1_table.rowCount())
-                for i, coord in enumerate(waypoint):
-                    item = QTableWidgetItem(f"{coord:.13f}")
-                    item.setFlags(Qt.ItemFlag.ItemIsEnabled)
-                    self.right_tab1_table.setItem(
-                        self.right_tab1_table.rowCount() - 1, i, item
-                    )
-            self.right_tab1_table.resizeColumnsToContents()
-            self.right_tab1_table.resizeRowsToContents()
+        self.send_waypoints_button.setDisabled(not self.can_send_waypoints)
+        self.clear_waypoints_button.setDisabled(not self.can_reset_waypoints)
+        self.pull_waypoints_button.setDisabled(not self.can_pull_waypoints)
+
+    def send_waypoint_ops_to_map(
+        self, ops: list[WaypointOp], color: Optional[str] = None
+    ) -> None:
+        """
+        Apply waypoint operations to the map.
+
+        Parameters
+        ----------
+        ops
+            Operations, computed against the waypoints on the map.
+        color
+            Color of inserted waypoints. Defaults to the map's waypoint color.
+        """
+
+        for op in ops:
+            if op.kind == "insert":
+                color_args = (color,) if color is not None else ()
+                self.map_bridge.call(
+                    "insert_waypoints", op.index, op.waypoints, *color_args
+                )
+            elif op.kind == "delete":
+                self.map_bridge.call("remove_waypoints", op.index, len(op.waypoints))
+            else:
+                self.map_bridge.call("move_waypoints", op.index, op.waypoints)
 
     def update_telemetry_display(
         self,
-        boat_data: dict[
-            str, Union[float, str, tuple[float, float], list[tuple[float, float]]]
-        ],
+        boat_data: TelemetryFrame,
     ) -> None:
         """
         Update telemetry display with boat data.
@@ -1054,7 +1433,7 @@ class GroundStationWidget(QWidget):
         Parameters
         ----------
         boat_data
-            Dictionary containing boat data fetched from the telemetry server.
+            The latest frame fetched from the telemetry server.
         """
 
         def fix_formatting(data_item: Optional[float]) -> str:
@@ -1062,7 +1441,7 @@ class GroundStationWidget(QWidget):
             Applies some formatting rules that multiple keys have in common.
 
             <ol>
-            <li> If the value is None, it is replaced with -69.420.
+            <li> If the value is None or NaN, it is replaced with -69.420.
             <li> If the value is negative, it is multiplied by -1.
             <li> The value is rounded to 5 decimal places.
             </ol>
@@ -1085,8 +1464,28 @@ class GroundStationWidget(QWidget):
                 The formatted value.
             """
 
+            if data_item is None or math.isnan(data_item):
+                return f"{-69.420:.5f}"
+            return f"{abs(data_item):.5f}"
+
+        def format_stats(field_stats: dict[str, float]) -> str:
+            """
+            Formats the rolling statistics of one field as `mean ± std [min, max], EWMA`.
+
+            Parameters
+            ----------
+            field_stats
+                The statistics of the field, as returned by `RollingStats.summary`.
+
+            Returns
+            -------
+            str
+                The formatted statistics.
+            """
+
             return (
-                f"{abs(data_item):.5f}" if data_item is not None else f"{-69.420:.5f}"
+                f"{field_stats['mean']:.5f} ± {field_stats['std']:.3f} "
+                f"[{field_stats['min']:.3f}, {field_stats['max']:.3f}], {field_stats['ewma']:.5f}"
             )
 
         def convert_to_seconds(ms: float) -> float:
@@ -1133,134 +1532,89 @@ class GroundStationWidget(QWidget):
                 print(f"Error calculating distance to waypoint: {e}")
                 return None
 
-        if self.boat_data == {}:
-            if boat_data.get("state") == "failed_to_fetch":
-                distance_to_next_waypoint = None
+        # when a fetch fails, keep showing the distance from the last frame that was received
+        route_data = boat_data
+        if boat_data.failed and self.boat_data is not None:
+            print("Warning: Failed to fetch boat data, trying previous data.")
+            route_data = self.boat_data
+            if route_data.failed:
+                print("Warning: Failed to fetch boat data again.")
+
+        waypoints = route_data.current_route
+        index = route_data.current_waypoint_index
+        distance_to_next_waypoint = None
+        if route_data.failed:
+            pass
+        elif len(waypoints) == 0:
+            print(f"Warning: No waypoints available. Waypoints: {waypoints}")
+        elif index is None or not 0 <= index < len(waypoints):
+            print(
+                f"Warning: Current waypoint index {index} is not in the route of {len(waypoints)} waypoints."
+            )
+        else:
+            distance_to_next_waypoint = get_distance_to_waypoint(
+                route_data.position, waypoints[index]
+            )
+            if distance_to_next_waypoint is None:
+                print("Warning: Error calculating distance to next waypoint.")
 
-            else:
-                waypoints = boat_data.get("current_route", [])
-                if len(waypoints) == 0:
-                    print(f"Warning: No waypoints available. Waypoints: {waypoints}")
-                    distance_to_next_waypoint = None
-                else:
-                    index = boat_data.get("current_waypoint_index")
-                    curr_position = boat_data.get("position")
-                    distance_to_next_waypoint = get_distance_to_waypoint(
-                        curr_position, waypoints[index]
-                    )
-                    if distance_to_next_waypoint is None:
-                        print("Warning: Error calculating distance to next waypoint.")
-
-            telemetry_text = f"""Boat Info:
-Position: {boat_data.get("position", -69.420)[0]:.8f}, {boat_data.get("position", -69.420)[1]:.8f}
-State: {boat_data.get("state", "N/A")}
-Speed: {boat_data.get("speed", -69.420):.5f} knots
-Distance To Next WP: {fix_formatting(distance_to_next_waypoint)} meters
-Bearing: {boat_data.get("bearing", -69.420):.5f}°
-Heading: {boat_data.get("heading", -69.420):.5f}°
-True Wind Speed: {boat_data.get("true_wind_speed", -69.420):.5f} knots
-True Wind Angle: {boat_data.get("true_wind_angle", -69.420):.5f}°
-Apparent Wind Speed: {boat_data.get("apparent_wind_speed", -69.420):.5f} knots
-Apparent Wind Angle: {boat_data.get("apparent_wind_angle", -69.420):.5f}°
-Sail Angle: {boat_data.get("sail_angle", -69.420):.5f}°
-Rudder Angle: {boat_data.get("rudder_angle", -69.420):.5f}°
-Current Waypoint Index: {boat_data.get("current_waypoint_index", "N/A")}
-Current Route: {boat_data.get("current_route", "N/A")}
-
-VESC Data:
-RPM: {fix_formatting(boat_data.get("vesc_data_rpm"))}
-Duty Cycle: {fix_formatting(boat_data.get("vesc_data_duty_cycle"))}%
-Amp Hours: {boat_data.get("vesc_data_amp_hours", -69.420):.5f} Ah
-Current to VESC: {boat_data.get("vesc_data_current_to_vesc", -69.420):.5f} A
-Voltage to VESC: {boat_data.get("vesc_data_voltage_to_vesc", -69.420):.5f} V
-Wattage to Motor: {fix_formatting(boat_data.get("vesc_data_wattage_to_motor"))} W
-Voltage to Motor: {boat_data.get("vesc_data_voltage_to_motor", -69.420):.5f} V
-Time Since VESC Startup: {convert_to_seconds(boat_data.get("vesc_data_time_since_vesc_startup_in_ms", -1.0)):.5f} seconds 
-Motor Temperature: {fix_formatting(boat_data.get("vesc_data_motor_temperature"))}°C
-"""
+        if boat_data.position is not None:
+            position = f"{boat_data.position[0]:.8f}, {boat_data.position[1]:.8f}"
         else:
-            if boat_data.get("state") == "failed_to_fetch":
-                print("Warning: Failed to fetch boat data, trying previous data.")
-                if self.boat_data.get("state") == "failed_to_fetch":
-                    print("Warning: Failed to fetch boat data again.")
-                    distance_to_next_waypoint = None
-                else:
-                    waypoints = self.boat_data.get("current_route", [])
-                    if len(waypoints) == 0:
-                        print(
-                            f"Warning: No waypoints available. Waypoints: {waypoints}"
-                        )
-                        distance_to_next_waypoint = None
-                    else:
-                        index = self.boat_data.get("current_waypoint_index")
-                        curr_position = self.boat_data.get("position")
-                        distance_to_next_waypoint = get_distance_to_waypoint(
-                            curr_position, waypoints[index]
-                        )
-                        if distance_to_next_waypoint is None:
-                            print(
-                                "Warning: Error calculating distance to next waypoint."
-                            )
-            else:
-                waypoints = boat_data.get("current_route", [])
-                if len(waypoints) == 0:
-                    print(f"Warning: No waypoints available. Waypoints: {waypoints}")
-                    distance_to_next_waypoint = None
-                else:
-                    index = boat_data.get("current_waypoint_index")
-                    curr_position = boat_data.get("position")
-                    distance_to_next_waypoint = get_distance_to_waypoint(
-                        curr_position, waypoints[index]
-                    )
-                    if distance_to_next_waypoint is None:
-                        print("Warning: Error calculating distance to next waypoint.")
-
-            for key in self.boat_data_averages.keys():
-                # self.boat_data = data from one iteration in the past
-                # boat_data = data from the current iteration
-                current_value = boat_data.get(key)
-                if current_value is not None:
-                    self.boat_data_averages[key] = (
-                        self.boat_data_averages[key] + current_value
-                    ) / 2
-
-            telemetry_text = f"""Boat Info:
-Position: {boat_data.get("position", -69.420)[0]:.8f}, {boat_data.get("position", -69.420)[1]:.8f}
-State: {boat_data.get("state", "N/A")}
-Speed: {boat_data.get("speed", -69.420):.5f} knots
-Distance To Next WP: {fix_formatting(distance_to_next_waypoint)} meters
-Bearing: {boat_data.get("bearing", -69.420):.5f}°
-Heading: {boat_data.get("heading", -69.420):.5f}°
-True Wind Speed: {boat_data.get("true_wind_speed", -69.420):.5f} knots
-True Wind Angle: {boat_data.get("true_wind_angle", -69.420):.5f}°
-Apparent Wind Speed: {boat_data.get("apparent_wind_speed", -69.420):.5f} knots
-Apparent Wind Angle: {boat_data.get("apparent_wind_angle", -69.420):.5f}°
-Sail Angle: {boat_data.get("sail_angle", -69.420):.5f}°
-Rudder Angle: {boat_data.get("rudder_angle", -69.420):.5f}°
-Current Waypoint Index: {boat_data.get("current_waypoint_index", "N/A")}
-Current Route: {boat_data.get("current_route", "N/A")}
-
-VESC Data:
-RPM: {fix_formatting(self.boat_data_averages.get("vesc_data_rpm"))}
-Duty Cycle: {fix_formatting(boat_data.get("vesc_data_duty_cycle"))}%
-Amp Hours: {self.boat_data_averages.get("vesc_data_amp_hours", -69.420):.5f} Ah
-Current to VESC: {self.boat_data_averages.get("vesc_data_current_to_vesc", -69.420):.5f} A
-Voltage to VESC: {self.boat_data_averages.get("vesc_data_voltage_to_vesc", -69.420):.5f} V
-Wattage to Motor: {fix_formatting(self.boat_data_averages.get("vesc_data_wattage_to_motor"))} W
-Voltage to Motor: {self.boat_data_averages.get("vesc_data_voltage_to_motor", -69.420):.5f} V
-Time Since VESC Startup: {convert_to_seconds(boat_data.get("vesc_data_time_since_vesc_startup_in_ms", -1)):.5f} seconds 
-Motor Temperature: {fix_formatting(self.boat_data_averages.get("vesc_data_motor_temperature"))}°C
-"""
-
-        if isinstance(boat_data.get("position"), list):
-            js_code = f"map.update_boat_location({boat_data.get('position')[0]}, {boat_data.get('position')[1]})"
-            self.browser.page().runJavaScript(js_code)
-
-        if isinstance(boat_data.get("heading"), float):
-            js_code = f"map.update_boat_heading({boat_data.get('heading')})"
-            self.browser.page().runJavaScript(js_code)
-
-        self.left_tab1_text_section.setText(telemetry_text)
+            position = "N/A"
+
+        if len(boat_data.current_route) == 0:
+            route = "No waypoints"
+        else:
+            route = f"{len(boat_data.current_route)} waypoints"
+            if boat_data.current_waypoint_index is not None:
+                route += f", heading to #{boat_data.current_waypoint_index}"
+
+        stats = self.rolling_stats.summary(constants.ROLLING_STATS_DISPLAY_WINDOW)
+        self.telemetry_panel.set_values(
+            {
+                "position": position,
+                "state": boat_data.state,
+                "speed": f"{boat_data.speed:.5f} knots",
+                "distance_to_next_waypoint": f"{fix_formatting(distance_to_next_waypoint)} meters",
+                "bearing": f"{boat_data.bearing:.5f}°",
+                "heading": f"{boat_data.heading:.5f}°",
+                "true_wind_speed": f"{boat_data.true_wind_speed:.5f} knots",
+                "true_wind_angle": f"{boat_data.true_wind_angle:.5f}°",
+                "apparent_wind_speed": f"{boat_data.apparent_wind_speed:.5f} knots",
+                "apparent_wind_angle": f"{boat_data.apparent_wind_angle:.5f}°",
+                "sail_angle": f"{boat_data.sail_angle:.5f}°",
+                "rudder_angle": f"{boat_data.rudder_angle:.5f}°",
+                "current_waypoint_index": str(boat_data.current_waypoint_index),
+                "current_route": route,
+                "vesc_data_rpm": format_stats(stats["vesc_data_rpm"]),
+                "vesc_data_duty_cycle": f"{format_stats(stats['vesc_data_duty_cycle'])}%",
+                "vesc_data_amp_hours": f"{format_stats(stats['vesc_data_amp_hours'])} Ah",
+                "vesc_data_current_to_vesc": f"{format_stats(stats['vesc_data_current_to_vesc'])} A",
+                "vesc_data_voltage_to_vesc": f"{format_stats(stats['vesc_data_voltage_to_vesc'])} V",
+                "vesc_data_wattage_to_motor": f"{format_stats(stats['vesc_data_wattage_to_motor'])} W",
+                "vesc_data_voltage_to_motor": f"{format_stats(stats['vesc_data_voltage_to_motor'])} V",
+                "vesc_data_time_since_vesc_startup_in_ms": f"{convert_to_seconds(boat_data.vesc_data_time_since_vesc_startup_in_ms):.5f} seconds",
+                "vesc_data_motor_temperature": f"{format_stats(stats['vesc_data_motor_temperature'])}°C",
+            }
+        )
+
+        if boat_data.position is not None:
+            self.map_bridge.call(
+                "update_boat_location",
+                boat_data.position[0],
+                boat_data.position[1],
+                coalesce=True,
+            )
+
+        if not math.isnan(boat_data.heading):
+            self.map_bridge.call(
+                "update_boat_heading", boat_data.heading, coalesce=True
+            )
+
+        self.update_track()
+        self.update_limit_violations()
+        self.update_replay_position()
         self.boat_data = boat_data
 
     # endregion pyqt thread functions
@@ -0,0 +1,56 @@
+from startup_timeline import get_timeline
+from PyQt5.QtGui import QShowEvent
+from PyQt5.QtWidgets import QVBoxLayout, QWidget
+from typing import Callable, Optional
+
+
+class LazyTab(QWidget):
+    """
+    Placeholder tab that builds its real widget the first time it is shown, or when `build` is called.
+
+    Inherits
+    -------
+    `QWidget`
+
+    Parameters
+    ----------
+    name
+        Name of the tab, used in the startup timeline.
+    factory
+        Creates the real widget.
+
+    Attributes
+    ----------
+    widget : `Optional[QWidget]`
+        The real widget, `None` until it is built.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], QWidget]) -> None:
+        super().__init__()
+        self.name = name
+        self.factory = factory
+        self.widget: Optional[QWidget] = None
+
+        self.main_layout = QVBoxLayout()
+        self.main_layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(self.main_layout)
+
+    def build(self) -> QWidget:
+        """
+        Build the real widget if it is not built yet.
+
+        Returns
+        -------
+        QWidget
+            The real widget.
+        """
+
+        if self.widget is None:
+            self.widget = self.factory()
+            self.main_layout.addWidget(self.widget)
+            get_timeline().mark(f"{self.name} tab built")
+        return self.widget
+
+    def showEvent(self, event: QShowEvent) -> None:
+        self.build()
+        super().showEvent(event)
@@ -0,0 +1,121 @@
+import constants
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtWidgets import (
+    QFormLayout,
+    QGroupBox,
+    QLabel,
+    QScrollArea,
+    QVBoxLayout,
+    QWidget,
+)
+from typing import Iterable
+
+
+class TelemetryPanel(QScrollArea):
+    """
+    Shows telemetry as one label per field, grouped into sections.
+
+    Values are passed in already formatted. A label is only touched when its text changes,
+    so fields that stay the same between frames cost nothing and text selected by the user is kept.
+
+    Inherits
+    -------
+    `QScrollArea`
+
+    Parameters
+    ----------
+    sections
+        For each section title, the fields shown in it as `(key, name)` pairs, where `key` is used to
+        update the field and `name` is shown next to its value.
+
+    Attributes
+    ----------
+    labels_updated : `int`
+        Number of times a value label was given new text.
+    labels_skipped : `int`
+        Number of times a value was passed in unchanged, so its label was not touched.
+    """
+
+    def __init__(self, sections: dict[str, list[tuple[str, str]]]) -> None:
+        super().__init__()
+        self.setWidgetResizable(True)
+        self.labels_updated = 0
+        self.labels_skipped = 0
+
+        self.groupboxes: dict[str, QGroupBox] = dict()
+        self.value_labels: dict[str, QLabel] = dict()
+        self.texts: dict[str, str] = dict()
+        self.highlighted: set[str] = set()
+
+        value_font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        contents = QWidget()
+        layout = QVBoxLayout(contents)
+        for title, fields in sections.items():
+            groupbox = QGroupBox(title)
+            form_layout = QFormLayout()
+            for key, name in fields:
+                value_label = QLabel("N/A")
+                value_label.setFont(value_font)
+                value_label.setTextInteractionFlags(
+                    Qt.TextInteractionFlag.TextSelectableByMouse
+                )
+                form_layout.addRow(f"{name}:", value_label)
+                self.value_labels[key] = value_label
+                self.texts[key] = "N/A"
+            groupbox.setLayout(form_layout)
+            layout.addWidget(groupbox)
+            self.groupboxes[title] = groupbox
+        layout.addStretch()
+        self.setWidget(contents)
+
+    def set_values(self, values: dict[str, str]) -> None:
+        """
+        Update the shown values.
+
+        Parameters
+        ----------
+        values
+            The formatted value of each field to update, keyed the same as in `sections`.
+            Fields that are left out keep their current value.
+        """
+
+        for key, text in values.items():
+            if self.texts[key] == text:
+                self.labels_skipped += 1
+                continue
+            self.texts[key] = text
+            self.value_labels[key].setText(text)
+            self.labels_updated += 1
+
+    def set_highlighted(self, keys: Iterable[str]) -> None:
+        """
+        Highlight some fields, e.g. because they are out of bounds, and clear the highlight on the rest.
+
+        Parameters
+        ----------
+        keys
+            The fields to highlight. Keys that are not shown in the panel are ignored.
+        """
+
+        highlighted = {key for key in keys if key in self.value_labels}
+        for key in highlighted ^ self.highlighted:
+            self.value_labels[key].setStyleSheet(
+                f"color: {constants.RED.name()}" if key in highlighted else ""
+            )
+        self.highlighted = highlighted
+
+    def set_section_title(self, section: str, title: str) -> None:
+        """
+        Change the title shown on a section.
+
+        Parameters
+        ----------
+        section
+            The title the section was created with.
+        title
+            The new title.
+        """
+
+        if self.groupboxes[section].title() != title:
+            self.groupboxes[section].setTitle(title)
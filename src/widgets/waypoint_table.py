@@ -0,0 +1,181 @@
+from waypoint_diff import WaypointOp
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtWidgets import QAbstractItemView, QHeaderView, QTableView
+from typing import Any, Optional
+
+WAYPOINT_TABLE_HEADERS = ("Latitude", "Longitude")
+
+
+class WaypointTableModel(QAbstractTableModel):
+    """
+    Holds the waypoints shown in the waypoint table, one row per waypoint.
+
+    Cells are formatted when the view asks for them, so only the rows on screen are ever formatted.
+    Changes are applied as operations from `waypoint_diff`, which only notify the view about the rows
+    that changed, so adding, removing or moving one waypoint costs the same however long the route is.
+
+    Inherits
+    -------
+    `QAbstractTableModel`
+
+    Attributes
+    ----------
+    waypoints : `list[list[float]]`
+        The waypoints in the table, each a list of `[latitude, longitude]`.
+    rows_inserted : `int`
+        Number of rows inserted into the table.
+    rows_removed : `int`
+        Number of rows removed from the table.
+    rows_changed : `int`
+        Number of rows whose coordinates were changed in place.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.waypoints: list[list[float]] = list()
+        self.rows_inserted = 0
+        self.rows_removed = 0
+        self.rows_changed = 0
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.waypoints)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(WAYPOINT_TABLE_HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{self.waypoints[index.row()][index.column()]:.13f}"
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def headerData(
+        self,
+        section: int,
+        orientation: Qt.Orientation,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return WAYPOINT_TABLE_HEADERS[section]
+        return str(section + 1)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def insert_waypoints(self, row: int, waypoints: list[list[float]]) -> None:
+        """
+        Insert waypoints before a row.
+
+        Parameters
+        ----------
+        row
+            The row to insert before, `len(waypoints)` to append.
+        waypoints
+            The waypoints to insert, each a list of `[latitude, longitude]`.
+        """
+
+        if not waypoints:
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(waypoints) - 1)
+        self.waypoints[row:row] = [list(waypoint) for waypoint in waypoints]
+        self.endInsertRows()
+        self.rows_inserted += len(waypoints)
+
+    def remove_waypoints(self, row: int, count: int = 1) -> None:
+        """
+        Remove waypoints starting at a row.
+
+        Parameters
+        ----------
+        row
+            The first row to remove.
+        count
+            The number of rows to remove. Defaults to `1`.
+        """
+
+        if count <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        del self.waypoints[row : row + count]
+        self.endRemoveRows()
+        self.rows_removed += count
+
+    def change_waypoints(self, row: int, waypoints: list[list[float]]) -> None:
+        """
+        Replace the coordinates of consecutive waypoints, starting at a row.
+
+        Parameters
+        ----------
+        row
+            The first row to change.
+        waypoints
+            The new coordinates, each a list of `[latitude, longitude]`.
+        """
+
+        if not waypoints:
+            return
+        self.waypoints[row : row + len(waypoints)] = [
+            list(waypoint) for waypoint in waypoints
+        ]
+        self.dataChanged.emit(
+            self.index(row, 0),
+            self.index(row + len(waypoints) - 1, self.columnCount() - 1),
+            [Qt.ItemDataRole.DisplayRole],
+        )
+        self.rows_changed += len(waypoints)
+
+    def apply_ops(self, ops: list[WaypointOp]) -> None:
+        """
+        Apply operations from `waypoint_diff.diff_waypoints`, notifying the view about each affected row range.
+
+        Parameters
+        ----------
+        ops
+            The operations, computed against the waypoints currently in the table.
+        """
+
+        for op in ops:
+            if op.kind == "insert":
+                self.insert_waypoints(op.index, op.waypoints)
+            elif op.kind == "delete":
+                self.remove_waypoints(op.index, len(op.waypoints))
+            else:
+                self.change_waypoints(op.index, op.waypoints)
+
+
+class WaypointTableView(QTableView):
+    """
+    Read-only table of waypoints with uniform row heights.
+
+    Rows all have the height of one line of text, so the view never measures row contents,
+    which keeps scrolling smooth with tens of thousands of waypoints.
+
+    Inherits
+    -------
+    `QTableView`
+
+    Parameters
+    ----------
+    model
+        The model to show. A new `WaypointTableModel` is created if not given.
+    """
+
+    def __init__(self, model: Optional[WaypointTableModel] = None) -> None:
+        super().__init__()
+        self.setModel(model if model is not None else WaypointTableModel())
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setWordWrap(False)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+
+        vertical_header = self.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(self.fontMetrics().height() + 6)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
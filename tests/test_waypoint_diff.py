@@ -0,0 +1,59 @@
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from waypoint_diff import apply_ops, diff_waypoints
+
+
+def random_waypoints(rng: random.Random, count: int) -> list[list[float]]:
+    return [[rng.uniform(-90, 90), rng.uniform(-180, 180)] for _ in range(count)]
+
+
+def test_random_lists_with_repeated_waypoints() -> None:
+    rng = random.Random(0)
+    for _ in range(2000):
+        pool = random_waypoints(rng, rng.randint(1, 6))
+        old = [rng.choice(pool) for _ in range(rng.randint(0, 20))]
+        new = [rng.choice(pool) for _ in range(rng.randint(0, 20))]
+        assert apply_ops(old, diff_waypoints(old, new)) == new
+
+
+def test_random_edits() -> None:
+    rng = random.Random(1)
+    for _ in range(2000):
+        old = random_waypoints(rng, rng.randint(0, 40))
+        new = list(old)
+        for _ in range(rng.randint(0, 5)):
+            edit = rng.random()
+            if edit < 0.25 and new:
+                new.pop(rng.randrange(len(new)))
+            elif edit < 0.5:
+                new.insert(rng.randint(0, len(new)), random_waypoints(rng, 1)[0])
+            elif edit < 0.75 and new:
+                new[rng.randrange(len(new))] = random_waypoints(rng, 1)[0]
+            elif new:
+                moved = new.pop(rng.randrange(len(new)))
+                new.insert(rng.randint(0, len(new)), moved)
+        assert apply_ops(old, diff_waypoints(old, new)) == new
+
+
+def test_equal_lists_need_no_operations() -> None:
+    old = random_waypoints(random.Random(2), 50)
+    assert diff_waypoints(old, list(old)) == []
+
+
+def test_moved_waypoint_is_one_delete_and_one_insert() -> None:
+    old = random_waypoints(random.Random(3), 1000)
+    for new in (
+        old[1:] + old[:1],
+        old[-1:] + old[:-1],
+        old[:100] + old[101:500] + [old[100]] + old[500:],
+    ):
+        ops = diff_waypoints(old, new)
+        assert sorted((op.kind, len(op.waypoints)) for op in ops) == [
+            ("delete", 1),
+            ("insert", 1),
+        ]
+        assert apply_ops(old, ops) == new